@@ -0,0 +1,146 @@
+"""
+Remote storage growth and write time of full vs delta dataset versioning.
+
+Both approaches start from the 3 rows of dvc_demo.py and add
+--rows-per-version rows for each of --versions versions. After every
+version the tracked directories are "pushed" to a content-addressed
+remote the way `dvc add <dir> && dvc push` does: one object per changed
+file plus the .dir listing of the directory. The bytes of the files
+committed to git (.dvc files, the delta manifest) are counted as well.
+
+    full   appends rows with df.loc[len(df.index)] = row, then rewrites
+           data/sample_data.csv, tracked as data.dvc (dvc_demo.py default)
+    delta  DeltaWriter: one new partition in the open group directory,
+           tracked by its own .dvc file, plus manifest.json in git
+
+Run from L3_DVC:
+    python bench_versioning.py --versions 1000
+"""
+import os
+import json
+import time
+import hashlib
+import argparse
+import tempfile
+import pandas as pd
+from delta_versioning import GROUP_SIZE, DeltaWriter, read_version
+
+BASE_ROWS = [{'Name': 'Alice', 'Age': 25, 'City': 'New York'},
+             {'Name': 'Bob', 'Age': 30, 'City': 'Los Angeles'},
+             {'Name': 'Charlie', 'Age': 35, 'City': 'Chicago'}]
+
+
+def new_rows(version: int, count: int) -> list:
+    return [{'Name': f'GF{version}_{i}', 'Age': 20 + (version + i) % 50, 'City': f'City{version}'}
+            for i in range(count)]
+
+
+def push_dir(data_dir: str, remote_dir: str, state: dict) -> str:
+    """
+    Store the files of `data_dir` and their .dir listing by MD5, like
+    `dvc push`, and return the text of the .dvc file tracking the directory.
+
+    `state` maps (path, mtime, size) to the MD5 already computed, as DVC's
+    state database does, so unchanged files are not hashed again.
+    """
+    entries, total = [], 0
+    for root, _, files in os.walk(data_dir):
+        for name in files:
+            path = os.path.join(root, name)
+            stat = os.stat(path)
+            key = (path, stat.st_mtime_ns, stat.st_size)
+            total += stat.st_size
+            if key not in state:
+                with open(path, 'rb') as file:
+                    payload = file.read()
+                state[key] = hashlib.md5(payload).hexdigest()
+                put_object(remote_dir, state[key], payload)
+            entries.append({'md5': state[key], 'relpath': os.path.relpath(path, data_dir)})
+    entries.sort(key=lambda entry: entry['relpath'])
+    listing = json.dumps(entries).encode('utf-8')
+    md5 = hashlib.md5(listing).hexdigest() + '.dir'
+    put_object(remote_dir, md5, listing)
+    return (f'outs:\n- md5: {md5}\n  size: {total}\n'
+            f'  nfiles: {len(entries)}\n  hash: md5\n  path: {os.path.basename(data_dir)}\n')
+
+
+def put_object(remote_dir: str, name: str, payload: bytes) -> None:
+    path = os.path.join(remote_dir, 'files', 'md5', name[:2], name[2:])
+    if not os.path.exists(path):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, 'wb') as file:
+            file.write(payload)
+
+
+def remote_size(remote_dir: str) -> tuple:
+    """(bytes, number of objects) under `remote_dir`."""
+    size = count = 0
+    for root, _, files in os.walk(remote_dir):
+        for name in files:
+            size += os.path.getsize(os.path.join(root, name))
+            count += 1
+    return size, count
+
+
+def run_full(workdir: str, versions: int, rows_per_version: int, group_size: int) -> tuple:
+    """Returns (write seconds, bytes committed to git)."""
+    data_dir = os.path.join(workdir, 'data')
+    os.makedirs(data_dir)
+    df = pd.DataFrame.from_records(BASE_ROWS)
+    elapsed, state, git_bytes = 0.0, {}, 0
+    for version in range(1, versions + 1):
+        start = time.perf_counter()
+        if version > 1:
+            for row in new_rows(version, rows_per_version):
+                df.loc[len(df.index)] = row
+        df.to_csv(os.path.join(data_dir, 'sample_data.csv'), index=False)
+        elapsed += time.perf_counter() - start
+        git_bytes += len(push_dir(data_dir, os.path.join(workdir, 'S3'), state))
+    return elapsed, git_bytes
+
+
+def run_delta(workdir: str, versions: int, rows_per_version: int, group_size: int) -> tuple:
+    """Returns (write seconds, bytes committed to git)."""
+    writer = DeltaWriter(os.path.join(workdir, 'data_delta', 'sample_data'), group_size)
+    elapsed, state, git_bytes = 0.0, {}, 0
+    for version in range(1, versions + 1):
+        rows = BASE_ROWS if version == 1 else new_rows(version, rows_per_version)
+        start = time.perf_counter()
+        changed = writer.append(rows)
+        elapsed += time.perf_counter() - start
+        # Only the open group is added again; the manifest goes to git
+        git_bytes += len(push_dir(changed, os.path.join(workdir, 'S3'), state))
+        git_bytes += os.path.getsize(os.path.join(writer.dataset_dir, 'manifest.json'))
+    return elapsed, git_bytes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--versions', type=int, default=1000)
+    parser.add_argument('--rows-per-version', type=int, default=1)
+    parser.add_argument('--group-size', type=int, default=GROUP_SIZE,
+                        help='partitions per DVC-tracked group directory (delta)')
+    args = parser.parse_args()
+
+    print(f"{'mode':<8}{'write s':>10}{'remote MB':>12}{'objects':>10}{'git MB':>9}"
+          f"{'read latest s':>15}")
+    frames = {}
+    for mode, run in (('full', run_full), ('delta', run_delta)):
+        with tempfile.TemporaryDirectory() as workdir:
+            write_time, git_bytes = run(workdir, args.versions, args.rows_per_version,
+                                        args.group_size)
+            size, count = remote_size(os.path.join(workdir, 'S3'))
+            start = time.perf_counter()
+            if mode == 'full':
+                frames[mode] = pd.read_csv(os.path.join(workdir, 'data', 'sample_data.csv'))
+            else:
+                frames[mode] = read_version(os.path.join(workdir, 'data_delta', 'sample_data'))
+            read_time = time.perf_counter() - start
+        print(f"{mode:<8}{write_time:>10.2f}{size / 2**20:>12.2f}{count:>10}"
+              f"{git_bytes / 2**20:>9.2f}{read_time:>15.3f}")
+    print(f"latest versions identical: {frames['full'].equals(frames['delta'])}")
+
+
+if __name__ == '__main__':
+    main()
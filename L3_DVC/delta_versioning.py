@@ -0,0 +1,139 @@
+"""
+Append-only delta versioning of a CSV dataset.
+
+Every version writes only its new rows as an immutable partition file.
+Partitions are grouped in sub-directories of `group_size` partitions:
+
+    data_delta/sample_data/manifest.json
+    data_delta/sample_data/group-0001/part-000001.csv ... part-000032.csv
+    data_delta/sample_data/group-0002/part-000033.csv ...
+
+Each group is tracked by its own .dvc file (`dvc add <group dir>`), so once
+a group is full its .dir listing never changes again and a push only
+uploads the new partition plus the listing of the open group, which has
+at most `group_size` entries. The manifest has a constant size (the
+columns, the number of partitions and the group size; partition paths are
+derived from their number) and is committed to git directly.
+
+A version is read back by concatenating its first partitions:
+    df = read_version('data_delta/sample_data', version=2)
+"""
+import os
+import io
+import json
+import tempfile
+import pandas as pd
+
+MANIFEST = 'manifest.json'
+# Partitions per DVC-tracked group directory
+GROUP_SIZE = 32
+
+
+def _write_atomic(path: str, payload: bytes) -> None:
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path) or '.', suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(payload)
+        os.replace(tmp_path, path)
+    except Exception:
+        os.unlink(tmp_path)
+        raise
+
+
+def load_manifest(dataset_dir: str):
+    """Manifest of a dataset, or None if nothing was written yet."""
+    try:
+        with open(os.path.join(dataset_dir, MANIFEST), 'r') as file:
+            return json.load(file)
+    except FileNotFoundError:
+        return None
+
+
+def group_dir(version: int, group_size: int) -> str:
+    """Group directory of a version's partition, relative to the dataset directory."""
+    return f'group-{(version - 1) // group_size + 1:04d}'
+
+
+def partition_path(version: int, group_size: int) -> str:
+    """Partition file of a version, relative to the dataset directory."""
+    return os.path.join(group_dir(version, group_size), f'part-{version:06d}.csv')
+
+
+class DeltaWriter:
+    """
+    Append versions of a dataset as delta partitions.
+
+    Args:
+        dataset_dir (str): Directory holding the group directories and manifest.json.
+        group_size (int): Partitions per group directory; only used for a new
+            dataset, an existing one keeps the group size of its manifest.
+    """
+
+    def __init__(self, dataset_dir: str, group_size: int = GROUP_SIZE):
+        self.dataset_dir = dataset_dir
+        self.manifest = load_manifest(dataset_dir)
+        self.group_size = self.manifest['group_size'] if self.manifest else group_size
+
+    @property
+    def version(self) -> int:
+        """Latest version written, 0 before the first one."""
+        return self.manifest['partitions'] if self.manifest else 0
+
+    def append(self, rows) -> str:
+        """
+        Write a new version made of the previous one plus `rows`.
+
+        Args:
+            rows (pd.DataFrame | list[dict]): All rows added by this version,
+                appended as one batch.
+
+        Returns:
+            str: Group directory holding the new partition, the one to
+            `dvc add` again.
+        """
+        df = rows if isinstance(rows, pd.DataFrame) else pd.DataFrame.from_records(rows)
+        columns = list(df.columns)
+        if self.manifest and columns != self.manifest['columns']:
+            raise ValueError(f"Columns {columns} do not match {self.manifest['columns']}")
+
+        version = self.version + 1
+        path = os.path.join(self.dataset_dir, partition_path(version, self.group_size))
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Mode 'x' refuses to replace a partition of an existing version
+        with open(path, 'x', newline='') as file:
+            df.to_csv(file, index=False)
+
+        manifest = {'columns': columns, 'partitions': version, 'group_size': self.group_size}
+        _write_atomic(os.path.join(self.dataset_dir, MANIFEST),
+                      json.dumps(manifest, indent=2).encode('utf-8'))
+        self.manifest = manifest
+        return os.path.dirname(path)
+
+
+def read_version(dataset_dir: str, version: int = None) -> pd.DataFrame:
+    """
+    Reconstruct one version by concatenating its partitions.
+
+    Args:
+        dataset_dir (str): Directory written by DeltaWriter.
+        version (int): Version to read, the latest one if None.
+
+    Returns:
+        pd.DataFrame: Rows of every version up to `version`, in order.
+    """
+    manifest = load_manifest(dataset_dir)
+    if manifest is None:
+        raise FileNotFoundError(f'No versions written to {dataset_dir}')
+    if version is None:
+        version = manifest['partitions']
+    if not 1 <= version <= manifest['partitions']:
+        raise ValueError(f"Version {version} not in 1..{manifest['partitions']}")
+
+    # Partitions share the header, so their rows are parsed in a single pass
+    payloads = []
+    for number in range(1, version + 1):
+        with open(os.path.join(dataset_dir, partition_path(number, manifest['group_size'])),
+                  'rb') as file:
+            payloads.append(file.read())
+    body = b''.join(payload.split(b'\n', 1)[1] for payload in payloads[1:])
+    return pd.read_csv(io.BytesIO(payloads[0] + body))
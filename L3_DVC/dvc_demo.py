@@ -1,30 +1,42 @@
 import pandas as pd
 import os
-
-# Create a sample DataFrame with column names
-data = {'Name': ['Alice', 'Bob', 'Charlie'],
-    'Age': [25, 30, 35],
-    'City': ['New York', 'Los Angeles', 'Chicago']
-    }
-
-df = pd.DataFrame(data)
-
-# Adding new row to df for V2
-new_row_loc = {'Name': 'GF1', 'Age': 20, 'City': 'City1'}
-df.loc[len(df.index)] = new_row_loc
-
-# # Adding new row to df for V3
-new_row_loc2 = {'Name': 'GF2', 'Age': 30, 'City': 'City2'}
-df.loc[len(df.index)] = new_row_loc2
-
-# Ensure the "data" directory exists at the root level
-data_dir = 'data/'
-os.makedirs(data_dir, exist_ok=True)
-
-# Define the file path
-file_path = os.path.join(data_dir, 'sample_data.csv')
-
-# Save the DataFrame to a CSV file, including column names
-df.to_csv(file_path, index=False)
-
-print(f"CSV file saved to {file_path}")
\ No newline at end of file
+import sys
+from delta_versioning import DeltaWriter
+
+# Rows added by each version of the data, appended as one batch per version
+versions = [
+    # V1: sample data with column names
+    [{'Name': 'Alice', 'Age': 25, 'City': 'New York'},
+     {'Name': 'Bob', 'Age': 30, 'City': 'Los Angeles'},
+     {'Name': 'Charlie', 'Age': 35, 'City': 'Chicago'}],
+    # V2
+    [{'Name': 'GF1', 'Age': 20, 'City': 'City1'}],
+    # V3
+    [{'Name': 'GF2', 'Age': 30, 'City': 'City2'}],
+]
+
+if '--delta' in sys.argv:
+    # Delta versioning (worth it once versions add more than a few rows): every
+    # version only adds a partition with its new rows under data_delta/sample_data/
+    writer = DeltaWriter(os.path.join('data_delta', 'sample_data'))
+    changed = set()
+    for rows in versions[writer.version:]:
+        changed.add(writer.append(rows))
+        print(f"Version {writer.version} saved")
+    print(f"Data is at version {writer.version} ({writer.dataset_dir})")
+    for directory in sorted(changed):
+        print(f"Track it with: dvc add {directory}")
+else:
+    # Ensure the "data" directory exists at the root level
+    data_dir = 'data/'
+    os.makedirs(data_dir, exist_ok=True)
+
+    # Define the file path
+    file_path = os.path.join(data_dir, 'sample_data.csv')
+
+    # Save the DataFrame to a CSV file, including column names; the rows of all
+    # versions are built in one batch instead of growing the frame with .loc
+    df = pd.DataFrame.from_records([row for rows in versions for row in rows])
+    df.to_csv(file_path, index=False)
+
+    print(f"CSV file saved to {file_path}")
@@ -0,0 +1,49 @@
+"""
+Stage I/O time and artifact size for each artifact format.
+
+Writes and reads a synthetic corpus (default 1M messages) through
+`artifact_io`, the same layer the pipeline stages use, and reports write
+time, full read time, projected read time ('text' only) and file size.
+
+Run from the project root:
+    python benchmarks/bench_artifact_io.py --rows 1000000
+"""
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from artifact_io import FORMATS, artifact_path, read_frame, write_frame  # noqa: E402
+from synthetic import make_messages  # noqa: E402
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--formats', nargs='+', default=list(FORMATS))
+    args = parser.parse_args()
+
+    df = make_messages(args.rows)
+    print(f"{'format':<10}{'write s':>10}{'read s':>10}{'text-only s':>13}{'size MB':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        for fmt in args.formats:
+            path = artifact_path(tmp, 'corpus', fmt)
+            _, write_time = timed(write_frame, df, path, fmt)
+            _, read_time = timed(read_frame, path, fmt)
+            _, projected_time = timed(read_frame, path, fmt, columns=['text'])
+            size_mb = os.path.getsize(path) / 2**20
+            print(f"{fmt:<10}{write_time:>10.2f}{read_time:>10.2f}"
+                  f"{projected_time:>13.2f}{size_mb:>10.1f}")
+
+
+if __name__ == '__main__':
+    main()
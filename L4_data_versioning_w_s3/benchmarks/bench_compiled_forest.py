@@ -0,0 +1,87 @@
+"""
+Small-batch scoring latency of the forest predictors.
+
+Trains a forest on TF-IDF features of a synthetic corpus and times
+`predict_proba` per call at each batch size for:
+  sklearn          - RandomForestClassifier (n_jobs=1)
+  forest_arrays    - model_io.ArrayForest, one tree at a time
+  forest_compiled  - model_io.CompiledForest, all trees at once
+
+The compiled predictor is checked against sklearn's probabilities to
+within --tolerance on every batch.
+
+Run from the project root:
+    python benchmarks/bench_compiled_forest.py --batch-sizes 1 32 1024
+"""
+import argparse
+import logging
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np  # noqa: E402
+from sklearn.ensemble import RandomForestClassifier  # noqa: E402
+from sklearn.feature_extraction.text import TfidfVectorizer  # noqa: E402
+
+import model_io  # noqa: E402
+from synthetic import make_messages  # noqa: E402
+
+# model_io logs every save and load at DEBUG
+logging.disable(logging.INFO)
+
+
+def latency(predict_proba, X, repeat: int) -> float:
+    """Median seconds per predict_proba call."""
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        predict_proba(X)
+        times.append(time.perf_counter() - start)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--batch-sizes', type=int, nargs='+', default=[1, 32, 1024])
+    parser.add_argument('--rows', type=int, default=5000, help='training rows')
+    parser.add_argument('--max-features', type=int, default=50)
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--repeat', type=int, default=50)
+    parser.add_argument('--tolerance', type=float, default=1e-6)
+    args = parser.parse_args()
+
+    corpus = make_messages(args.rows + max(args.batch_sizes))
+    X = TfidfVectorizer(max_features=args.max_features).fit_transform(corpus['text']).tocsr()
+    y = (corpus['target'] == 'spam').to_numpy(dtype=int)
+    clf = RandomForestClassifier(n_estimators=args.trees, random_state=0)
+    clf.fit(X[:args.rows], y[:args.rows])
+
+    with tempfile.TemporaryDirectory() as tmp:
+        predictors = {'sklearn': clf}
+        for fmt in ('forest_arrays', 'forest_compiled'):
+            path = os.path.join(tmp, f'{fmt}.joblib')
+            model_io.save_model(clf, path, fmt)
+            predictors[fmt] = model_io.load_model(path)
+
+        print(f"{'batch':>6}" + ''.join(f'{name + " ms":>20}' for name in predictors)
+              + f"{'speedup':>9}{'max |diff|':>12}")
+        for batch_size in args.batch_sizes:
+            X_batch = X[args.rows:args.rows + batch_size]
+            difference = np.abs(predictors['forest_compiled'].predict_proba(X_batch)
+                                - clf.predict_proba(X_batch)).max()
+            if difference > args.tolerance:
+                raise AssertionError(f'Compiled forest differs from sklearn by {difference:.2e}')
+            timings = {name: latency(model.predict_proba, X_batch, args.repeat)
+                       for name, model in predictors.items()}
+            print(f"{batch_size:>6}" + ''.join(f'{seconds * 1e3:>20.3f}' for seconds in timings.values())
+                  + f"{timings['sklearn'] / timings['forest_compiled']:>8.1f}x{difference:>12.1e}",
+                  flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,68 @@
+"""
+Fit and transform throughput of the tfidf and hashing feature backends.
+
+The corpus is normalized with `TextNormalizer` first, so the vectorizers
+see the same kind of text the pipeline feeds them.
+
+Run from the project root:
+    python benchmarks/bench_feature_backends.py --rows 200000 --n-jobs 1 4
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer, TfidfVectorizer  # noqa: E402
+
+from data_preprocessing import download_nltk_resources, transform_column  # noqa: E402
+from feature_engineering import vectorize_parallel  # noqa: E402
+from synthetic import make_messages  # noqa: E402
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=200_000)
+    parser.add_argument('--max-features', type=int, default=50)
+    parser.add_argument('--n-features', type=int, default=2**18)
+    parser.add_argument('--n-jobs', type=int, nargs='+', default=[1, os.cpu_count() or 1])
+    parser.add_argument('--chunk-size', type=int, default=10000)
+    args = parser.parse_args()
+
+    download_nltk_resources()
+    texts = make_messages(args.rows)['text'].tolist()
+    texts = transform_column(texts, n_jobs=max(args.n_jobs), chunk_size=args.chunk_size)
+    split = int(len(texts) * 0.67)
+    train, test = texts[:split], texts[split:]
+
+    print(f"{'backend':<22}{'fit s':>8}{'transform s':>13}{'rows/sec':>12}")
+
+    tfidf = TfidfVectorizer(max_features=args.max_features)
+    _, fit_time = timed(tfidf.fit_transform, train)
+    _, transform_time = timed(tfidf.transform, test)
+    print(f"{'tfidf':<22}{fit_time:>8.2f}{transform_time:>13.2f}"
+          f"{len(texts) / (fit_time + transform_time):>12.0f}")
+
+    hasher = HashingVectorizer(n_features=args.n_features, alternate_sign=False, norm=None)
+    for n_jobs in args.n_jobs:
+        start = time.perf_counter()
+        counts = vectorize_parallel(hasher, train, n_jobs, args.chunk_size)
+        idf = TfidfTransformer().fit(counts)
+        idf.transform(counts)
+        fit_time = time.perf_counter() - start
+        start = time.perf_counter()
+        idf.transform(vectorize_parallel(hasher, test, n_jobs, args.chunk_size))
+        transform_time = time.perf_counter() - start
+        print(f"{f'hashing+idf n_jobs={n_jobs}':<22}{fit_time:>8.2f}{transform_time:>13.2f}"
+              f"{len(texts) / (fit_time + transform_time):>12.0f}")
+
+
+if __name__ == '__main__':
+    main()
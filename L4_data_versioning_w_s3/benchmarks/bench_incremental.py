@@ -0,0 +1,123 @@
+"""
+Training throughput and peak memory of the model_training algorithms.
+
+A synthetic sparse feature artifact of --rows rows is written the way
+feature_engineering saves it, then every algorithm is trained in a freshly
+spawned process, as the model_training stage would:
+  random_forest  - load_features + train_model on the whole matrix
+  others         - train_incremental streaming --chunk-size rows at a time
+
+Reported per algorithm: wall time, rows/s (rows seen over all epochs),
+how far the RSS and the anonymous memory (RSS without mapped file pages,
+which the kernel can drop) of the process rose while training, and the
+accuracy on a held-out split. Memory columns need Linux.
+
+Run from the project root:
+    python benchmarks/bench_incremental.py --rows 20000 100000
+    python benchmarks/bench_incremental.py --rows 1000000 10000000 \
+        --algorithms sgd multinomial_nb passive_aggressive
+"""
+import argparse
+import multiprocessing
+import os
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np  # noqa: E402
+import scipy.sparse  # noqa: E402
+
+import model_training  # noqa: E402
+from artifact_io import feature_rows, load_features, save_features  # noqa: E402
+from memory import PeakRSSSampler, current_rss_mb, smaps_rollup_mb  # noqa: E402
+
+ALGORITHMS = ('random_forest',) + model_training.INCREMENTAL_ALGORITHMS
+
+
+def write_features(directory: str, name: str, n_rows: int, n_features: int, seed: int) -> tuple:
+    """Save a non-negative sparse matrix whose label depends linearly on it."""
+    rng = np.random.default_rng(seed)
+    # Same weights for every split, so the held-out split is learnable
+    weights = np.random.default_rng(0).normal(size=n_features)
+    X = scipy.sparse.random(n_rows, n_features, density=0.1, format='csr', random_state=rng)
+    y = (X @ weights + rng.normal(scale=0.05, size=n_rows) > 0).astype(int)
+    paths = (os.path.join(directory, f'{name}.npz'), os.path.join(directory, f'{name}_labels.npy'))
+    save_features(X, y, *paths)
+    return paths
+
+
+def _train(algorithm, params, train_paths, test_paths, results):
+    # Imported up front so the growth column only counts data and model
+    import sklearn.ensemble  # noqa: F401
+    import sklearn.linear_model  # noqa: F401
+    import sklearn.naive_bayes  # noqa: F401
+
+    def anon_mb():
+        return smaps_rollup_mb().get('anon_mb', float('nan'))
+
+    # ru_maxrss would include the parent's RSS at fork time, so both are sampled
+    rss_before, anon_before = current_rss_mb(), anon_mb()
+    with PeakRSSSampler() as rss, PeakRSSSampler(sample=anon_mb) as anon:
+        start = time.perf_counter()
+        if algorithm == 'random_forest':
+            X_train, y_train = load_features(*train_paths)
+            clf = model_training.train_model(X_train, y_train, params)
+            rows_seen = X_train.shape[0]
+        else:
+            n_rows = feature_rows(train_paths[0])
+            clf = model_training.train_incremental(
+                model_training.feature_file_reader(*train_paths), n_rows,
+                model_training.label_classes(train_paths[1], params['chunk_size']), params)
+            rows_seen = n_rows * (1 if algorithm == 'multinomial_nb' else params['epochs'])
+        wall_s = time.perf_counter() - start
+    X_test, y_test = load_features(*test_paths)
+    results.put({'wall_s': wall_s, 'rows_per_s': rows_seen / wall_s,
+                 'rss_mb': rss.peak_mb - rss_before, 'anon_mb': anon.peak_mb - anon_before,
+                 'accuracy': float(np.mean(clf.predict(X_test) == y_test))})
+
+
+def run(algorithm: str, params: dict, train_paths: tuple, test_paths: tuple) -> dict:
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    process = context.Process(target=_train,
+                              args=(algorithm, params, train_paths, test_paths, results))
+    process.start()
+    result = results.get()
+    process.join()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[20_000, 100_000])
+    parser.add_argument('--features', type=int, default=100)
+    parser.add_argument('--test-rows', type=int, default=20_000)
+    parser.add_argument('--algorithms', nargs='+', default=list(ALGORITHMS), choices=ALGORITHMS)
+    parser.add_argument('--n-estimators', type=int, default=100)
+    parser.add_argument('--epochs', type=int, default=5)
+    parser.add_argument('--chunk-size', type=int, default=100_000)
+    args = parser.parse_args()
+
+    params = {
+        'algorithm': None, 'n_estimators': args.n_estimators, 'random_state': 2, 'n_jobs': 1,
+        'growth_step': args.n_estimators, 'oob_score': False,
+        'epochs': args.epochs, 'chunk_size': args.chunk_size,
+    }
+    print(f"{'rows':>10}  {'algorithm':<20}{'wall s':>9}{'rows/s':>12}{'+rss MB':>9}"
+          f"{'+anon MB':>10}{'accuracy':>10}")
+    with tempfile.TemporaryDirectory() as tmp:
+        test_paths = write_features(tmp, 'test', args.test_rows, args.features, seed=1)
+        for n_rows in args.rows:
+            train_paths = write_features(tmp, 'train', n_rows, args.features, seed=2)
+            for algorithm in args.algorithms:
+                row = run(algorithm, dict(params, algorithm=algorithm), train_paths, test_paths)
+                print(f"{n_rows:>10}  {algorithm:<20}{row['wall_s']:>9.2f}{row['rows_per_s']:>12.0f}"
+                      f"{row['rss_mb']:>9.0f}{row['anon_mb']:>10.0f}{row['accuracy']:>10.4f}",
+                      flush=True)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,151 @@
+"""
+Logging overhead in `preprocess_df` and `train_model`, before and after the
+shared queue-based logging of logging_setup.
+
+Every mode runs in its own process, with the console going to /dev/null
+and the log files to a temporary directory:
+  off          logging disabled, the floor the others are compared with
+  legacy       the previous per-module setup: DEBUG, synchronous console
+               and file handlers on every logger
+  queue_nolimit
+               logging_setup at DEBUG without rate limiting, written by
+               the listener thread
+  queue_debug  the same with the default rate limit
+  queue_info   logging_setup at INFO, the params.yaml default
+
+Besides the two functions (best of --repeat runs), each mode times a
+per-row loop of --records `logger.debug` calls on one message, as a stage
+logging every row would; 'drain s' is the time the listener then needs
+to write out what was queued.
+
+Run from the project root:
+    python benchmarks/bench_logging.py --rows 20000 --records 100000
+"""
+import argparse
+import json
+import logging
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+SRC = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+sys.path.insert(0, SRC)
+
+MODES = ('off', 'legacy', 'queue_nolimit', 'queue_debug', 'queue_info')
+FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+def legacy_logging(names: list) -> None:
+    """Put back the per-module console and file handlers every module used to attach."""
+    import logging_setup
+
+    os.makedirs('logs', exist_ok=True)
+    for name in names:
+        logger = logging.getLogger(name)
+        logger.removeHandler(logging_setup._queue_handler)
+        logger.setLevel('DEBUG')
+        console_handler = logging.StreamHandler()
+        file_handler = logging.FileHandler(os.path.join('logs', f'{name}.log'))
+        for handler in (console_handler, file_handler):
+            handler.setLevel('DEBUG')
+            handler.setFormatter(logging.Formatter(FORMAT))
+            logger.addHandler(handler)
+
+
+def best_of(repeat: int, func, *args) -> float:
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+    return min(times)
+
+
+def worker(mode: str, args) -> dict:
+    import logging_setup
+    import data_preprocessing
+    import model_training
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from synthetic import make_messages
+
+    if mode == 'off':
+        logging.disable(logging.CRITICAL)
+    elif mode == 'legacy':
+        legacy_logging(sorted(logging_setup._loggers))
+    elif mode == 'queue_nolimit':
+        logging_setup.configure(level='DEBUG', rate_limit=0)
+    else:
+        logging_setup.configure(level='DEBUG' if mode == 'queue_debug' else 'INFO')
+
+    data_preprocessing.download_nltk_resources()
+    df = make_messages(args.rows)
+    X = TfidfVectorizer(max_features=50).fit_transform(df['text'])
+    y = (df['target'] == 'spam').to_numpy(dtype=int)
+    params = {'n_estimators': args.trees, 'random_state': 2, 'n_jobs': 1,
+              'growth_step': max(args.trees // 4, 1), 'oob_score': False}
+
+    # Warm-up: NLTK imports and resources are not logging overhead
+    data_preprocessing.preprocess_df(df.head(100).copy())
+    result = {
+        'preprocess_df': best_of(args.repeat, lambda: data_preprocessing.preprocess_df(df.copy())),
+        'train_model': best_of(args.repeat, model_training.train_model, X, y, params),
+    }
+
+    logger = data_preprocessing.logger
+    start = time.perf_counter()
+    for row in range(args.records):
+        logger.debug('Row %d transformed', row)
+    result['per_record_us'] = (time.perf_counter() - start) / args.records * 1e6
+    start = time.perf_counter()
+    logging_setup.stop()
+    for handler in logger.handlers:
+        handler.flush()
+    result['drain_s'] = time.perf_counter() - start
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=20_000)
+    parser.add_argument('--trees', type=int, default=100)
+    parser.add_argument('--records', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--modes', nargs='+', default=list(MODES), choices=MODES)
+    parser.add_argument('--worker', choices=MODES, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker:
+        print(json.dumps(worker(args.worker, args)))
+        return
+
+    results = {}
+    print(f"{'mode':<15}{'preprocess_df s':>16}{'train_model s':>14}"
+          f"{'us/record':>11}{'drain s':>9}")
+    for mode in args.modes:
+        with tempfile.TemporaryDirectory() as tmp:
+            env = dict(os.environ, PYTHONPATH=os.path.dirname(os.path.abspath(__file__)))
+            env.pop('MLOPS_LOG_LEVEL', None)
+            output = subprocess.run(
+                [sys.executable, os.path.abspath(__file__), '--worker', mode,
+                 '--rows', str(args.rows), '--trees', str(args.trees),
+                 '--records', str(args.records), '--repeat', str(args.repeat)],
+                cwd=tmp, env=env, stdout=subprocess.PIPE, stderr=subprocess.DEVNULL,
+                check=True, text=True).stdout
+        row = results[mode] = json.loads(output.strip().splitlines()[-1])
+        print(f"{mode:<15}{row['preprocess_df']:>16.3f}{row['train_model']:>14.3f}"
+              f"{row['per_record_us']:>11.2f}{row['drain_s']:>9.3f}", flush=True)
+
+    if 'off' in results:
+        print('\noverhead over logging disabled:')
+        for mode, row in results.items():
+            if mode != 'off':
+                print(f"  {mode:<15}" + '  '.join(
+                    f"{name} {100 * (row[name] / results['off'][name] - 1):+.1f}%"
+                    for name in ('preprocess_df', 'train_model')))
+
+
+if __name__ == '__main__':
+    main()
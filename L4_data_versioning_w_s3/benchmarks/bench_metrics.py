@@ -0,0 +1,107 @@
+"""
+Evaluation time of the single-pass metrics engine against the previous
+approach.
+
+  legacy  - clf.predict and clf.predict_proba (two passes over the forest),
+            then accuracy/precision/recall/roc_auc each computed by sklearn
+  engine  - one predict_proba pass, then every metric and both curves from
+            `eval_metrics.binary_report`
+
+Both are timed end to end on a forest and on the metrics alone (given the
+probabilities), and the engine's scalar metrics are checked against sklearn.
+
+Run from the project root:
+    python benchmarks/bench_metrics.py --rows 100000 1000000
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np  # noqa: E402
+import scipy.sparse  # noqa: E402
+from sklearn.ensemble import RandomForestClassifier  # noqa: E402
+from sklearn.metrics import (accuracy_score, average_precision_score, f1_score,  # noqa: E402
+                             precision_score, recall_score, roc_auc_score)
+
+from eval_metrics import binary_report  # noqa: E402
+
+
+def make_features(n_rows: int, n_features: int, seed: int = 0) -> tuple:
+    """Sparse non-negative features with a noisy linear spam/ham label."""
+    rng = np.random.default_rng(seed)
+    X = scipy.sparse.random(n_rows, n_features, density=0.1, format='csr', random_state=rng)
+    weights = rng.normal(size=n_features)
+    y = (X @ weights + rng.normal(scale=0.1, size=n_rows) > 0.05).astype(int)
+    return X, y
+
+
+def legacy_metrics(y, y_pred, scores) -> dict:
+    return {
+        'accuracy': accuracy_score(y, y_pred),
+        'precision': precision_score(y, y_pred),
+        'recall': recall_score(y, y_pred),
+        'roc_auc': roc_auc_score(y, scores),
+    }
+
+
+def legacy_evaluate(clf, X, y) -> dict:
+    y_pred = clf.predict(X)
+    return legacy_metrics(y, y_pred, clf.predict_proba(X)[:, 1])
+
+
+def engine_evaluate(clf, X, y) -> dict:
+    return binary_report(y, clf.predict_proba(X), clf.classes_)[0]
+
+
+def timed(func, *args) -> tuple:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def check(y, proba, metrics) -> None:
+    """The engine's metrics must agree with sklearn's on the same probabilities."""
+    y_pred = np.argmax(proba, axis=1)
+    expected = dict(legacy_metrics(y, y_pred, proba[:, 1]),
+                    f1=f1_score(y, y_pred), pr_auc=average_precision_score(y, proba[:, 1]))
+    for name, value in expected.items():
+        if not np.isclose(metrics[name], value, rtol=0, atol=1e-12):
+            raise AssertionError(f'{name}: engine {metrics[name]} != sklearn {value}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[100_000, 1_000_000],
+                        help='test set sizes')
+    parser.add_argument('--train-rows', type=int, default=20_000)
+    parser.add_argument('--features', type=int, default=50)
+    parser.add_argument('--trees', type=int, default=100)
+    args = parser.parse_args()
+
+    X_train, y_train = make_features(args.train_rows, args.features, seed=1)
+    clf = RandomForestClassifier(n_estimators=args.trees, random_state=0).fit(X_train, y_train)
+
+    print(f"{'rows':>10}  {'step':<10}{'legacy s':>10}{'engine s':>10}{'speedup':>9}")
+    for n_rows in args.rows:
+        X, y = make_features(n_rows, args.features)
+        proba = clf.predict_proba(X)
+        y_pred = np.argmax(proba, axis=1)
+
+        metrics, engine_s = timed(lambda: binary_report(y, proba, clf.classes_)[0])
+        check(y, proba, metrics)
+        _, legacy_s = timed(legacy_metrics, y, y_pred, proba[:, 1])
+        print(f"{n_rows:>10}  {'metrics':<10}{legacy_s:>10.3f}{engine_s:>10.3f}"
+              f"{legacy_s / engine_s:>8.1f}x", flush=True)
+
+        _, legacy_s = timed(legacy_evaluate, clf, X, y)
+        _, engine_s = timed(engine_evaluate, clf, X, y)
+        print(f"{n_rows:>10}  {'evaluate':<10}{legacy_s:>10.3f}{engine_s:>10.3f}"
+              f"{legacy_s / engine_s:>8.1f}x", flush=True)
+
+
+if __name__ == '__main__':
+    main()
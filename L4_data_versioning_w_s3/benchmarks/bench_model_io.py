@@ -0,0 +1,128 @@
+"""
+Load time and memory of the model artifact formats.
+
+Trains forests of increasing size on TF-IDF features of a synthetic corpus,
+saves each one in every format of `model_io` and reports file size, save
+time, and, over --workers freshly spawned processes loading the same file
+at once, the median load time plus the memory each worker adds by loading
+and scoring with the model:
+  rss      - resident memory added per worker
+  private  - pages only that worker holds (private copy of the model)
+  pss      - proportional share; its sum over workers is the real total
+
+Memory columns need Linux (/proc/self/smaps_rollup).
+
+Run from the project root:
+    python benchmarks/bench_model_io.py --trees 100 500 1000 2000 --workers 4
+"""
+import argparse
+import logging
+import multiprocessing
+import os
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import numpy as np  # noqa: E402
+import scipy.sparse  # noqa: E402
+from sklearn.ensemble import RandomForestClassifier  # noqa: E402
+from sklearn.feature_extraction.text import TfidfVectorizer  # noqa: E402
+
+import model_io  # noqa: E402
+from memory import smaps_rollup_mb  # noqa: E402
+from synthetic import make_messages  # noqa: E402
+
+# model_io logs every load at DEBUG; module level so spawned workers inherit it
+logging.disable(logging.INFO)
+
+# (label, format, compression level)
+VARIANTS = [
+    ('pickle', 'pickle', 0),
+    ('joblib', 'joblib', 0),
+    ('joblib+z3', 'joblib', 3),
+    ('forest_arrays', 'forest_arrays', 0),
+    ('forest_arrays+z3', 'forest_arrays', 3),
+]
+
+
+def _worker(model_path, features_path, barrier, results):
+    """Load the model, score once so its pages are touched, then report memory."""
+    X = scipy.sparse.load_npz(features_path)
+    before = smaps_rollup_mb()
+    start = time.perf_counter()
+    model = model_io.load_model(model_path)
+    load_s = time.perf_counter() - start
+    model.predict_proba(X)
+    # Measure while every worker still holds the model, so shared pages are split
+    barrier.wait()
+    after = smaps_rollup_mb()
+    barrier.wait()
+    delta = {key: after[key] - before[key] for key in after}
+    results.put(dict(delta, load_s=load_s))
+
+
+def measure_loading(model_path: str, features_path: str, workers: int) -> dict:
+    context = multiprocessing.get_context('spawn')
+    barrier = context.Barrier(workers)
+    results = context.Queue()
+    processes = [context.Process(target=_worker, args=(model_path, features_path, barrier, results))
+                 for _ in range(workers)]
+    for process in processes:
+        process.start()
+    rows = [results.get() for _ in processes]
+    for process in processes:
+        process.join()
+    summary = {'load_s': statistics.median(row['load_s'] for row in rows)}
+    for key in ('rss_mb', 'private_mb', 'pss_mb'):
+        values = [row[key] for row in rows if key in row]
+        summary[key] = statistics.mean(values) if values else float('nan')
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--trees', type=int, nargs='+', default=[100, 500, 1000, 2000])
+    parser.add_argument('--rows', type=int, default=5000, help='training rows')
+    parser.add_argument('--max-features', type=int, default=50)
+    parser.add_argument('--workers', type=int, default=4)
+    parser.add_argument('--score-rows', type=int, default=1000)
+    args = parser.parse_args()
+
+    corpus = make_messages(args.rows + args.score_rows)
+    vectorizer = TfidfVectorizer(max_features=args.max_features)
+    X = vectorizer.fit_transform(corpus['text']).tocsr()
+    y = (corpus['target'] == 'spam').to_numpy(dtype=int)
+    X_train, y_train, X_score = X[:args.rows], y[:args.rows], X[args.rows:]
+
+    print(f"{'trees':>6}  {'format':<18}{'size MB':>9}{'save s':>8}{'load s':>8}"
+          f"{'rss MB':>9}{'private MB':>12}{'pss MB':>9}   ({args.workers} workers)")
+    with tempfile.TemporaryDirectory() as tmp:
+        features_path = os.path.join(tmp, 'score.npz')
+        scipy.sparse.save_npz(features_path, X_score)
+        for n_trees in args.trees:
+            clf = RandomForestClassifier(n_estimators=n_trees, random_state=0, n_jobs=-1)
+            clf.fit(X_train, y_train)
+            # Threaded predict_proba sums the trees in a nondeterministic order
+            clf.set_params(n_jobs=1)
+            reference = clf.predict_proba(X_score)
+            for label, fmt, compress in VARIANTS:
+                model_path = os.path.join(tmp, f'model_{label}.bin')
+                start = time.perf_counter()
+                model_io.save_model(clf, model_path, fmt, compress)
+                save_s = time.perf_counter() - start
+                if not np.array_equal(model_io.load_model(model_path).predict_proba(X_score),
+                                      reference):
+                    raise AssertionError(f'{label} predictions differ from the forest')
+                row = measure_loading(model_path, features_path, args.workers)
+                size_mb = os.path.getsize(model_path) / 2**20
+                print(f"{n_trees:>6}  {label:<18}{size_mb:>9.1f}{save_s:>8.2f}{row['load_s']:>8.3f}"
+                      f"{row['rss_mb']:>9.1f}{row['private_mb']:>12.1f}{row['pss_mb']:>9.1f}",
+                      flush=True)
+
+
+if __name__ == '__main__':
+    main()
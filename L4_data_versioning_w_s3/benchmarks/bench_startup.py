@@ -0,0 +1,172 @@
+"""
+Cold-start time of each pipeline stage module.
+
+Every stage is imported in a fresh interpreter under `python -X importtime`
+and the module's cumulative import time is reported (median of --repeat
+runs) together with the wall time of the whole interpreter and the
+heaviest direct imports. A separate 'nltk_bootstrap' row times
+`download_nltk_resources()`, which must not touch the network when the
+NLTK data is installed.
+
+With --baseline the same measurements are taken on the `src/` tree of
+another git revision, so the numbers before and after a change can be
+compared side by side.
+
+Run from the project root:
+    python benchmarks/bench_startup.py
+    python benchmarks/bench_startup.py --baseline HEAD~1 --repeat 7
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tarfile
+import tempfile
+import time
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+STAGES = ['data_ingestion', 'data_preprocessing', 'feature_engineering',
+          'model_training', 'model_evaluation']
+
+BOOTSTRAP = 'import data_preprocessing; data_preprocessing.download_nltk_resources()'
+
+
+def parse_importtime(stderr: str, module: str) -> tuple:
+    """
+    Return (cumulative µs of `module`, [(µs, name) of its direct imports]).
+
+    `-X importtime` prints children before their parent, indented two
+    spaces per nesting level below the top-level import.
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'cumulative' in line:
+            continue
+        _, cumulative, name = line.split('|')
+        depth = (len(name) - len(name.lstrip()) - 1) // 2
+        rows.append((int(cumulative), depth, name.strip()))
+
+    total, children = None, []
+    for index, (cumulative, depth, name) in enumerate(rows):
+        if depth == 0 and name == module:
+            total = cumulative
+            # Direct imports are the depth-1 rows printed since the previous top-level row
+            for child_cumulative, child_depth, child in reversed(rows[:index]):
+                if child_depth == 0:
+                    break
+                if child_depth == 1:
+                    children.append((child_cumulative, child))
+    return total, sorted(children, reverse=True)
+
+
+def run_once(src_dir: str, code: str, workdir: str, importtime: bool, timeout: float) -> tuple:
+    env = dict(os.environ, PYTHONPATH=src_dir)
+    command = [sys.executable] + (['-X', 'importtime'] if importtime else []) + ['-c', code]
+    start = time.perf_counter()
+    try:
+        result = subprocess.run(command, cwd=workdir, env=env, capture_output=True,
+                                text=True, timeout=timeout)
+    except subprocess.TimeoutExpired:
+        return None, ''
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"'{code}' failed:\n{result.stderr[-2000:]}")
+    return wall, result.stderr
+
+
+def measure(src_dir: str, repeat: int, timeout: float, top: int) -> dict:
+    """Measure every stage module and the NLTK bootstrap of one src tree."""
+    results = {}
+    # Stage modules create logs/ in the working directory on import
+    with tempfile.TemporaryDirectory() as workdir:
+        # Warm the OS file cache so the first run is not an outlier
+        run_once(src_dir, 'import ' + ', '.join(STAGES), workdir, False, timeout)
+        for module in STAGES:
+            walls, imports, children, timeouts = [], [], [], 0
+            for _ in range(repeat):
+                wall, stderr = run_once(src_dir, f'import {module}', workdir, True, timeout)
+                if wall is None:
+                    # Timed-out samples are counted, not measured
+                    timeouts += 1
+                    continue
+                cumulative, children = parse_importtime(stderr, module)
+                walls.append(wall)
+                imports.append(cumulative / 1e6)
+            results[module] = {
+                'import_s': statistics.median(imports) if imports else None,
+                'wall_s': statistics.median(walls) if walls else None,
+                'timeouts': timeouts,
+                'heaviest': [[name, us / 1e6] for us, name in children[:top]],
+            }
+        walls = [run_once(src_dir, BOOTSTRAP, workdir, False, timeout)[0] for _ in range(repeat)]
+        results['nltk_bootstrap'] = {
+            'import_s': None,
+            # A timed-out run means the bootstrap blocked on the network
+            'wall_s': None if None in walls else statistics.median(walls),
+            'timeouts': walls.count(None),
+            'heaviest': [],
+        }
+    return results
+
+
+def export_src(ref: str, destination: str) -> str:
+    """Extract the src/ tree of a git revision of this project."""
+    project_dir = os.path.dirname(os.path.abspath(SRC_DIR))
+    archive = os.path.join(destination, 'src.tar')
+    with open(archive, 'wb') as file:
+        subprocess.run(['git', 'archive', ref, 'src'], cwd=project_dir, stdout=file, check=True)
+    with tarfile.open(archive) as tar:
+        tar.extractall(destination)
+    return os.path.join(destination, 'src')
+
+
+def fmt_seconds(value, width: int = 10, missing: str = '') -> str:
+    return f"{value:>{width}.3f}" if value is not None else f"{missing:>{width}}"
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--baseline', help='git revision whose src/ is measured for comparison')
+    parser.add_argument('--timeout', type=float, default=60,
+                        help='seconds before a run is skipped as a timeout')
+    parser.add_argument('--top', type=int, default=3, help='heaviest direct imports to list')
+    parser.add_argument('--output', help='write the measurements to this JSON file')
+    args = parser.parse_args()
+
+    report = {'current': measure(os.path.abspath(SRC_DIR), args.repeat, args.timeout, args.top)}
+    if args.baseline:
+        with tempfile.TemporaryDirectory() as tmp:
+            report['baseline'] = measure(export_src(args.baseline, tmp), args.repeat,
+                                         args.timeout, args.top)
+
+    current, baseline = report['current'], report.get('baseline')
+    header = f"{'stage':<22}{'import s':>10}{'wall s':>10}"
+    if baseline:
+        header += f"{'base import':>13}{'base wall':>11}"
+    print(header + '  heaviest imports')
+    for name, row in current.items():
+        line = f"{name:<22}{fmt_seconds(row['import_s'])}"
+        line += fmt_seconds(row['wall_s'], missing='timeout')
+        if baseline:
+            base = baseline[name]
+            line += fmt_seconds(base['import_s'], 13)
+            line += fmt_seconds(base['wall_s'], 11, missing='timeout')
+        line += '  ' + ', '.join(f"{module} {seconds:.2f}s" for module, seconds in row['heaviest'])
+        if row['timeouts']:
+            line += f"  ({row['timeouts']} of {args.repeat} runs timed out)"
+        print(line)
+
+    if args.output:
+        os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=2)
+        print(f"Report written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,63 @@
+"""
+Rows/sec of the original per-call `transform_text` against `TextNormalizer`.
+
+Run from the project root:
+    python benchmarks/bench_text_normalizer.py --rows 20000
+"""
+import argparse
+import os
+import string
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import nltk  # noqa: E402
+from nltk.corpus import stopwords  # noqa: E402
+from nltk.stem.porter import PorterStemmer  # noqa: E402
+
+from data_preprocessing import TextNormalizer, download_nltk_resources  # noqa: E402
+from synthetic import make_messages  # noqa: E402
+
+
+def legacy_transform_text(text):
+    """The implementation `TextNormalizer` replaced, kept as the baseline."""
+    ps = PorterStemmer()
+    text = text.lower()
+    text = nltk.word_tokenize(text)
+    text = [word for word in text if word.isalnum()]
+    text = [word for word in text if word not in stopwords.words(
+        'english') and word not in string.punctuation]
+    text = [ps.stem(word) for word in text]
+    return " ".join(text)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--rows', type=int, default=20000)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    download_nltk_resources()
+    texts = make_messages(args.rows, seed=args.seed)['text'].tolist()
+
+    start = time.perf_counter()
+    before = [legacy_transform_text(text) for text in texts]
+    legacy_time = time.perf_counter() - start
+
+    start = time.perf_counter()
+    after = TextNormalizer().transform_many(texts)
+    normalizer_time = time.perf_counter() - start
+
+    mismatches = sum(a != b for a, b in zip(before, after))
+    print(f"rows:             {args.rows}")
+    print(f"transform_text:   {args.rows / legacy_time:12.1f} rows/sec")
+    print(f"TextNormalizer:   {args.rows / normalizer_time:12.1f} rows/sec")
+    print(f"speedup:          {legacy_time / normalizer_time:12.1f}x")
+    print(f"mismatched rows:  {mismatches}")
+    if mismatches:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
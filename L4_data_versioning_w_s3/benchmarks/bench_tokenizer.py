@@ -0,0 +1,66 @@
+"""
+Throughput of the tokenizer engines of data_preprocessing.
+
+For each engine, times the tokenizer alone on the lowercased corpus and
+the full `TextNormalizer.transform_many` (tokenize, filter, stem), each
+with a freshly built tokenizer so the fast engine's chunk cache starts
+cold. The corpus is synthetic unless --data names a CSV.
+
+Run from the project root:
+    python benchmarks/bench_tokenizer.py --rows 20000 200000
+    python benchmarks/bench_tokenizer.py --data data/raw/train.csv --column text
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pandas as pd  # noqa: E402
+
+from data_preprocessing import TextNormalizer, download_nltk_resources  # noqa: E402
+from synthetic import make_messages  # noqa: E402
+from text_tokenizer import TOKENIZERS, make_tokenizer  # noqa: E402
+
+
+def timed(func, *args) -> tuple:
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+def bench(texts: list) -> None:
+    lowered = [text.lower() for text in texts]
+    results = {}
+    for name in TOKENIZERS:
+        tokenizer = make_tokenizer(name)
+        _, tokenize_s = timed(lambda: [tokenizer(text) for text in lowered])
+        output, normalize_s = timed(TextNormalizer(tokenizer=name).transform_many, texts)
+        results[name] = output
+        print(f"{len(texts):>10}  {name:<8}{len(texts) / tokenize_s:>18.0f}"
+              f"{len(texts) / normalize_s:>18.0f}", flush=True)
+    mismatches = sum(a != b for a, b in zip(results['nltk'], results['fast']))
+    if mismatches:
+        raise AssertionError(f'{mismatches} rows normalized differently by the two engines')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, nargs='+', default=[20_000, 200_000])
+    parser.add_argument('--data', help='CSV to tokenize instead of a synthetic corpus')
+    parser.add_argument('--column', default='text')
+    args = parser.parse_args()
+
+    download_nltk_resources()
+    print(f"{'rows':>10}  {'engine':<8}{'tokenize rows/s':>18}{'normalize rows/s':>18}")
+    if args.data:
+        bench(pd.read_csv(args.data)[args.column].astype(str).tolist())
+        return
+    for n_rows in args.rows:
+        bench(make_messages(n_rows, seed=n_rows)['text'].tolist())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,84 @@
+"""
+Equivalence check of the `fast` tokenizer engine against `nltk.word_tokenize`.
+
+Every message of the corpus is lowercased, as `TextNormalizer` does, and
+tokenized by both engines; the alphanumeric tokens (the only ones the
+normalizer keeps) must be identical and in the same order. Differing rows
+are printed with the tokens each engine produced, and the exit status is 1
+if there are any.
+
+By default the SMS spam corpus is checked, fetched through the
+data_ingestion download cache; --data checks a local CSV instead and
+--synthetic a generated corpus.
+
+Run from the project root:
+    python benchmarks/check_tokenizer.py
+    python benchmarks/check_tokenizer.py --data data/raw/train.csv --column text
+"""
+import argparse
+import logging
+import os
+import sys
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import pandas as pd  # noqa: E402
+import yaml  # noqa: E402
+
+from data_preprocessing import download_nltk_resources  # noqa: E402
+from download_cache import DownloadCache  # noqa: E402
+from pipeline import DATA_URL  # noqa: E402
+from synthetic import make_messages  # noqa: E402
+from text_tokenizer import make_tokenizer  # noqa: E402
+
+# The download cache logs every lookup at DEBUG
+logging.disable(logging.INFO)
+
+
+def load_texts(args) -> list:
+    if args.synthetic:
+        return make_messages(args.synthetic)['text'].tolist()
+    path = args.data
+    if path is None:
+        with open(args.params, 'r') as file:
+            ingestion = yaml.safe_load(file)['data_ingestion']
+        path = DownloadCache(ingestion['cache_dir'],
+                             max_bytes=ingestion['cache_max_bytes']).fetch(DATA_URL)
+    df = pd.read_csv(path)
+    column = args.column or ('v2' if 'v2' in df.columns else 'text')
+    return df[column].astype(str).tolist()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--data', help='CSV to check instead of the spam corpus')
+    parser.add_argument('--column', help="text column (default: 'v2', else 'text')")
+    parser.add_argument('--synthetic', type=int, default=0, metavar='ROWS',
+                        help='check a synthetic corpus of this many rows instead')
+    parser.add_argument('--params', default='params.yaml')
+    parser.add_argument('--show', type=int, default=20, help='differing rows printed')
+    args = parser.parse_args()
+
+    download_nltk_resources()
+    texts = load_texts(args)
+    reference, fast = make_tokenizer('nltk'), make_tokenizer('fast')
+
+    differing = 0
+    for row, text in enumerate(texts):
+        lowered = text.lower()
+        expected = [token for token in reference(lowered) if token.isalnum()]
+        actual = [token for token in fast(lowered) if token.isalnum()]
+        if actual != expected:
+            differing += 1
+            if differing <= args.show:
+                print(f"row {row}: {text!r}\n  nltk: {expected}\n  fast: {actual}")
+
+    print(f"rows checked:    {len(texts)}")
+    print(f"differing rows:  {differing}")
+    if differing:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
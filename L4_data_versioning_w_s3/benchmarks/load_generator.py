@@ -0,0 +1,85 @@
+"""
+Concurrent load generator for the scoring service in src/serve.py.
+
+Sends synthetic messages from several client threads, then prints the
+client-side latency percentiles and throughput next to the server's own
+/metrics snapshot.
+
+Run against a running service:
+    python benchmarks/load_generator.py --url http://127.0.0.1:8080 \
+        --concurrency 32 --requests 5000
+"""
+import argparse
+import json
+import os
+import sys
+import threading
+import time
+import urllib.request
+
+import numpy as np
+
+sys.path.insert(0, os.path.dirname(__file__))
+
+from synthetic import make_messages  # noqa: E402
+
+
+def post_json(url: str, payload: dict, timeout: float = 30) -> dict:
+    request = urllib.request.Request(
+        url, data=json.dumps(payload).encode('utf-8'),
+        headers={'Content-Type': 'application/json'})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read())
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument('--url', default='http://127.0.0.1:8080')
+    parser.add_argument('--concurrency', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=5000)
+    parser.add_argument('--messages-per-request', type=int, default=1)
+    args = parser.parse_args()
+
+    texts = make_messages(args.requests * args.messages_per_request)['text'].tolist()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+    counter = iter(range(args.requests))
+
+    def client():
+        while True:
+            with lock:
+                i = next(counter, None)
+            if i is None:
+                return
+            batch = texts[i * args.messages_per_request:(i + 1) * args.messages_per_request]
+            start = time.perf_counter()
+            try:
+                post_json(args.url + '/predict', {'texts': batch})
+            except Exception as e:
+                with lock:
+                    errors.append(e)
+                continue
+            with lock:
+                latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    threads = [threading.Thread(target=client) for _ in range(args.concurrency)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    latencies_ms = np.array(latencies) * 1000
+    print(f"requests:     {len(latencies)} ok, {len(errors)} failed in {elapsed:.2f}s")
+    print(f"throughput:   {len(latencies) / elapsed:.1f} req/s")
+    if len(latencies_ms):
+        print(f"latency p50:  {np.percentile(latencies_ms, 50):.2f} ms")
+        print(f"latency p99:  {np.percentile(latencies_ms, 99):.2f} ms")
+    with urllib.request.urlopen(args.url + '/metrics') as response:
+        print("server metrics:", json.dumps(json.loads(response.read()), indent=2))
+
+
+if __name__ == '__main__':
+    main()
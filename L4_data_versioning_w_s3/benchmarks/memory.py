@@ -0,0 +1,83 @@
+"""Resident-set-size helpers shared by the benchmarks."""
+import os
+import resource
+import sys
+import threading
+
+_PAGE_SIZE = os.sysconf('SC_PAGE_SIZE') if hasattr(os, 'sysconf') else 4096
+
+
+def current_rss_mb() -> float:
+    """Current RSS of this process in MiB (peak RSS where /proc is unavailable)."""
+    try:
+        with open('/proc/self/statm') as file:
+            return int(file.read().split()[1]) * _PAGE_SIZE / 2**20
+    except OSError:
+        return peak_rss_mb()
+
+
+def smaps_rollup_mb() -> dict:
+    """
+    Rss, Pss, private and anonymous memory of this process in MiB (Linux
+    only, else {}).
+
+    Pss charges each shared page to the processes mapping it in equal parts,
+    so summing it over processes shows how much memory they really use.
+    Anonymous memory excludes mapped file pages, which the kernel can drop.
+    """
+    try:
+        with open('/proc/self/smaps_rollup') as file:
+            fields = dict(line.split(':', 1) for line in file if ':' in line)
+    except OSError:
+        return {}
+
+    def kib(name):
+        return int(fields.get(name, '0 kB').split()[0])
+    return {
+        'rss_mb': kib('Rss') / 2**10,
+        'pss_mb': kib('Pss') / 2**10,
+        'private_mb': (kib('Private_Clean') + kib('Private_Dirty')) / 2**10,
+        'anon_mb': kib('Anonymous') / 2**10,
+    }
+
+
+def peak_rss_mb() -> float:
+    """Peak RSS of this process since start-up in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and KiB on Linux
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+class PeakRSSSampler:
+    """
+    Track the peak RSS reached inside a `with` block.
+
+    A background thread samples the RSS every `interval` seconds; the process
+    wide `ru_maxrss` cannot be reset, so it cannot isolate one code region.
+    `sample` may replace `current_rss_mb` to track another measure in MiB.
+    """
+
+    def __init__(self, interval: float = 0.01, sample=None):
+        self.interval = interval
+        self.sample = sample or current_rss_mb
+        self.peak_mb = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _sample(self):
+        while not self._stop.is_set():
+            self.peak_mb = max(self.peak_mb, self.sample())
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.peak_mb = self.sample()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self._stop.set()
+        self._thread.join()
+        self.peak_mb = max(self.peak_mb, self.sample())
+        return False
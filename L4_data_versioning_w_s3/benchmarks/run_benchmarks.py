@@ -0,0 +1,226 @@
+"""
+Per-stage benchmark suite on synthetic spam/ham corpora.
+
+For every corpus size, times each pipeline function separately
+(transform_text, preprocess_df, apply_tfidf, train_model, evaluate_model)
+and each load/save pair of stage artifacts, recording wall time, rows/sec
+and the peak RSS reached inside the timed region. Results are written to a
+JSON report; `--compare` flags regressions against a stored baseline report.
+
+Run from the project root:
+    python benchmarks/run_benchmarks.py --sizes 10000 100000 --output reports/bench.json
+    python benchmarks/run_benchmarks.py --sizes 10000 100000 --compare benchmarks/baseline.json
+"""
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+import yaml  # noqa: E402
+
+import data_ingestion  # noqa: E402
+import data_preprocessing  # noqa: E402
+import feature_engineering  # noqa: E402
+import model_evaluation  # noqa: E402
+import model_training  # noqa: E402
+from artifact_io import artifact_path, load_features, read_frame, save_features, write_frame  # noqa: E402
+from memory import PeakRSSSampler  # noqa: E402
+from synthetic import make_messages  # noqa: E402
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 10_000_000]
+
+
+class StageRecorder:
+    """Collect one result row per timed stage."""
+
+    def __init__(self, size: int):
+        self.size = size
+        self.results = []
+
+    def run(self, stage: str, rows: int, func, *args, **kwargs):
+        with PeakRSSSampler() as sampler:
+            start = time.perf_counter()
+            result = func(*args, **kwargs)
+            wall = time.perf_counter() - start
+        self.results.append({
+            'size': self.size,
+            'stage': stage,
+            'rows': rows,
+            'wall_s': wall,
+            'rows_per_s': rows / wall if wall > 0 else None,
+            'peak_rss_mb': sampler.peak_mb,
+        })
+        print(f"{self.size:>10}  {stage:<28}{wall:>10.3f}s{rows / max(wall, 1e-9):>14.0f} rows/s"
+              f"{sampler.peak_mb:>10.0f} MiB", flush=True)
+        return result
+
+
+def reset_normalizer():
+    """Drop the shared normalizer so stem memoization does not leak across stages."""
+    data_preprocessing._default_normalizer = None
+
+
+def bench_size(size: int, params: dict, fmt: str, workdir: str) -> list:
+    recorder = StageRecorder(size)
+    df = make_messages(size, seed=size)
+    split = int(size * (1 - params['data_ingestion']['test_size']))
+    train, test = df.iloc[:split].reset_index(drop=True), df.iloc[split:].reset_index(drop=True)
+
+    # Raw artifacts: data_ingestion.save_data / stage reads
+    recorder.run('save_data[raw]', size, data_ingestion.save_data, train, test, workdir, fmt)
+    raw_dir = os.path.join(workdir, 'raw')
+    recorder.run('load_data[raw]', size, lambda: (
+        read_frame(artifact_path(raw_dir, 'train', fmt), fmt),
+        read_frame(artifact_path(raw_dir, 'test', fmt), fmt)))
+
+    # Text normalization, with the configured tokenizer engine
+    pp = params['data_preprocessing']
+    reset_normalizer()
+    data_preprocessing.get_normalizer(pp['tokenizer'])
+    texts = df['text'].tolist()
+    recorder.run('transform_text', size,
+                 lambda: [data_preprocessing.transform_text(text) for text in texts])
+    reset_normalizer()
+    train_processed = recorder.run(
+        'preprocess_df[train]', len(train), data_preprocessing.preprocess_df,
+        train.copy(), n_jobs=pp['n_jobs'], chunk_size=pp['chunk_size'],
+        tokenizer=pp['tokenizer'])
+    test_processed = data_preprocessing.preprocess_df(
+        test.copy(), n_jobs=pp['n_jobs'], chunk_size=pp['chunk_size'],
+        tokenizer=pp['tokenizer'])
+
+    # Interim artifacts
+    interim_dir = os.path.join(workdir, 'interim')
+    train_path = artifact_path(interim_dir, 'train_processed', fmt)
+    test_path = artifact_path(interim_dir, 'test_processed', fmt)
+    recorder.run('save_data[interim]', size, lambda: (
+        write_frame(train_processed, train_path, fmt),
+        write_frame(test_processed, test_path, fmt)))
+    train_processed, test_processed = recorder.run('load_data[interim]', size, lambda: (
+        feature_engineering.load_data(train_path, fmt),
+        feature_engineering.load_data(test_path, fmt)))
+
+    # Features
+    X_train, y_train, X_test, y_test, _ = recorder.run(
+        'apply_tfidf', size, feature_engineering.apply_tfidf,
+        train_processed, test_processed, params['feature_engineering']['max_features'])
+    processed_dir = os.path.join(workdir, 'processed')
+    recorder.run('save_data[processed]', size, lambda: (
+        save_features(X_train, y_train, os.path.join(processed_dir, 'train_tfidf.npz'),
+                      os.path.join(processed_dir, 'train_labels.npy')),
+        save_features(X_test, y_test, os.path.join(processed_dir, 'test_tfidf.npz'),
+                      os.path.join(processed_dir, 'test_labels.npy'))))
+    (X_train, y_train), (X_test, y_test) = recorder.run('load_data[processed]', size, lambda: (
+        load_features(os.path.join(processed_dir, 'train_tfidf.npz'),
+                      os.path.join(processed_dir, 'train_labels.npy')),
+        load_features(os.path.join(processed_dir, 'test_tfidf.npz'),
+                      os.path.join(processed_dir, 'test_labels.npy'))))
+
+    # Model
+    clf = recorder.run('train_model', X_train.shape[0], model_training.train_model,
+                       X_train, y_train, params['model_training'])
+    model_path = os.path.join(workdir, 'model.pkl')
+    recorder.run('save_model', 1, model_training.save_model, clf, model_path)
+    clf = recorder.run('load_model', 1, model_evaluation.load_model, model_path)
+    recorder.run('evaluate_model', X_test.shape[0], model_evaluation.evaluate_model,
+                 clf, X_test, y_test)
+    return recorder.results
+
+
+def environment() -> dict:
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpu_count': os.cpu_count(),
+        'git_commit': commit,
+        'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+    }
+
+
+def compare(report: dict, baseline: dict, tolerance: float, min_seconds: float = 0.05) -> list:
+    """
+    Return the stages whose wall time or peak RSS exceeds the baseline by
+    `tolerance`. Stages faster than `min_seconds` in both runs are too noisy
+    for their wall time to be compared.
+    """
+    previous = {(r['size'], r['stage']): r for r in baseline['results']}
+    regressions = []
+    for result in report['results']:
+        base = previous.get((result['size'], result['stage']))
+        if base is None:
+            continue
+        for metric in ('wall_s', 'peak_rss_mb'):
+            if metric == 'wall_s' and max(base[metric], result[metric]) < min_seconds:
+                continue
+            if base[metric] and result[metric] > base[metric] * (1 + tolerance):
+                regressions.append({
+                    'size': result['size'],
+                    'stage': result['stage'],
+                    'metric': metric,
+                    'baseline': base[metric],
+                    'current': result[metric],
+                    'ratio': result[metric] / base[metric],
+                })
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--sizes', type=int, nargs='+', default=DEFAULT_SIZES)
+    parser.add_argument('--params', default='params.yaml')
+    parser.add_argument('--format', help='artifact format, defaults to artifacts.format')
+    parser.add_argument('--output', default='reports/benchmarks.json')
+    parser.add_argument('--compare', help='baseline report to check for regressions')
+    parser.add_argument('--tolerance', type=float, default=0.15,
+                        help='allowed relative slowdown/memory growth before flagging')
+    parser.add_argument('--min-seconds', type=float, default=0.05,
+                        help='ignore wall-time changes of stages faster than this')
+    args = parser.parse_args()
+
+    # Keep the stages' INFO/DEBUG records (logging.level in params.yaml or
+    # MLOPS_LOG_LEVEL) out of the measured times; warnings still show
+    logging.disable(logging.INFO)
+    data_preprocessing.download_nltk_resources()
+
+    with open(args.params) as file:
+        params = yaml.safe_load(file)
+    fmt = args.format or params['artifacts']['format']
+
+    results = []
+    for size in args.sizes:
+        with tempfile.TemporaryDirectory() as workdir:
+            results.extend(bench_size(size, params, fmt, workdir))
+
+    report = {'environment': environment(), 'format': fmt, 'results': results}
+    os.makedirs(os.path.dirname(args.output) or '.', exist_ok=True)
+    with open(args.output, 'w') as file:
+        json.dump(report, file, indent=2)
+    print(f"Report written to {args.output}")
+
+    if args.compare:
+        with open(args.compare) as file:
+            baseline = json.load(file)
+        regressions = compare(report, baseline, args.tolerance, args.min_seconds)
+        for r in regressions:
+            print(f"REGRESSION {r['size']:>10} {r['stage']:<28} {r['metric']}: "
+                  f"{r['baseline']:.3f} -> {r['current']:.3f} ({r['ratio']:.2f}x)")
+        if regressions:
+            sys.exit(1)
+        print(f"No regressions beyond {args.tolerance:.0%} against {args.compare}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,40 @@
+"""Synthetic spam/ham corpora shaped like the SMS spam dataset."""
+import numpy as np
+import pandas as pd
+
+HAM_WORDS = (
+    "i'll be there in ten mins ok lol are you coming home tonight sorry can't "
+    "talk now call me later when you get this love you too haha what time is "
+    "the meeting tomorrow don't forget to bring the keys i'm going to sleep "
+    "good morning how was your day yeah sure see you soon thanks dinner").split()
+SPAM_WORDS = (
+    "free win winner urgent cash prize claim now txt reply stop call 08712460324 "
+    "guaranteed award £1000 mobile offer ringtone sms u have won a nokia camera "
+    "phone! to claim call now, valid 12hrs only. t&c's apply 150p/msg www.win.com "
+    "congratulations selected customer service final attempt").split()
+
+
+def make_messages(n_rows: int, spam_ratio: float = 0.13, seed: int = 0) -> pd.DataFrame:
+    """
+    Build a synthetic corpus with 'target' ('ham'/'spam') and 'text' columns.
+
+    Message lengths follow a log-normal distribution (median ~12 tokens for ham,
+    ~25 for spam), which roughly matches the SMS spam collection.
+    """
+    rng = np.random.default_rng(seed)
+    is_spam = rng.random(n_rows) < spam_ratio
+    lengths = np.where(
+        is_spam,
+        rng.lognormal(mean=3.2, sigma=0.35, size=n_rows),
+        rng.lognormal(mean=2.5, sigma=0.7, size=n_rows)).astype(int) + 1
+    ham_vocab = np.array(HAM_WORDS)
+    spam_vocab = np.array(SPAM_WORDS + HAM_WORDS[:20])
+    texts = []
+    for spam, length in zip(is_spam, lengths):
+        vocab = spam_vocab if spam else ham_vocab
+        words = vocab[rng.integers(0, len(vocab), size=length)]
+        texts.append(" ".join(words).capitalize() + ("!" if spam else "."))
+    return pd.DataFrame({
+        'target': np.where(is_spam, 'spam', 'ham'),
+        'text': texts,
+    })
@@ -0,0 +1,340 @@
+import os
+from typing import TYPE_CHECKING
+import numpy as np
+import pandas as pd
+from perf import instrument
+from logging_setup import get_logger
+
+if TYPE_CHECKING:
+    import scipy.sparse
+
+logger = get_logger('artifact_io')
+
+# File extension used for each supported tabular artifact format
+FORMATS = {
+    'csv': '.csv',
+    'parquet': '.parquet',
+    'feather': '.feather',
+}
+
+
+def _check_format(fmt: str) -> None:
+    if fmt not in FORMATS:
+        raise ValueError(
+            f"Unsupported artifact format '{fmt}', expected one of {sorted(FORMATS)}")
+
+
+def _import_pyarrow():
+    """Import pyarrow lazily; it is only needed for the binary formats."""
+    try:
+        import pyarrow
+        import pyarrow.feather
+        import pyarrow.parquet
+        return pyarrow
+    except ImportError as e:
+        logger.error('pyarrow is required for parquet/feather artifacts: %s', e)
+        raise
+
+
+def artifact_path(directory: str, name: str, fmt: str = 'csv') -> str:
+    """
+    Build the path of a tabular artifact.
+
+    Args:
+        directory (str): Directory holding the artifact.
+        name (str): Artifact name without extension, e.g. 'train'.
+        fmt (str): One of 'csv', 'parquet' or 'feather'.
+
+    Returns:
+        str: Path with the extension matching `fmt`.
+    """
+    _check_format(fmt)
+    return os.path.join(directory, name + FORMATS[fmt])
+
+
+def write_frame(df: pd.DataFrame, file_path: str, fmt: str = 'csv') -> None:
+    """
+    Write a DataFrame in the given format.
+
+    Feather files are written uncompressed so that `read_frame` can map them
+    without a decode step.
+    """
+    _check_format(fmt)
+    try:
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+        if fmt == 'csv':
+            df.to_csv(file_path, index=False)
+        else:
+            pa = _import_pyarrow()
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if fmt == 'parquet':
+                pa.parquet.write_table(table, file_path)
+            else:
+                pa.feather.write_feather(table, file_path, compression='uncompressed')
+        logger.debug('Frame with shape %s written to %s', df.shape, file_path)
+    except Exception as e:
+        logger.error('Unexpected error occurred while writing %s: %s', file_path, e)
+        raise
+
+
+@instrument(result_rows=len)
+def read_frame(file_path: str, fmt: str = 'csv', columns: list = None) -> pd.DataFrame:
+    """
+    Read a DataFrame written by `write_frame`.
+
+    Args:
+        file_path (str): Path to the artifact.
+        fmt (str): One of 'csv', 'parquet' or 'feather'.
+        columns (list): Optional subset of columns to read. For the binary
+            formats the other columns are never decoded.
+
+    Returns:
+        pd.DataFrame: Loaded data.
+    """
+    _check_format(fmt)
+    try:
+        if fmt == 'csv':
+            df = pd.read_csv(file_path, usecols=columns)
+        else:
+            pa = _import_pyarrow()
+            if fmt == 'parquet':
+                table = pa.parquet.read_table(file_path, columns=columns, memory_map=True)
+            else:
+                table = pa.feather.read_table(file_path, columns=columns, memory_map=True)
+            df = table.to_pandas()
+        logger.debug('Frame with shape %s read from %s', df.shape, file_path)
+        return df
+    except pd.errors.ParserError as e:
+        logger.error('Failed to parse the CSV file: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error occurred while reading %s: %s', file_path, e)
+        raise
+
+
+class FrameWriter:
+    """
+    Incrementally write DataFrame chunks to a single artifact.
+
+    Used as a context manager; every chunk passed to `write` must have the
+    same columns as the first one. With `append`, the chunks are added
+    after the rows of an existing artifact instead of replacing it. Parquet
+    and feather files cannot be extended in place, so their existing
+    batches are streamed into a new file first.
+    """
+
+    def __init__(self, file_path: str, fmt: str = 'csv', append: bool = False):
+        _check_format(fmt)
+        self.file_path = file_path
+        self.fmt = fmt
+        self.append = append
+        self.rows = 0
+        self._writer = None
+        self._schema = None
+        self._previous = None
+        self._header = True
+        self._empty = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.file_path) or '.', exist_ok=True)
+        exists = os.path.exists(self.file_path)
+        if self.fmt == 'csv':
+            if exists and not self.append:
+                os.remove(self.file_path)
+            self._header = not (exists and self.append)
+        elif exists and self.append:
+            self._previous = self.file_path + '.previous'
+            os.replace(self.file_path, self._previous)
+        return self
+
+    def _open_writer(self, schema) -> None:
+        pa = _import_pyarrow()
+        if self._previous is not None:
+            # The existing rows come first and fix the schema
+            if self.fmt == 'parquet':
+                previous = pa.parquet.ParquetFile(self._previous)
+                schema = previous.schema_arrow
+                batches = previous.iter_batches()
+            else:
+                previous = pa.ipc.open_file(pa.memory_map(self._previous))
+                schema = previous.schema
+                batches = (previous.get_batch(i) for i in range(previous.num_record_batches))
+        self._schema = schema
+        if self.fmt == 'parquet':
+            self._writer = pa.parquet.ParquetWriter(self.file_path, self._schema)
+        else:
+            self._writer = pa.ipc.new_file(
+                self.file_path, self._schema,
+                options=pa.ipc.IpcWriteOptions(compression=None))
+        if self._previous is not None:
+            for batch in batches:
+                self._writer.write_batch(batch)
+
+    def write(self, df: pd.DataFrame) -> None:
+        if self.fmt == 'csv':
+            df.to_csv(self.file_path, mode='a', header=self._header, index=False)
+            self._header = False
+        else:
+            pa = _import_pyarrow()
+            table = pa.Table.from_pandas(df, preserve_index=False)
+            if self._writer is None and len(df) == 0:
+                # An empty chunk infers null types for object columns; keep it
+                # only in case no chunk with rows follows
+                self._empty = self._empty or table
+                return
+            if self._writer is None:
+                self._open_writer(table.schema)
+            table = table.cast(self._schema)
+            self._writer.write_table(table)
+        self.rows += len(df)
+
+    def close(self) -> None:
+        if self._writer is None and self._empty is not None:
+            self._open_writer(self._empty.schema)
+            self._writer.write_table(self._empty.cast(self._schema))
+        if self._writer is None and self.fmt != 'csv':
+            if self._previous is None:
+                raise ValueError(f'No chunks were written to {self.file_path}')
+            # Nothing new to append: keep the existing artifact as it was
+            os.replace(self._previous, self.file_path)
+            self._previous = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._previous is not None:
+            os.remove(self._previous)
+            self._previous = None
+        logger.debug('%d rows written to %s', self.rows, self.file_path)
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            if self._writer is not None:
+                self._writer.close()
+            if self._previous is not None:
+                os.replace(self._previous, self.file_path)
+        return False
+
+
+def save_features(X: 'scipy.sparse.csr_matrix', y: np.ndarray, features_path: str, labels_path: str) -> None:
+    """Save a sparse feature matrix as .npz and its labels as .npy."""
+    import scipy.sparse
+
+    try:
+        os.makedirs(os.path.dirname(features_path), exist_ok=True)
+        scipy.sparse.save_npz(features_path, X, compressed=False)
+        np.save(labels_path, y)
+        logger.debug('Engineered features saved to %s and labels to %s',
+                     features_path, labels_path)
+    except Exception as e:
+        logger.error('Unexpected error occurred while saving the features: %s', e)
+        raise
+
+
+@instrument(result_rows=lambda result: result[0].shape[0])
+def load_features(features_path: str, labels_path: str) -> tuple:
+    """
+    Load a sparse feature matrix (.npz) and its labels (.npy).
+
+    Args:
+        features_path (str): Path to the CSR matrix saved by `save_features`.
+        labels_path (str): Path to the matching labels array.
+
+    Returns:
+        tuple: (X, y)
+    """
+    import scipy.sparse
+
+    try:
+        X = scipy.sparse.load_npz(features_path).tocsr()
+        y = np.load(labels_path)
+        logger.debug('Features loaded from %s with shape %s', features_path, X.shape)
+        return X, y
+    except FileNotFoundError as e:
+        logger.error('File not found: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error occurred while loading the features: %s', e)
+        raise
+
+
+def _map_npz(file_path: str) -> dict:
+    """
+    Memory-map the arrays of an uncompressed .npz archive read-only.
+
+    Members of an uncompressed archive are stored verbatim, so each .npy
+    payload can be mapped at its offset in the zip file. Compressed
+    archives are read fully into memory instead.
+    """
+    import struct
+    import zipfile
+
+    arrays = {}
+    with zipfile.ZipFile(file_path) as archive, open(file_path, 'rb') as file:
+        for info in archive.infolist():
+            name = info.filename[:-len('.npy')]
+            if info.compress_type != zipfile.ZIP_STORED:
+                logger.warning('%s is compressed, reading %s into memory', file_path, name)
+                with archive.open(info) as member:
+                    arrays[name] = np.lib.format.read_array(member)
+                continue
+            # The local file header is 30 bytes followed by the name and an extra field
+            file.seek(info.header_offset + 26)
+            name_length, extra_length = struct.unpack('<HH', file.read(4))
+            file.seek(info.header_offset + 30 + name_length + extra_length)
+            version = np.lib.format.read_magic(file)
+            if version == (1, 0):
+                shape, fortran_order, dtype = np.lib.format.read_array_header_1_0(file)
+            else:
+                shape, fortran_order, dtype = np.lib.format.read_array_header_2_0(file)
+            if dtype.hasobject or int(np.prod(shape)) == 0:
+                arrays[name] = np.lib.format.read_array(file)
+            else:
+                arrays[name] = np.memmap(file_path, dtype=dtype, mode='r', offset=file.tell(),
+                                         shape=shape, order='F' if fortran_order else 'C')
+    return arrays
+
+
+def feature_rows(features_path: str) -> int:
+    """Number of rows of a feature matrix saved by `save_features`, without loading it."""
+    return int(_map_npz(features_path)['shape'][0])
+
+
+def iter_feature_chunks(features_path: str, labels_path: str, chunk_rows: int,
+                        start: int = 0, stop: int = None):
+    """
+    Yield (X, y) chunks of at most `chunk_rows` rows of the features saved
+    by `save_features`.
+
+    The matrix and labels are memory-mapped and only the rows of the
+    current chunk are copied into memory, so memory use does not grow with
+    the size of the files.
+
+    Args:
+        features_path (str): CSR matrix saved by `save_features`.
+        labels_path (str): Matching labels array.
+        chunk_rows (int): Rows per chunk.
+        start (int): First row to read.
+        stop (int): Row to stop before, defaults to the last row.
+    """
+    import scipy.sparse
+
+    arrays = _map_npz(features_path)
+    matrix_format = arrays['format'].item()
+    matrix_format = matrix_format.decode() if isinstance(matrix_format, bytes) else matrix_format
+    if matrix_format != 'csr':
+        raise ValueError(f'{features_path} holds a {matrix_format} matrix, expected csr')
+    n_rows, n_features = (int(size) for size in arrays['shape'])
+    stop = n_rows if stop is None else min(stop, n_rows)
+    data, indices, indptr = arrays['data'], arrays['indices'], arrays['indptr']
+    y = np.load(labels_path, mmap_mode='r')
+
+    for begin in range(start, stop, chunk_rows):
+        end = min(begin + chunk_rows, stop)
+        first, last = int(indptr[begin]), int(indptr[end])
+        X = scipy.sparse.csr_matrix(
+            (np.array(data[first:last]), np.array(indices[first:last]),
+             np.array(indptr[begin:end + 1]) - first),
+            shape=(end - begin, n_features))
+        yield X, np.array(y[begin:end])
@@ -1,34 +1,14 @@
+import numpy as np
 import pandas as pd
 import os
-from sklearn.model_selection import train_test_split
-import logging
 import yaml
+from perf import instrument, set_stage_rows, stage
+from artifact_io import FrameWriter, artifact_path, write_frame
+from dedup_index import DedupIndex
+from download_cache import DownloadCache, sha256_file
+from logging_setup import get_logger
 
-# Ensure the "logs" directory exists
-log_dir = 'logs'
-os.makedirs(log_dir, exist_ok=True)
-
-# Logging configuration
-logger = logging.getLogger('data_ingestion')
-logger.setLevel('DEBUG')
-
-# setting up console Handler
-console_handler = logging.StreamHandler()
-console_handler.setLevel('DEBUG')
-
-# setting up File Handler
-log_file_path = os.path.join(log_dir, 'data_ingestion.log')
-file_handler = logging.FileHandler(log_file_path)
-file_handler.setLevel('DEBUG')
-
-# Formating Log messages
-formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-file_handler.setFormatter(formatter)
-
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+logger = get_logger('data_ingestion')
 
 
 def load_params(params_path: str) -> dict:
@@ -49,6 +29,7 @@ def load_params(params_path: str) -> dict:
         raise
 
 
+@instrument(result_rows=len)
 def load_data(data_url: str) -> pd.DataFrame:
     """
     Load data from a CSV file.
@@ -95,7 +76,7 @@ def preprocess_data(df: pd.DataFrame) -> pd.DataFrame:
         raise
 
 
-def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str) -> None:
+def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str, fmt: str = 'csv') -> None:
     """
     Save the train and test datasets.
 
@@ -103,23 +84,148 @@ def save_data(train_data: pd.DataFrame, test_data: pd.DataFrame, data_path: str)
         train_data (pd.DataFrame): DataFrame containing the training data.
         test_data (pd.DataFrame): DataFrame containing the testing data.
         data_path (str): Path to save the datasets.
+        fmt (str): Artifact format ('csv', 'parquet' or 'feather').
     """
     try:
         raw_data_path = os.path.join(data_path, 'raw')
         os.makedirs(raw_data_path, exist_ok=True)
-        train_data.to_csv(os.path.join(
-            raw_data_path, "train.csv"), index=False)
-        test_data.to_csv(os.path.join(raw_data_path, "test.csv"), index=False)
+        write_frame(train_data, artifact_path(raw_data_path, "train", fmt), fmt)
+        write_frame(test_data, artifact_path(raw_data_path, "test", fmt), fmt)
         logger.debug('Train and test data saved to %s', raw_data_path)
     except Exception as e:
         logger.error('Unexpected error occurred while saving the data: %s', e)
         raise
 
 
+def assign_test_rows(df: pd.DataFrame, test_size: float, random_state: int) -> np.ndarray:
+    """
+    Deterministically choose which rows belong to the test split.
+
+    Each row is hashed from its content with a key derived from
+    `random_state`, so a row always lands in the same split no matter which
+    chunk it arrives in or how the file is chunked.
+
+    Args:
+        df (pd.DataFrame): Rows to assign.
+        test_size (float): Expected proportion of rows sent to the test split.
+        random_state (int): Seed for the row hash.
+
+    Returns:
+        np.ndarray: Boolean mask, True for test rows.
+    """
+    hash_key = str(random_state).zfill(16)[-16:]
+    hashes = pd.util.hash_pandas_object(df, index=False, hash_key=hash_key).to_numpy()
+    return hashes / np.float64(2**64) < test_size
+
+
+def raw_fingerprints(data_path: str, fmt: str):
+    """SHA-256 of the data/raw train and test artifacts, or None if one is missing."""
+    raw_data_path = os.path.join(data_path, 'raw')
+    paths = {name: artifact_path(raw_data_path, name, fmt) for name in ('train', 'test')}
+    if not all(os.path.exists(path) for path in paths.values()):
+        return None
+    return {name: sha256_file(path) for name, path in paths.items()}
+
+
+def open_dedup_index(ingestion_params: dict, data_path: str, fmt: str) -> tuple:
+    """
+    Open the persistent dedup index of the streaming split.
+
+    The stored index is only reused (incremental mode) when it was built
+    with the same split settings and saved with the exact train/test
+    artifacts that are in data/raw now, so a checkout of another data/raw
+    version is never appended to; otherwise it is emptied and the split
+    rebuilt.
+
+    Args:
+        ingestion_params (dict): The data_ingestion params.
+        data_path (str): Path the datasets are saved to.
+        fmt (str): Artifact format ('csv', 'parquet' or 'feather').
+
+    Returns:
+        tuple: (DedupIndex, append) - append is True when new rows should be
+        added to the existing artifacts.
+    """
+    meta = {'test_size': ingestion_params['test_size'],
+            'random_state': ingestion_params['random_state'], 'format': fmt}
+    fingerprints = None
+    if ingestion_params['dedup_incremental']:
+        fingerprints = raw_fingerprints(data_path, fmt)
+    # A stored index saved with other artifacts (or none) fails the meta check and is discarded
+    index = DedupIndex(ingestion_params['dedup_index'], dict(meta, artifacts=fingerprints))
+    append = fingerprints is not None and len(index) > 0
+    if append:
+        logger.info('Incremental ingestion: checking rows against %d indexed rows', len(index))
+    else:
+        index.clear()
+    return index, append
+
+
+def save_dedup_index(index: DedupIndex, data_path: str, fmt: str) -> None:
+    """Save the index together with the fingerprints of the artifacts it now describes."""
+    index.meta['artifacts'] = raw_fingerprints(data_path, fmt)
+    index.save()
+
+
+def stream_split(data_url: str, data_path: str, test_size: float, random_state: int,
+                 chunk_size: int, fmt: str = 'csv', index: DedupIndex = None,
+                 append: bool = False) -> int:
+    """
+    Ingest a CSV chunk by chunk, writing each chunk straight to train/test.
+
+    Peak memory is bounded by `chunk_size` rather than by the dataset size.
+    With a dedup index, rows already in the index are dropped before the
+    split, so no row appears twice in or across the splits.
+
+    Args:
+        data_url (str): URL or path to the CSV file.
+        data_path (str): Path to save the datasets.
+        test_size (float): Proportion of rows sent to the test split.
+        random_state (int): Seed for the row hash used to split.
+        chunk_size (int): Number of rows read at a time.
+        fmt (str): Artifact format ('csv', 'parquet' or 'feather').
+        index (DedupIndex): Optional index of the rows already ingested.
+        append (bool): Add the new rows to the existing train/test artifacts.
+
+    Returns:
+        int: Rows written to train and test by this call, after deduplication.
+    """
+    try:
+        raw_data_path = os.path.join(data_path, 'raw')
+        os.makedirs(raw_data_path, exist_ok=True)
+        train_path = artifact_path(raw_data_path, "train", fmt)
+        test_path = artifact_path(raw_data_path, "test", fmt)
+
+        read_rows = 0
+        with FrameWriter(train_path, fmt, append) as train_writer, \
+                FrameWriter(test_path, fmt, append) as test_writer:
+            for chunk in pd.read_csv(data_url, chunksize=chunk_size):
+                chunk = preprocess_data(chunk)
+                read_rows += len(chunk)
+                if index is not None:
+                    chunk = chunk[index.add_new(chunk)]
+                is_test = assign_test_rows(chunk, test_size, random_state)
+                train_writer.write(chunk[~is_test])
+                test_writer.write(chunk[is_test])
+        written = train_writer.rows + test_writer.rows
+        logger.debug('Streamed %d train and %d test rows to %s (%d duplicate or known rows dropped)',
+                     train_writer.rows, test_writer.rows, raw_data_path, read_rows - written)
+        return written
+    except pd.errors.ParserError as e:
+        logger.error('Failed to parse the CSV file: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error occurred while streaming the data: %s', e)
+        raise
+
+
+@stage('data_ingestion')
 def main():
     """
     Main function to execute the data ingestion process.
     """
+    from sklearn.model_selection import train_test_split
+
     try:
         # test_size = 0.2
         
@@ -127,13 +233,38 @@ def main():
         params = load_params(params_path='params.yaml')
         # acceessing test size value
         test_size = params['data_ingestion']['test_size']
+        random_state = params['data_ingestion']['random_state']
+        fmt = params['artifacts']['format']
 
         data_url = 'https://raw.githubusercontent.com/vikashishere/Datasets/main/spam.csv'
+        # Served from the local cache when unchanged upstream or offline
+        cache = DownloadCache(params['data_ingestion']['cache_dir'],
+                              max_bytes=params['data_ingestion']['cache_max_bytes'])
+        data_url = cache.fetch(data_url)
+
+        dedup = params['data_ingestion']['dedup']
+        if params['data_ingestion']['streaming']:
+            index, append = None, False
+            if dedup:
+                index, append = open_dedup_index(params['data_ingestion'], './data', fmt)
+            rows = stream_split(data_url, data_path='./data', test_size=test_size,
+                                random_state=random_state,
+                                chunk_size=params['data_ingestion']['chunk_size'], fmt=fmt,
+                                index=index, append=append)
+            if index is not None:
+                # Saved only once the artifacts it describes are complete
+                save_dedup_index(index, './data', fmt)
+            set_stage_rows(rows)
+            return
+
         df = load_data(data_url=data_url)
         final_df = preprocess_data(df)
+        if dedup:
+            final_df = final_df[DedupIndex().add_new(final_df)]
         train_data, test_data = train_test_split(
-            final_df, test_size=test_size, random_state=2)
-        save_data(train_data, test_data, data_path='./data')
+            final_df, test_size=test_size, random_state=random_state)
+        save_data(train_data, test_data, data_path='./data', fmt=fmt)
+        set_stage_rows(len(final_df))
     except Exception as e:
         logger.error('Failed to complete the data ingestion process: %s', e)
         print(f"Error: {e}")
@@ -1,39 +1,176 @@
 import os
-import logging
 import pandas as pd
-from sklearn.preprocessing import LabelEncoder
-from nltk.stem.porter import PorterStemmer
-from nltk.corpus import stopwords
 import string
-import nltk
-nltk.download('stopwords')
-nltk.download('punkt')
+import hashlib
+import inspect
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import repeat
+import yaml
+from perf import instrument, set_stage_rows, stage
+from artifact_io import artifact_path, read_frame, write_frame
+from transform_store import TransformStore, text_key
+from text_tokenizer import FastTokenizer, make_tokenizer
+from logging_setup import get_logger
 
-# Ensure the "logs" directory exists
-log_dir = 'logs'
-os.makedirs(log_dir, exist_ok=True)
+logger = get_logger('data_preprocessing')
 
-# Logger Configuration
-logger = logging.getLogger(name='data_preprocessing')
-logger.setLevel('DEBUG')
 
-# Setting up console handler
-console_handler = logging.StreamHandler()
-console_handler.setLevel('DEBUG')
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('Parameters retrieved from %s', params_path)
+        return params
+    except FileNotFoundError:
+        logger.error('File not found: %s', params_path)
+        raise
+    except yaml.YAMLError as e:
+        logger.error('YAML error: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error: %s', e)
+        raise
+
+
+def _tokenizer_resource() -> tuple:
+    """(package, data path) of the Punkt model used by this NLTK's `word_tokenize`."""
+    from nltk.tokenize import punkt
+    # NLTK >= 3.8.2 loads the pickle-free 'punkt_tab' tables instead of 'punkt'
+    if hasattr(punkt, 'PunktTokenizer'):
+        return 'punkt_tab', 'tokenizers/punkt_tab/english/'
+    return 'punkt', 'tokenizers/punkt/english.pickle'
+
+
+def download_nltk_resources():
+    """
+    Make the NLTK data used by `TextNormalizer` available.
+
+    Each resource is looked up in the local NLTK data path first; the
+    network is only used for resources that are missing. Called once by the
+    parent process; pool workers reuse the local copy.
+
+    Raises:
+        LookupError: If a missing resource could not be downloaded.
+    """
+    import nltk
+
+    resources = [('stopwords', 'corpora/stopwords'), _tokenizer_resource()]
+    for package, path in resources:
+        try:
+            nltk.data.find(path)
+            logger.debug('NLTK resource %s found locally', package)
+            continue
+        except LookupError:
+            logger.info('NLTK resource %s not found locally, downloading', package)
+        if not nltk.download(package, quiet=True):
+            logger.error('Failed to download NLTK resource %s', package)
+            raise LookupError(
+                f"NLTK resource '{package}' is not installed and could not be downloaded")
+
+
+class TextNormalizer:
+    """
+    Reusable text normalizer producing the same output as the original
+    per-call implementation of `transform_text`.
+
+    The stopword/punctuation lookup set and the stemmer are built once, and
+    stems are memoized in a bounded LRU cache since the vocabulary of a
+    corpus is far smaller than its token count.
+
+    Args:
+        language (str): Stopword language passed to `stopwords.words`.
+        stem_cache_size (int): Maximum number of memoized stems.
+        tokenizer (str): Word tokenizer engine, 'nltk' (`word_tokenize`) or
+            'fast' (`FastTokenizer`, same alphanumeric tokens).
+    """
+
+    def __init__(self, language='english', stem_cache_size=100_000, tokenizer='nltk'):
+        # NLTK takes seconds to import, so only pay for it once text is normalized
+        from nltk.corpus import stopwords
+        from nltk.stem.porter import PorterStemmer
+
+        self.language = language
+        self.stem_cache_size = stem_cache_size
+        self.tokenizer = tokenizer
+        self.stop_words = frozenset(stopwords.words(language))
+        self.punctuation = frozenset(string.punctuation)
+        self.stemmer = PorterStemmer()
+        self._stem = lru_cache(maxsize=stem_cache_size)(self.stemmer.stem)
+        self._tokenize = make_tokenizer(tokenizer)
+
+    def transform(self, text):
+        """
+        Transforms a single text:
+        1. Converts the text to lowercase.
+        2. Tokenizes the text into individual words.
+        3. Removes non-alphanumeric tokens.
+        4. Removes stopwords and punctuation.
+        5. Applies stemming to the words.
+        6. Joins the processed tokens back into a single string.
+
+        Args:
+            text (str): The input text to be transformed.
+        Returns:
+            str: The transformed text after preprocessing.
+        """
+        stem = self._stem
+        stop_words = self.stop_words
+        punctuation = self.punctuation
+        return " ".join(
+            stem(word) for word in self._tokenize(text.lower())
+            if word.isalnum() and word not in stop_words and word not in punctuation)
+
+    def transform_many(self, texts):
+        """
+        Transforms an iterable of texts.
+
+        Args:
+            texts (Iterable[str]): The input texts to be transformed.
+        Returns:
+            list[str]: The transformed texts, in input order.
+        """
+        transform = self.transform
+        return [transform(text) for text in texts]
+
+    def fingerprint(self):
+        """
+        Identifier of everything that determines the normalizer's output:
+        its source code, tokenizer engine, stopword set, punctuation set,
+        stemmer mode and the NLTK version. Used to invalidate cached
+        transform results.
+        """
+        import nltk
 
-# Setting up file handler
-log_file_path = os.path.join(log_dir, 'data_preprocessing.log')
-file_handler = logging.FileHandler(log_file_path)
-file_handler.setLevel('DEBUG')
+        digest = hashlib.sha256()
+        digest.update(inspect.getsource(TextNormalizer).encode('utf-8'))
+        digest.update(self.tokenizer.encode('utf-8'))
+        if self.tokenizer == 'fast':
+            digest.update(inspect.getsource(FastTokenizer).encode('utf-8'))
+        digest.update('\n'.join(sorted(self.stop_words)).encode('utf-8'))
+        digest.update(''.join(sorted(self.punctuation)).encode('utf-8'))
+        digest.update(self.stemmer.mode.encode('utf-8'))
+        digest.update(nltk.__version__.encode('utf-8'))
+        return digest.hexdigest()
 
-# Formatting log messages
-formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-file_handler.setFormatter(formatter)
 
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+_default_normalizer = None
+
+
+def get_normalizer(tokenizer=None):
+    """
+    Returns the shared module-level TextNormalizer, building it on first use.
+
+    Args:
+        tokenizer (str): Tokenizer engine; the shared normalizer is rebuilt if
+            it uses another one. None keeps the current one ('nltk' at first).
+    """
+    global _default_normalizer
+    if _default_normalizer is None or (
+            tokenizer is not None and _default_normalizer.tokenizer != tokenizer):
+        _default_normalizer = TextNormalizer(tokenizer=tokenizer or 'nltk')
+    return _default_normalizer
 
 
 def transform_text(text):
@@ -51,29 +188,90 @@ def transform_text(text):
     Returns:
         str: The transformed text after preprocessing.
     """
+    return get_normalizer().transform(text)
 
-    ps = PorterStemmer()
-    # Convert to lowercase
-    text = text.lower()
-    # Tokenize the text
-    text = nltk.word_tokenize(text)
-    # Remove non-alphanumeric tokens
-    text = [word for word in text if word.isalnum()]
-    # Remove stopwords and punctuation
-    text = [word for word in text if word not in stopwords.words(
-        'english') and word not in string.punctuation]
-    # Stem the words
-    text = [ps.stem(word) for word in text]
-    # Join the tokens back into a single string
-    return " ".join(text)
 
+def _transform_chunk(texts, tokenizer):
+    """Transform one chunk of texts inside a pool worker."""
+    return get_normalizer(tokenizer).transform_many(texts)
 
-def preprocess_df(df, text_column='text', target_column='target'):
+
+@instrument(rows=lambda texts, *args, **kwargs: len(texts))
+def transform_column(texts, n_jobs=1, chunk_size=1000, tokenizer='nltk'):
+    """
+    Transform a sequence of texts, optionally on a process pool.
+
+    Args:
+        texts (Sequence[str]): The input texts.
+        n_jobs (int): Number of worker processes. 1 runs serially in this
+            process, -1 uses every available core.
+        chunk_size (int): Number of texts sent to a worker at a time.
+        tokenizer (str): Word tokenizer engine, 'nltk' or 'fast'.
+
+    Returns:
+        list[str]: The transformed texts, in input order.
+    """
+    texts = list(texts)
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs <= 1 or len(texts) <= chunk_size:
+        return get_normalizer(tokenizer).transform_many(texts)
+
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    logger.debug('Transforming %d texts in %d chunks on %d workers',
+                 len(texts), len(chunks), n_jobs)
+    # Executor.map yields results in submission order, so rows keep their order
+    with ProcessPoolExecutor(max_workers=n_jobs) as executor:
+        results = executor.map(_transform_chunk, chunks, repeat(tokenizer))
+        return [text for chunk in results for text in chunk]
+
+
+def transform_column_cached(texts, store, n_jobs=1, chunk_size=1000, tokenizer='nltk'):
+    """
+    Transform texts, computing only those missing from a TransformStore.
+
+    Args:
+        texts (Sequence[str]): The input texts.
+        store (TransformStore): Store of previously transformed texts.
+        n_jobs (int): Worker processes used for the missing texts.
+        chunk_size (int): Number of texts sent to a worker at a time.
+        tokenizer (str): Word tokenizer engine, 'nltk' or 'fast'.
+
+    Returns:
+        list[str]: The transformed texts, in input order.
+    """
+    texts = list(texts)
+    keys = [text_key(text) for text in texts]
+    results = store.get_many(list(set(keys)))
+
+    missing = {}
+    for key, text in zip(keys, texts):
+        if key not in results and key not in missing:
+            missing[key] = text
+    hits = sum(key in results for key in keys)
+    logger.info('Transform store: %d hits, %d misses (%d unique texts to compute)',
+                hits, len(keys) - hits, len(missing))
+
+    if missing:
+        computed = transform_column(list(missing.values()), n_jobs, chunk_size, tokenizer)
+        new_items = list(zip(missing.keys(), computed))
+        store.put_many(new_items)
+        results.update(new_items)
+    return [results[key] for key in keys]
+
+
+def preprocess_df(df, text_column='text', target_column='target', n_jobs=1, chunk_size=1000,
+                  store=None, drop_duplicates=True, tokenizer='nltk'):
     """
     Parameters:
     df (pd.DataFrame): The input DataFrame to preprocess.
     text_column (str): The name of the column containing text data to be transformed. Default is 'text'.
     target_column (str): The name of the column containing target labels to be encoded. Default is 'target'.
+    n_jobs (int): Number of worker processes used for the text transformation. Default is 1 (serial).
+    chunk_size (int): Number of rows sent to a worker at a time. Default is 1000.
+    store (TransformStore): Optional store of previously transformed texts; only unseen texts are computed.
+    drop_duplicates (bool): Remove duplicate rows. Not needed when data_ingestion already deduplicated them.
+    tokenizer (str): Word tokenizer engine, 'nltk' (word_tokenize) or 'fast'. Default is 'nltk'.
 
     Returns:
     pd.DataFrame: The preprocessed DataFrame with encoded target column, duplicates removed, and transformed text column.
@@ -83,6 +281,8 @@ def preprocess_df(df, text_column='text', target_column='target'):
 
     """
     try:
+        from sklearn.preprocessing import LabelEncoder
+
         logger.debug('Starting preprocessing for DataFrame')
         # Encode the target column
         encoder = LabelEncoder()
@@ -90,11 +290,19 @@ def preprocess_df(df, text_column='text', target_column='target'):
         logger.debug('Target column encoded')
 
         # Remove duplicate rows
-        df = df.drop_duplicates(keep='first')
-        logger.debug('Duplicates removed')
+        if drop_duplicates:
+            df = df.drop_duplicates(keep='first')
+            logger.debug('Duplicates removed')
 
         # Apply text transformation to the specified text column
-        df.loc[:, text_column] = df[text_column].apply(func=transform_text)
+        if store is None:
+            transformed = transform_column(
+                df[text_column], n_jobs=n_jobs, chunk_size=chunk_size, tokenizer=tokenizer)
+        else:
+            transformed = transform_column_cached(
+                df[text_column], store, n_jobs=n_jobs, chunk_size=chunk_size,
+                tokenizer=tokenizer)
+        df.loc[:, text_column] = transformed
         logger.debug('Text column transformed')
         return df
 
@@ -106,30 +314,52 @@ def preprocess_df(df, text_column='text', target_column='target'):
         raise
 
 
+@stage('data_preprocessing')
 def main(text_column='text', target_column='target'):
     """
     Main function to load raw data, preprocess it, and save the processed data.
     """
     try:
+        params = load_params(params_path='params.yaml')
+        n_jobs = params['data_preprocessing']['n_jobs']
+        chunk_size = params['data_preprocessing']['chunk_size']
+        tokenizer = params['data_preprocessing']['tokenizer']
+        fmt = params['artifacts']['format']
+
+        download_nltk_resources()
+
         # Fetch the data from data/raw
-        train_data = pd.read_csv('./data/raw/train.csv')
-        test_data = pd.read_csv('./data/raw/test.csv')
+        train_data = read_frame(artifact_path('./data/raw', 'train', fmt), fmt)
+        test_data = read_frame(artifact_path('./data/raw', 'test', fmt), fmt)
         logger.debug('Data loaded properly')
+        set_stage_rows(len(train_data) + len(test_data))
 
-        # Transform the data
-        train_processed_data = preprocess_df(
-            train_data, text_column, target_column)
-        test_processed_data = preprocess_df(
-            test_data, text_column, target_column)
+        # Transform the data, reusing results cached by previous runs
+        store = None
+        if params['data_preprocessing']['cache_path']:
+            store = TransformStore(params['data_preprocessing']['cache_path'],
+                                   get_normalizer(tokenizer).fingerprint())
+        try:
+            # Rows deduplicated by data_ingestion are unique across both splits already
+            drop_duplicates = not params['data_ingestion']['dedup']
+            train_processed_data = preprocess_df(
+                train_data, text_column, target_column, n_jobs, chunk_size, store,
+                drop_duplicates, tokenizer)
+            test_processed_data = preprocess_df(
+                test_data, text_column, target_column, n_jobs, chunk_size, store,
+                drop_duplicates, tokenizer)
+        finally:
+            if store is not None:
+                store.close()
 
         # Store the data inside data/processed
         data_path = os.path.join("./data", "interim")
         os.makedirs(data_path, exist_ok=True)
 
-        train_processed_data.to_csv(os.path.join(
-            data_path, "train_processed.csv"), index=False)
-        test_processed_data.to_csv(os.path.join(
-            data_path, "test_processed.csv"), index=False)
+        write_frame(train_processed_data, artifact_path(
+            data_path, "train_processed", fmt), fmt)
+        write_frame(test_processed_data, artifact_path(
+            data_path, "test_processed", fmt), fmt)
 
         logger.debug('Processed data saved to %s', data_path)
     except FileNotFoundError as e:
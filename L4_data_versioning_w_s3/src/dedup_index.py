@@ -0,0 +1,116 @@
+import os
+import json
+import numpy as np
+import pandas as pd
+from logging_setup import get_logger
+
+logger = get_logger('dedup_index')
+
+# Fixed key, so digests stay comparable across runs and machines
+_HASH_KEY = 'dedup-index-v1\0\0'
+
+
+def row_digests(df: pd.DataFrame) -> np.ndarray:
+    """64-bit digest of every row's values (the index is ignored)."""
+    return pd.util.hash_pandas_object(df, index=False, hash_key=_HASH_KEY).to_numpy(np.uint64)
+
+
+class DedupIndex:
+    """
+    Set of 64-bit row digests used to drop exact duplicate rows while streaming.
+
+    Digests are held as sorted uint64 arrays, 8 bytes per distinct row, so
+    checking a chunk is a binary search per row. New digests go to a small
+    sorted run that is merged into the main array once it reaches a
+    fraction of its size, keeping inserts cheap on a large index. With a
+    directory, the digests and the `meta` describing what they were built
+    from persist between runs. Two distinct rows share a digest with
+    probability about n^2 / 2^65 for n rows, in which case the later one is
+    dropped.
+
+    Args:
+        directory (str): Where the index is stored, or None for an in-memory index.
+        meta (dict): JSON-serializable description of the indexed data; a
+            stored index built with different meta is discarded.
+    """
+
+    def __init__(self, directory: str = None, meta: dict = None):
+        self.directory = directory
+        self.meta = meta or {}
+        self._digests = np.empty(0, dtype=np.uint64)
+        self._recent = np.empty(0, dtype=np.uint64)
+        if directory is not None:
+            self._load()
+
+    def _paths(self) -> tuple:
+        return (os.path.join(self.directory, 'digests.npy'),
+                os.path.join(self.directory, 'meta.json'))
+
+    def _load(self) -> None:
+        digests_path, meta_path = self._paths()
+        if not (os.path.exists(digests_path) and os.path.exists(meta_path)):
+            return
+        with open(meta_path, 'r') as file:
+            stored_meta = json.load(file)
+        if stored_meta != self.meta:
+            logger.info('Dedup index %s was built for %s, starting a new one',
+                        self.directory, stored_meta)
+            return
+        self._digests = np.load(digests_path)
+        logger.debug('Dedup index loaded from %s with %d digests', self.directory, len(self))
+
+    def __len__(self) -> int:
+        return len(self._digests) + len(self._recent)
+
+    @staticmethod
+    def _contains(sorted_digests: np.ndarray, digests: np.ndarray) -> np.ndarray:
+        if len(sorted_digests) == 0:
+            return np.zeros(len(digests), dtype=bool)
+        position = np.minimum(np.searchsorted(sorted_digests, digests), len(sorted_digests) - 1)
+        return sorted_digests[position] == digests
+
+    def contains(self, digests: np.ndarray) -> np.ndarray:
+        """Boolean mask of the digests already in the index."""
+        return self._contains(self._digests, digests) | self._contains(self._recent, digests)
+
+    def add_new(self, df: pd.DataFrame) -> np.ndarray:
+        """
+        Add the rows of a chunk that are not in the index yet.
+
+        Returns:
+            np.ndarray: Boolean mask, True for the first occurrence of each
+            row not seen before; these rows are now in the index.
+        """
+        digests = row_digests(df)
+        unique, first = np.unique(digests, return_index=True)
+        is_new = ~self.contains(unique)
+        keep = np.zeros(len(digests), dtype=bool)
+        keep[first[is_new]] = True
+
+        self._recent = np.union1d(self._recent, unique[is_new])
+        if len(self._recent) > max(len(self._digests) // 8, 1 << 16):
+            self._merge()
+        return keep
+
+    def _merge(self) -> None:
+        self._digests = np.union1d(self._digests, self._recent)
+        self._recent = np.empty(0, dtype=np.uint64)
+
+    def clear(self) -> None:
+        """Forget every digest."""
+        self._digests = np.empty(0, dtype=np.uint64)
+        self._recent = np.empty(0, dtype=np.uint64)
+
+    def save(self) -> None:
+        """Write the index to its directory, replacing the stored one atomically."""
+        if self.directory is None:
+            raise ValueError('An in-memory dedup index cannot be saved')
+        self._merge()
+        os.makedirs(self.directory, exist_ok=True)
+        digests_path, meta_path = self._paths()
+        np.save(digests_path + '.tmp.npy', self._digests)
+        os.replace(digests_path + '.tmp.npy', digests_path)
+        with open(meta_path + '.tmp', 'w') as file:
+            json.dump(self.meta, file)
+        os.replace(meta_path + '.tmp', meta_path)
+        logger.debug('Dedup index saved to %s with %d digests', self.directory, len(self))
@@ -0,0 +1,176 @@
+import os
+import json
+import time
+import shutil
+import hashlib
+import tempfile
+import urllib.error
+import urllib.request
+from logging_setup import get_logger
+
+logger = get_logger('download_cache')
+
+
+def sha256_file(file_path: str, block_size: int = 1 << 20) -> str:
+    """Return the hex SHA-256 digest of a file."""
+    digest = hashlib.sha256()
+    with open(file_path, 'rb') as file:
+        for block in iter(lambda: file.read(block_size), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class DownloadCache:
+    """
+    Local content-addressed cache for remote files.
+
+    Payloads are stored under `<cache_dir>/blobs/<sha256>` and an
+    `index.json` maps each URL to its blob, ETag and Last-Modified headers.
+    A cached URL is revalidated with a conditional request when the network
+    is reachable and served from the cache when it is not. The checksum of
+    a blob is verified before every use, and least recently used entries are
+    evicted once the blobs exceed `max_bytes`.
+
+    Args:
+        cache_dir (str): Directory holding the index and blobs.
+        max_bytes (int): Upper bound on the total size of cached blobs.
+        timeout (float): Network timeout in seconds.
+    """
+
+    def __init__(self, cache_dir: str, max_bytes: int = 1 << 30, timeout: float = 30):
+        self.cache_dir = cache_dir
+        self.blob_dir = os.path.join(cache_dir, 'blobs')
+        self.index_path = os.path.join(cache_dir, 'index.json')
+        self.max_bytes = max_bytes
+        self.timeout = timeout
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.index = self._load_index()
+
+    def _load_index(self) -> dict:
+        try:
+            with open(self.index_path, 'r') as file:
+                return json.load(file)
+        except FileNotFoundError:
+            return {}
+        except json.JSONDecodeError as e:
+            logger.warning('Corrupt cache index %s, starting empty: %s', self.index_path, e)
+            return {}
+
+    def _save_index(self) -> None:
+        fd, tmp_path = tempfile.mkstemp(dir=self.cache_dir, suffix='.json')
+        with os.fdopen(fd, 'w') as file:
+            json.dump(self.index, file, indent=2)
+        os.replace(tmp_path, self.index_path)
+
+    def blob_path(self, sha256: str) -> str:
+        return os.path.join(self.blob_dir, sha256)
+
+    def _verified(self, entry: dict) -> bool:
+        """Check that the blob of an index entry exists and matches its checksum."""
+        path = self.blob_path(entry['sha256'])
+        if not os.path.exists(path):
+            return False
+        return sha256_file(path) == entry['sha256']
+
+    def _download(self, response) -> tuple:
+        """Stream a response body into the blob store, returning (sha256, size)."""
+        digest = hashlib.sha256()
+        size = 0
+        fd, tmp_path = tempfile.mkstemp(dir=self.blob_dir, suffix='.part')
+        try:
+            with os.fdopen(fd, 'wb') as file:
+                for block in iter(lambda: response.read(1 << 20), b''):
+                    digest.update(block)
+                    file.write(block)
+                    size += len(block)
+            sha256 = digest.hexdigest()
+            os.replace(tmp_path, self.blob_path(sha256))
+            return sha256, size
+        except Exception:
+            os.remove(tmp_path)
+            raise
+
+    def fetch(self, url: str) -> str:
+        """
+        Return a local path holding the verified payload of `url`.
+
+        Raises:
+            urllib.error.URLError: If the URL cannot be fetched and no valid
+                cached copy exists.
+        """
+        entry = self.index.get(url)
+        if entry is not None and not self._verified(entry):
+            logger.warning('Cached payload for %s failed checksum, discarding', url)
+            self.index.pop(url)
+            self._drop_blob(entry['sha256'])
+            entry = None
+
+        headers = {}
+        if entry is not None:
+            if entry.get('etag'):
+                headers['If-None-Match'] = entry['etag']
+            if entry.get('last_modified'):
+                headers['If-Modified-Since'] = entry['last_modified']
+
+        request = urllib.request.Request(url, headers=headers)
+        try:
+            with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                sha256, size = self._download(response)
+                if entry is not None and entry['sha256'] != sha256:
+                    self._drop_blob(entry['sha256'], ignore=url)
+                entry = {
+                    'sha256': sha256,
+                    'size': size,
+                    'etag': response.headers.get('ETag'),
+                    'last_modified': response.headers.get('Last-Modified'),
+                }
+                logger.debug('Downloaded %s (%d bytes, sha256 %s)', url, size, sha256)
+        except urllib.error.HTTPError as e:
+            if e.code != 304 or entry is None:
+                logger.error('HTTP error while fetching %s: %s', url, e)
+                raise
+            logger.debug('%s not modified, serving from cache', url)
+        except (urllib.error.URLError, OSError) as e:
+            if entry is None:
+                logger.error('Failed to fetch %s and no cached copy exists: %s', url, e)
+                raise
+            logger.warning('Network unavailable (%s), serving %s from cache', e, url)
+
+        entry['last_used'] = time.time()
+        self.index[url] = entry
+        self._evict(keep=url)
+        self._save_index()
+        return self.blob_path(entry['sha256'])
+
+    def _evict(self, keep: str) -> None:
+        """Drop least recently used entries until the blobs fit in max_bytes."""
+        blob_sizes = {e['sha256']: e['size'] for e in self.index.values()}
+        total = sum(blob_sizes.values())
+        by_age = sorted(self.index.items(), key=lambda item: item[1]['last_used'])
+        for url, entry in by_age:
+            if total <= self.max_bytes:
+                break
+            if url == keep:
+                continue
+            del self.index[url]
+            if self._drop_blob(entry['sha256']):
+                total -= entry['size']
+            logger.debug('Evicted %s from the download cache', url)
+
+    def _drop_blob(self, sha256: str, ignore: str = None) -> bool:
+        """Delete a blob unless another URL (other than `ignore`) still uses it."""
+        # A blob may be shared by several URLs with identical content
+        if any(e['sha256'] == sha256 for u, e in self.index.items() if u != ignore):
+            return False
+        try:
+            os.remove(self.blob_path(sha256))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def clear(self) -> None:
+        """Remove every cached entry and blob."""
+        shutil.rmtree(self.blob_dir, ignore_errors=True)
+        os.makedirs(self.blob_dir, exist_ok=True)
+        self.index = {}
+        self._save_index()
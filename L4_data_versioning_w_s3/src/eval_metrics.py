@@ -0,0 +1,190 @@
+import numpy as np
+from logging_setup import get_logger
+
+logger = get_logger('eval_metrics')
+
+# Most points kept per curve when curves are logged as plots
+CURVE_POINTS = 1000
+
+
+def _ratio(numerator, denominator) -> float:
+    # sklearn's zero_division default: an empty denominator scores 0
+    return float(numerator / denominator) if denominator else 0.0
+
+
+def threshold_counts(y_true: np.ndarray, scores: np.ndarray) -> tuple:
+    """
+    True and false positive counts at every distinct score threshold.
+
+    The scores are sorted once in decreasing order; entry i of the returned
+    arrays counts the samples scored >= thresholds[i] as positive.
+
+    Args:
+        y_true (np.ndarray): Boolean array, True for the positive class.
+        scores (np.ndarray): Positive-class scores.
+
+    Returns:
+        tuple: (tps, fps, thresholds)
+    """
+    order = np.argsort(scores, kind='mergesort')[::-1]
+    scores = scores[order]
+    y_true = y_true[order]
+    # Last index of every run of equal scores
+    distinct = np.flatnonzero(np.diff(scores))
+    last = np.r_[distinct, len(scores) - 1]
+    tps = np.cumsum(y_true, dtype=np.int64)[last]
+    fps = last + 1 - tps
+    return tps, fps, scores[last]
+
+
+def _confusion_metrics(tn: int, fp: int, fn: int, tp: int) -> dict:
+    """
+    Scalar metrics of the decision rule; the AUCs are filled in by the caller
+    and stay None when they are undefined.
+    """
+    precision = _ratio(tp, tp + fp)
+    recall = _ratio(tp, tp + fn)
+    return {
+        'accuracy': _ratio(tp + tn, tn + fp + fn + tp),
+        'precision': precision,
+        'recall': recall,
+        'f1': _ratio(2 * precision * recall, precision + recall),
+        'roc_auc': None,
+        'pr_auc': None,
+        'tp': tp, 'fp': fp, 'tn': tn, 'fn': fn,
+    }
+
+
+def _curves(tps: np.ndarray, fps: np.ndarray, thresholds: np.ndarray, metrics: dict) -> dict:
+    """
+    ROC and PR curves from cumulative counts at decreasing thresholds;
+    also sets metrics['roc_auc'] and metrics['pr_auc'].
+    """
+    # ROC starts at (0, 0), before any sample is called positive
+    tps0, fps0 = np.r_[0, tps], np.r_[0, fps]
+    curves = {
+        'roc': {'fpr': fps0 / max(fps[-1], 1), 'tpr': tps0 / max(tps[-1], 1),
+                'threshold': np.r_[np.inf, thresholds]},
+        'pr': {'precision': tps / np.maximum(tps + fps, 1), 'recall': tps / max(tps[-1], 1),
+               'threshold': thresholds},
+    }
+
+    if tps[-1] == 0 or fps[-1] == 0:
+        logger.warning('Only one class present in y_true, ROC-AUC and PR-AUC are undefined')
+        return curves
+
+    roc = curves['roc']
+    metrics['roc_auc'] = float(np.sum(np.diff(roc['fpr']) * (roc['tpr'][1:] + roc['tpr'][:-1]) / 2))
+    # Average precision: precision weighted by the recall gained at each threshold
+    pr = curves['pr']
+    metrics['pr_auc'] = float(np.sum(np.diff(np.r_[0, pr['recall']]) * pr['precision']))
+    return curves
+
+
+def _check_binary(proba: np.ndarray, classes: np.ndarray) -> None:
+    if len(classes) != 2 or proba.ndim != 2 or proba.shape[1] != 2:
+        raise ValueError(f'Binary probabilities expected, got {len(classes)} classes')
+
+
+def binary_report(y_true: np.ndarray, proba: np.ndarray, classes: np.ndarray) -> tuple:
+    """
+    All evaluation metrics of a binary classifier from one `predict_proba` output.
+
+    Predictions are derived from the probabilities the way `predict` does
+    (argmax, ties to the first class), so the confusion matrix, accuracy,
+    precision, recall and F1 match sklearn's. ROC-AUC, PR-AUC (average
+    precision) and both curves come from a single sort of the scores.
+
+    Args:
+        y_true (np.ndarray): True labels.
+        proba (np.ndarray): (n_samples, 2) class probabilities.
+        classes (np.ndarray): The classifier's `classes_`; classes[1] is positive.
+
+    Returns:
+        tuple: (metrics, curves) - scalar metrics and the ROC and PR curves
+        as numpy arrays.
+    """
+    _check_binary(proba, classes)
+    positive = np.asarray(y_true) == classes[1]
+    predicted = np.argmax(proba, axis=1) == 1
+
+    counts = np.bincount(2 * positive + predicted, minlength=4)
+    metrics = _confusion_metrics(*(int(count) for count in counts))
+    tps, fps, thresholds = threshold_counts(positive, proba[:, 1])
+    return metrics, _curves(tps, fps, thresholds, metrics)
+
+
+class ScoreHistogram:
+    """
+    Evaluation metrics accumulated chunk by chunk in memory independent of
+    the number of samples.
+
+    The confusion counts are exact. Positive-class scores are counted in
+    `bins` equal-width bins over [0, 1] per true class, and ROC-AUC and
+    PR-AUC are computed with the bin edges as thresholds. Only pairs of a
+    positive and a negative sample falling in the same bin are uncertain,
+    so the ROC-AUC is off by at most `auc_max_error`, which is reported
+    with the metrics and shrinks as `bins` grows.
+
+    Args:
+        classes (np.ndarray): The classifier's `classes_`; classes[1] is positive.
+        bins (int): Number of score bins.
+    """
+
+    def __init__(self, classes: np.ndarray, bins: int = 10000):
+        if bins < 1:
+            raise ValueError('bins must be at least 1')
+        self.classes = np.asarray(classes)
+        self.bins = bins
+        self.confusion = np.zeros(4, dtype=np.int64)
+        self.positive = np.zeros(bins, dtype=np.int64)
+        self.negative = np.zeros(bins, dtype=np.int64)
+
+    def update(self, y_true: np.ndarray, proba: np.ndarray) -> None:
+        """Add one chunk of labels and `predict_proba` output."""
+        _check_binary(proba, self.classes)
+        positive = np.asarray(y_true) == self.classes[1]
+        predicted = np.argmax(proba, axis=1) == 1
+        self.confusion += np.bincount(2 * positive + predicted, minlength=4)
+
+        bin_index = np.minimum((proba[:, 1] * self.bins).astype(np.int64), self.bins - 1)
+        self.positive += np.bincount(bin_index[positive], minlength=self.bins)
+        self.negative += np.bincount(bin_index[~positive], minlength=self.bins)
+
+    def merge(self, other: 'ScoreHistogram') -> 'ScoreHistogram':
+        """Add the counts of a histogram built on other chunks, e.g. by a worker."""
+        if other.bins != self.bins:
+            raise ValueError('Cannot merge histograms with different bins')
+        self.confusion += other.confusion
+        self.positive += other.positive
+        self.negative += other.negative
+        return self
+
+    @property
+    def n_samples(self) -> int:
+        return int(self.confusion.sum())
+
+    def report(self) -> tuple:
+        """(metrics, curves) in the format of `binary_report`."""
+        metrics = _confusion_metrics(*(int(count) for count in self.confusion))
+        # Thresholds are the lower bin edges, highest first; empty bins add no point
+        occupied = np.flatnonzero(self.positive + self.negative)[::-1]
+        if len(occupied) == 0:
+            raise ValueError('No samples were added to the histogram')
+        tps = np.cumsum(self.positive[occupied])
+        fps = np.cumsum(self.negative[occupied])
+        curves = _curves(tps, fps, occupied / self.bins, metrics)
+
+        n_pairs = tps[-1] * fps[-1]
+        tied = np.sum(self.positive * self.negative)
+        metrics['auc_max_error'] = float(tied / (2 * n_pairs)) if n_pairs else None
+        return metrics, curves
+
+
+def thin_curve(curve: dict, max_points: int = CURVE_POINTS) -> dict:
+    """Keep at most `max_points` evenly spaced points of a curve, endpoints included."""
+    length = len(next(iter(curve.values())))
+    if length <= max_points:
+        return curve
+    keep = np.unique(np.linspace(0, length - 1, max_points).round().astype(np.int64))
+    return {name: values[keep] for name, values in curve.items()}
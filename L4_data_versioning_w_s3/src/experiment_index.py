@@ -0,0 +1,458 @@
+"""
+Queryable index of the experiments of this project.
+
+Each run's params, dvclive metrics, stage timings and the output hashes of
+dvc.lock are stored in a SQLite database, one row per value, so filtering,
+sorting and top-k across thousands of runs is a single indexed query
+instead of `dvc exp show` walking every experiment ref.
+
+Runs come from the workspace (dvclive/, params.yaml, reports/perf.json,
+dvc.lock) and from the DVC experiment commits under refs/exps, read in one
+`git cat-file --batch` call. Updates are incremental: commits already in
+the index are skipped, and a workspace run is replaced by the experiment
+commit that saved the same files.
+
+Fields are named <kind>.<name>:
+    metrics.accuracy                 dvclive metrics (nested names joined by '/')
+    params.model_training.n_estimators
+    timings.model_training.wall_s    stage timings
+    artifacts.models/model.pkl       dvc.lock output hashes
+
+Run from the project root:
+    python src/experiment_index.py update
+    python src/experiment_index.py query --where metrics.accuracy>=0.95 \\
+        --where params.feature_engineering.backend=tfidf --sort=-metrics.roc_auc --top 10 \\
+        --columns params.model_training.n_estimators timings.model_training.wall_s
+    python src/experiment_index.py show <run name or rev>
+"""
+import os
+import re
+import json
+import hashlib
+import sqlite3
+import argparse
+import subprocess
+import yaml
+from logging_setup import get_logger
+
+logger = get_logger('experiment_index')
+
+KINDS = ('metrics', 'params', 'timings', 'artifacts')
+RUN_FILES = {
+    'metrics': 'dvclive/metrics.json',
+    'params': 'params.yaml',
+    'live_params': 'dvclive/params.yaml',
+    'perf': 'reports/perf.json',
+    'lock': 'dvc.lock',
+}
+# Stage totals kept as timings
+TIMING_KEYS = ('wall_s', 'cpu_s', 'peak_rss_mb', 'rows', 'rows_per_s')
+# refs/exps/<baseline[:2]>/<baseline[2:]>/<name>; other refs/exps entries are DVC internals
+_EXP_REF = re.compile(r'^refs/exps/([0-9a-f]{2})/([0-9a-f]{38,62})/(.+)$')
+_CONDITION = re.compile(r'^(\w+)\.(.+?)\s*(<=|>=|!=|=|<|>|~)\s*(.*)$')
+
+
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('Parameters retrieved from %s', params_path)
+        return params
+    except FileNotFoundError:
+        logger.error('File not found: %s', params_path)
+        raise
+    except yaml.YAMLError as e:
+        logger.error('YAML error: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error: %s', e)
+        raise
+
+
+def _flatten(tree: dict, separator: str, prefix: str = '') -> dict:
+    flat = {}
+    for key, value in tree.items():
+        name = f'{prefix}{separator}{key}' if prefix else str(key)
+        if isinstance(value, dict):
+            flat.update(_flatten(value, separator, name))
+        else:
+            flat[name] = value
+    return flat
+
+
+def _typed(value) -> tuple:
+    """(num, text) column values of a leaf."""
+    if isinstance(value, bool):
+        return float(value), str(value).lower()
+    if isinstance(value, (int, float)):
+        return float(value), None
+    if isinstance(value, str):
+        return None, value
+    return None, json.dumps(value)
+
+
+def parse_run(files: dict) -> dict:
+    """
+    Index values of one run from the raw contents of its RUN_FILES.
+
+    Args:
+        files (dict): RUN_FILES key -> file bytes, missing files left out.
+
+    Returns:
+        dict: 'fingerprint' and 'values', a list of (kind, name, num, text).
+    """
+    metrics = json.loads(files['metrics']) if 'metrics' in files else {}
+    params = _flatten(yaml.safe_load(files.get('params', b'')) or {}, '.')
+    # dvclive/params.yaml holds what the run actually used, e.g. a sweep trial's overrides
+    params.update(_flatten(yaml.safe_load(files.get('live_params', b'')) or {}, '.'))
+
+    timings = {}
+    for stage_name, report in (metrics.pop('perf', None) or {}).items():
+        for key, value in report.items():
+            timings[f'{stage_name}.{key}'] = value
+    if 'perf' in files:
+        for stage_name, report in json.loads(files['perf']).items():
+            for key in TIMING_KEYS:
+                timings[f'{stage_name}.{key}'] = report['stage'].get(key)
+
+    artifacts = {}
+    lock = yaml.safe_load(files.get('lock', b'')) or {}
+    for stage_info in (lock.get('stages') or {}).values():
+        for out in stage_info.get('outs') or []:
+            artifacts[out['path']] = out.get('md5') or out.get('etag') or out.get('checksum')
+
+    values = []
+    for kind, flat in (('metrics', _flatten(metrics, '/')), ('params', params),
+                       ('timings', timings), ('artifacts', artifacts)):
+        for name, value in flat.items():
+            if value is not None:
+                values.append((kind, name) + _typed(value))
+
+    digest = hashlib.sha256()
+    for key in ('metrics', 'params', 'live_params', 'lock'):
+        digest.update(hashlib.sha256(files.get(key, b'')).digest())
+    return {'fingerprint': digest.hexdigest(), 'values': values}
+
+
+def read_workspace_files(project_dir: str) -> dict:
+    """RUN_FILES of the workspace, or an empty dict if it has no dvclive metrics."""
+    files = {}
+    for key, path in RUN_FILES.items():
+        full_path = os.path.join(project_dir, path)
+        if os.path.exists(full_path):
+            with open(full_path, 'rb') as file:
+                files[key] = file.read()
+    return files if 'metrics' in files else {}
+
+
+def _git(project_dir: str, *args, input_bytes: bytes = None) -> bytes:
+    return subprocess.run(['git', *args], cwd=project_dir, input=input_bytes,
+                          stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True).stdout
+
+
+def list_experiment_refs(project_dir: str, refs: str = 'refs/exps') -> list:
+    """(rev, ref, name, baseline, commit time) of every DVC experiment under `refs`."""
+    output = _git(project_dir, 'for-each-ref', '--format=%(objectname) %(committerdate:unix) %(refname)',
+                  refs).decode('utf-8')
+    experiments = []
+    for line in output.splitlines():
+        rev, timestamp, ref = line.split(' ', 2)
+        match = _EXP_REF.match(ref)
+        if match:
+            experiments.append((rev, ref, match.group(3), match.group(1) + match.group(2),
+                                float(timestamp)))
+    return experiments
+
+
+def read_commit_files(project_dir: str, revs: list) -> dict:
+    """
+    RUN_FILES of many commits with a single `git cat-file --batch`.
+
+    Returns:
+        dict: rev -> {RUN_FILES key: bytes}
+    """
+    prefix = _git(project_dir, 'rev-parse', '--show-prefix').decode('utf-8').strip()
+    requests = [(rev, key) for rev in revs for key in RUN_FILES]
+    batch = ''.join(f'{rev}:{prefix}{RUN_FILES[key]}\n' for rev, key in requests)
+    output = _git(project_dir, 'cat-file', '--batch', input_bytes=batch.encode('utf-8'))
+
+    files = {rev: {} for rev in revs}
+    position = 0
+    for rev, key in requests:
+        header_end = output.index(b'\n', position)
+        header = output[position:header_end].split()
+        position = header_end + 1
+        if header[-1] == b'missing':
+            continue
+        size = int(header[2])
+        files[rev][key] = output[position:position + size]
+        position += size + 1
+    return files
+
+
+class ExperimentIndex:
+    """
+    SQLite index of experiment runs.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+    """
+
+    def __init__(self, db_path: str):
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.executescript('''
+            CREATE TABLE IF NOT EXISTS runs (
+                run_id TEXT PRIMARY KEY, name TEXT, source TEXT, ref TEXT, rev TEXT,
+                baseline TEXT, timestamp REAL, fingerprint TEXT);
+            CREATE INDEX IF NOT EXISTS runs_by_fingerprint ON runs (fingerprint);
+            CREATE TABLE IF NOT EXISTS run_values (
+                run_id TEXT NOT NULL, kind TEXT NOT NULL, name TEXT NOT NULL,
+                num REAL, text TEXT, PRIMARY KEY (run_id, kind, name)) WITHOUT ROWID;
+            CREATE INDEX IF NOT EXISTS run_values_by_field ON run_values (kind, name, num);
+        ''')
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
+
+    def __len__(self) -> int:
+        return self.conn.execute('SELECT COUNT(*) FROM runs').fetchone()[0]
+
+    def _delete(self, run_ids: list) -> None:
+        for table in ('run_values', 'runs'):
+            self.conn.executemany(f'DELETE FROM {table} WHERE run_id = ?',
+                                  [(run_id,) for run_id in run_ids])
+
+    def add_run(self, run_id: str, run: dict, name: str, source: str, ref: str = None,
+                rev: str = None, baseline: str = None, timestamp: float = None) -> None:
+        """Insert or replace one run parsed by `parse_run`."""
+        self._delete([run_id])
+        self.conn.execute('INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                          (run_id, name, source, ref, rev, baseline, timestamp,
+                           run['fingerprint']))
+        self.conn.executemany('INSERT INTO run_values VALUES (?, ?, ?, ?, ?)',
+                              [(run_id,) + value for value in run['values']])
+
+    def update(self, project_dir: str = '.', refs: str = 'refs/exps', prune: bool = False) -> dict:
+        """
+        Add the runs that are not indexed yet.
+
+        Args:
+            project_dir (str): Project root (the directory holding dvc.yaml).
+            refs (str): Git ref prefix of the experiment commits.
+            prune (bool): Drop indexed experiments whose ref no longer exists.
+
+        Returns:
+            dict: Number of runs added, replaced and pruned.
+        """
+        counts = {'added': 0, 'replaced': 0, 'pruned': 0}
+        try:
+            experiments = list_experiment_refs(project_dir, refs)
+        except (OSError, subprocess.CalledProcessError) as e:
+            logger.warning('Experiment refs not read, indexing the workspace only: %s', e)
+            experiments = []
+
+        known = {row[0] for row in self.conn.execute("SELECT rev FROM runs WHERE source = 'git'")}
+        new = [experiment for experiment in experiments if experiment[0] not in known]
+        commit_files = read_commit_files(project_dir, [rev for rev, *_ in new]) if new else {}
+        with self.conn:
+            for rev, ref, name, baseline, timestamp in new:
+                if 'metrics' not in commit_files[rev]:
+                    continue
+                run = parse_run(commit_files[rev])
+                # The workspace run this experiment commit saved, if it was indexed first
+                saved = [row[0] for row in self.conn.execute(
+                    "SELECT run_id FROM runs WHERE fingerprint = ? AND source = 'workspace'",
+                    (run['fingerprint'],))]
+                self._delete(saved)
+                counts['replaced'] += len(saved)
+                self.add_run(rev, run, name, 'git', ref, rev, baseline, timestamp)
+                counts['added'] += 1
+
+            files = read_workspace_files(project_dir)
+            if files:
+                run = parse_run(files)
+                indexed = self.conn.execute('SELECT 1 FROM runs WHERE fingerprint = ?',
+                                            (run['fingerprint'],)).fetchone()
+                if indexed is None:
+                    timestamp = os.path.getmtime(os.path.join(project_dir, RUN_FILES['metrics']))
+                    self.add_run(f"workspace:{run['fingerprint'][:16]}", run, 'workspace',
+                                 'workspace', timestamp=timestamp)
+                    counts['added'] += 1
+
+            if prune:
+                live = {rev for rev, *_ in experiments}
+                stale = [row[0] for row in self.conn.execute(
+                    "SELECT run_id FROM runs WHERE source = 'git'") if row[0] not in live]
+                self._delete(stale)
+                counts['pruned'] = len(stale)
+        logger.info('Experiment index %s: %d runs added, %d workspace runs replaced, '
+                    '%d pruned, %d indexed', self.db_path, counts['added'], counts['replaced'],
+                    counts['pruned'], len(self))
+        return counts
+
+    def query(self, where: list = (), sort: list = (), top: int = None, columns: list = ()) -> list:
+        """
+        Runs matching every condition, sorted and limited.
+
+        Args:
+            where (list): Conditions '<field><op><value>', op one of
+                = != < <= > >= and ~ (SQL LIKE on text values).
+            sort (list): Fields to sort by, '-' prefixed for descending.
+                Runs missing a sort field come last.
+            top (int): Number of runs returned, None for all.
+            columns (list): Extra fields to return.
+
+        Returns:
+            list[dict]: One dict per run with name, rev, timestamp and the
+            requested, filtered and sorted fields.
+        """
+        fields, joins, conditions, order, parameters = [], [], [], [], []
+
+        def column(field: str) -> str:
+            kind, _, name = field.partition('.')
+            if kind not in KINDS or not name:
+                raise ValueError(f"Unknown field '{field}', expected <{'|'.join(KINDS)}>.<name>")
+            if field not in fields:
+                fields.append(field)
+                joins.append(f'LEFT JOIN run_values v{len(fields)} ON v{len(fields)}.run_id = '
+                             f'runs.run_id AND v{len(fields)}.kind = ? AND v{len(fields)}.name = ?')
+                parameters.extend((kind, name))
+            return f'v{fields.index(field) + 1}'
+
+        for field in columns:
+            column(field)
+        condition_parameters = []
+        for condition in where:
+            match = _CONDITION.match(condition.strip())
+            if match is None:
+                raise ValueError(f"Cannot parse condition '{condition}'")
+            kind, name, op, value = match.groups()
+            alias = column(f'{kind}.{name}')
+            if op == '~':
+                conditions.append(f'{alias}.text LIKE ?')
+                condition_parameters.append(value)
+                continue
+            number = _number(value)
+            target = 'num' if number is not None else 'text'
+            conditions.append(f"{alias}.{target} {'=' if op == '=' else op} ?")
+            condition_parameters.append(number if number is not None else value)
+        for field in sort:
+            descending = field.startswith('-')
+            alias = column(field.lstrip('-+'))
+            order.append(f"{alias}.num IS NULL, {alias}.num {'DESC' if descending else 'ASC'}, "
+                         f"{alias}.text {'DESC' if descending else 'ASC'}")
+        order.append('runs.timestamp DESC')
+
+        selected = ', '.join(f'v{i}.num, v{i}.text' for i in range(1, len(fields) + 1))
+        sql = (f"SELECT runs.run_id, runs.name, runs.rev, runs.timestamp"
+               f"{', ' + selected if selected else ''} FROM runs {' '.join(joins)}"
+               f"{' WHERE ' + ' AND '.join(conditions) if conditions else ''}"
+               f" ORDER BY {', '.join(order)}{' LIMIT ?' if top else ''}")
+        parameters += condition_parameters
+        if top:
+            parameters.append(top)
+
+        results = []
+        for row in self.conn.execute(sql, parameters):
+            result = {'run_id': row[0], 'name': row[1], 'rev': row[2], 'timestamp': row[3]}
+            for i, field in enumerate(fields):
+                num, text = row[4 + 2 * i], row[5 + 2 * i]
+                result[field] = num if text is None else text
+            results.append(result)
+        return results
+
+    def find(self, key: str) -> list:
+        """Run ids whose name, run id or rev (prefix) is `key`."""
+        return [row[0] for row in self.conn.execute(
+            'SELECT run_id FROM runs WHERE name = ? OR run_id = ? OR rev LIKE ? '
+            'ORDER BY timestamp DESC', (key, key, f'{key}%'))]
+
+    def run_values(self, run_id: str) -> dict:
+        """Every indexed field of one run."""
+        return {f'{kind}.{name}': num if text is None else text
+                for kind, name, num, text in self.conn.execute(
+                    'SELECT kind, name, num, text FROM run_values WHERE run_id = ? '
+                    'ORDER BY kind, name', (run_id,))}
+
+
+def _number(value: str):
+    if value.lower() in ('true', 'false'):
+        return float(value.lower() == 'true')
+    try:
+        return float(value)
+    except ValueError:
+        return None
+
+
+def format_table(rows: list) -> str:
+    """Plain-text table of `query` results."""
+    if not rows:
+        return 'No runs match.'
+    headers = [key for key in rows[0] if key not in ('run_id', 'timestamp')]
+
+    def cell(value) -> str:
+        if value is None:
+            return '-'
+        if isinstance(value, float):
+            return f'{value:.6g}'
+        return str(value)[:12] if value is rows[0].get('rev') or len(str(value)) == 40 else str(value)
+
+    cells = [[cell(row[key]) for key in headers] for row in rows]
+    widths = [max(len(header), *(len(line[i]) for line in cells)) for i, header in enumerate(headers)]
+    lines = ['  '.join(header.ljust(width) for header, width in zip(headers, widths))]
+    lines += ['  '.join(value.ljust(width) for value, width in zip(line, widths)) for line in cells]
+    return '\n'.join(lines)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--params', default='params.yaml')
+    parser.add_argument('--db', help='defaults to experiment_index.db_path')
+    commands = parser.add_subparsers(dest='command', required=True)
+    update = commands.add_parser('update', help='index new runs')
+    update.add_argument('--refs', default='refs/exps')
+    update.add_argument('--prune', action='store_true',
+                        help='drop experiments whose ref was removed')
+    query = commands.add_parser('query', help='filter, sort and list runs')
+    query.add_argument('--where', action='append', default=[], metavar='CONDITION')
+    # Repeated, '-' prefixed for descending: --sort=-metrics.roc_auc
+    query.add_argument('--sort', action='append', default=[], metavar='FIELD')
+    query.add_argument('--top', type=int)
+    query.add_argument('--columns', nargs='+', default=[], metavar='FIELD')
+    query.add_argument('--json', action='store_true', help='print JSON instead of a table')
+    show = commands.add_parser('show', help='every field of one run')
+    show.add_argument('run', help='run name, run id or rev prefix')
+    args = parser.parse_args()
+
+    try:
+        db_path = args.db or load_params(args.params)['experiment_index']['db_path']
+        with ExperimentIndex(db_path) as index:
+            if args.command == 'update':
+                counts = index.update('.', args.refs, args.prune)
+                print(f"{counts['added']} runs added, {len(index)} indexed")
+            elif args.command == 'query':
+                rows = index.query(args.where, args.sort, args.top, args.columns)
+                print(json.dumps(rows, indent=2) if args.json else format_table(rows))
+            else:
+                run_ids = index.find(args.run)
+                if not run_ids:
+                    raise KeyError(f"No run named '{args.run}'")
+                print(json.dumps(index.run_values(run_ids[0]), indent=2))
+    except Exception as e:
+        logger.error('Experiment index command failed: %s', e)
+        print(f"Error: {e}")
+
+
+if __name__ == '__main__':
+    main()
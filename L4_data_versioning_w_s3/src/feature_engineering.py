@@ -1,31 +1,18 @@
+import numpy as np
 import pandas as pd
 import os
-from sklearn.feature_extraction.text import TfidfVectorizer
-import logging
+import pickle
+from concurrent.futures import ProcessPoolExecutor
+from typing import TYPE_CHECKING
 import yaml
+from perf import instrument, set_stage_rows, stage
+from artifact_io import artifact_path, read_frame, save_features
+from logging_setup import get_logger
 
-# Ensure the "logs" directory exists
-log_dir = 'logs'
-os.makedirs(log_dir, exist_ok=True)
+if TYPE_CHECKING:
+    import scipy.sparse
 
-# logging configuration
-logger = logging.getLogger('feature_engineering')
-logger.setLevel('DEBUG')
-
-console_handler = logging.StreamHandler()
-console_handler.setLevel('DEBUG')
-
-log_file_path = os.path.join(log_dir, 'feature_engineering.log')
-file_handler = logging.FileHandler(log_file_path)
-file_handler.setLevel('DEBUG')
-
-formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-file_handler.setFormatter(formatter)
-
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+logger = get_logger('feature_engineering')
 
 
 def load_params(params_path: str) -> dict:
@@ -46,23 +33,31 @@ def load_params(params_path: str) -> dict:
         raise
 
 
-def load_data(file_path: str) -> pd.DataFrame:
-    """Load data from a CSV file."""
+@instrument(result_rows=len)
+def load_data(file_path: str, fmt: str = 'csv') -> pd.DataFrame:
+    """Load the 'text' and 'target' columns of an interim artifact."""
     try:
-        df = pd.read_csv(file_path)
+        df = read_frame(file_path, fmt, columns=['text', 'target'])
         df.fillna('', inplace=True)
         logger.debug('Data loaded and NaNs filled from %s', file_path)
         return df
-    except pd.errors.ParserError as e:
-        logger.error('Failed to parse the CSV file: %s', e)
-        raise
     except Exception as e:
         logger.error('Unexpected error occurred while loading the data: %s', e)
         raise
 
 
+@instrument(rows=lambda train_data, test_data, *args, **kwargs: len(train_data) + len(test_data))
 def apply_tfidf(train_data: pd.DataFrame, test_data: pd.DataFrame, max_features: int) -> tuple:
-    """Apply TfIdf to the data."""
+    """
+    Apply TfIdf to the data.
+
+    Returns:
+        tuple: (X_train, y_train, X_test, y_test, vectorizer) where the
+        feature matrices are kept as scipy CSR matrices and the vectorizer is
+        the fitted TfidfVectorizer.
+    """
+    from sklearn.feature_extraction.text import TfidfVectorizer
+
     try:
         vectorizer = TfidfVectorizer(max_features=max_features)
 
@@ -71,22 +66,119 @@ def apply_tfidf(train_data: pd.DataFrame, test_data: pd.DataFrame, max_features:
         X_test = test_data['text'].values
         y_test = test_data['target'].values
 
-        X_train_tfidf = vectorizer.fit_transform(X_train)
-        X_test_tfidf = vectorizer.transform(X_test)
-
-        train_df = pd.DataFrame(X_train_tfidf.toarray())
-        train_df['label'] = y_train
-
-        test_df = pd.DataFrame(X_test_tfidf.toarray())
-        test_df['label'] = y_test
+        X_train_tfidf = vectorizer.fit_transform(X_train).tocsr()
+        X_test_tfidf = vectorizer.transform(X_test).tocsr()
 
         logger.debug('TF-IDF applied and data transformed')
-        return train_df, test_df
+        return X_train_tfidf, y_train, X_test_tfidf, y_test, vectorizer
     except Exception as e:
         logger.error('Error during Bag of Words transformation: %s', e)
         raise
 
 
+_worker_vectorizer = None
+
+
+def _init_worker(vectorizer):
+    """Receive the vectorizer once per pool worker instead of once per chunk."""
+    global _worker_vectorizer
+    _worker_vectorizer = vectorizer
+
+
+def _transform_chunk(texts):
+    return _worker_vectorizer.transform(texts)
+
+
+def vectorize_parallel(vectorizer, texts: np.ndarray, n_jobs: int = 1, chunk_size: int = 10000):
+    """
+    Transform texts with a stateless vectorizer, chunk by chunk on a process pool.
+
+    Args:
+        vectorizer: A vectorizer that needs no fit, e.g. HashingVectorizer.
+        texts (np.ndarray): The input texts.
+        n_jobs (int): Worker processes, 1 runs serially and -1 uses every core.
+        chunk_size (int): Number of texts sent to a worker at a time.
+
+    Returns:
+        scipy.sparse.csr_matrix: Rows in input order.
+    """
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    if n_jobs <= 1 or len(texts) <= chunk_size:
+        return vectorizer.transform(texts).tocsr()
+
+    import scipy.sparse
+
+    chunks = [texts[i:i + chunk_size] for i in range(0, len(texts), chunk_size)]
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                             initargs=(vectorizer,)) as executor:
+        return scipy.sparse.vstack(list(executor.map(_transform_chunk, chunks))).tocsr()
+
+
+@instrument(rows=lambda train_data, test_data, *args, **kwargs: len(train_data) + len(test_data))
+def apply_hashing(train_data: pd.DataFrame, test_data: pd.DataFrame, n_features: int,
+                  use_idf: bool = True, n_jobs: int = 1, chunk_size: int = 10000) -> tuple:
+    """
+    Apply a stateless HashingVectorizer to the data, optionally IDF weighted.
+
+    No vocabulary is fitted, so texts are vectorized in parallel chunks. With
+    `use_idf` the hashed counts are reweighted by a TfidfTransformer, whose
+    fit only needs the column document frequencies of the training counts.
+
+    Returns:
+        tuple: (X_train, y_train, X_test, y_test, vectorizer) where the
+        vectorizer reproduces the same features at inference time.
+    """
+    from sklearn.feature_extraction.text import HashingVectorizer, TfidfTransformer
+    from sklearn.pipeline import make_pipeline
+
+    try:
+        hasher = HashingVectorizer(n_features=n_features, alternate_sign=False,
+                                   norm=None if use_idf else 'l2')
+
+        y_train = train_data['target'].values
+        y_test = test_data['target'].values
+
+        X_train = vectorize_parallel(hasher, train_data['text'].values, n_jobs, chunk_size)
+        X_test = vectorize_parallel(hasher, test_data['text'].values, n_jobs, chunk_size)
+
+        vectorizer = hasher
+        if use_idf:
+            idf = TfidfTransformer()
+            X_train = idf.fit_transform(X_train).tocsr()
+            X_test = idf.transform(X_test).tocsr()
+            vectorizer = make_pipeline(hasher, idf)
+
+        logger.debug('Hashing features applied with %d columns', n_features)
+        return X_train, y_train, X_test, y_test, vectorizer
+    except Exception as e:
+        logger.error('Error during hashing transformation: %s', e)
+        raise
+
+
+def build_features(train_data: pd.DataFrame, test_data: pd.DataFrame, fe_params: dict) -> tuple:
+    """Run the feature backend selected by the `feature_engineering` params."""
+    if fe_params['backend'] == 'tfidf':
+        return apply_tfidf(train_data, test_data, fe_params['max_features'])
+    if fe_params['backend'] == 'hashing':
+        return apply_hashing(train_data, test_data, fe_params['n_features'],
+                             fe_params['use_idf'], fe_params['n_jobs'],
+                             fe_params['chunk_size'])
+    raise ValueError(f"Unknown feature backend: {fe_params['backend']}")
+
+
+def save_vectorizer(vectorizer, file_path: str) -> None:
+    """Save the fitted vectorizer so inference can reproduce the features."""
+    try:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path, 'wb') as file:
+            pickle.dump(vectorizer, file)
+        logger.debug('Vectorizer saved to %s', file_path)
+    except Exception as e:
+        logger.error('Error occurred while saving the vectorizer: %s', e)
+        raise
+
+
 def save_data(df: pd.DataFrame, file_path: str) -> None:
     """Save the engineered dataframe to a CSV file."""
     try:
@@ -98,22 +190,46 @@ def save_data(df: pd.DataFrame, file_path: str) -> None:
         raise
 
 
+def to_dense_frame(X: 'scipy.sparse.csr_matrix', y: np.ndarray) -> pd.DataFrame:
+    """Build the legacy dense layout: one column per feature plus 'label'."""
+    df = pd.DataFrame(X.toarray())
+    df['label'] = y
+    return df
+
+
+@stage('feature_engineering')
 def main():
     try:
         # max_features = 50
         params = load_params(params_path='params.yaml')
-        max_features = params['feature_engineering']['max_features']
-        
-
-        train_data = load_data('./data/interim/train_processed.csv')
-        test_data = load_data('./data/interim/test_processed.csv')
-
-        train_df, test_df = apply_tfidf(train_data, test_data, max_features)
-
-        save_data(train_df, os.path.join(
-            "./data", "processed", "train_tfidf.csv"))
-        save_data(test_df, os.path.join(
-            "./data", "processed", "test_tfidf.csv"))
+        fe_params = params['feature_engineering']
+        export_dense_csv = fe_params['export_dense_csv']
+        fmt = params['artifacts']['format']
+
+        train_data = load_data(artifact_path(
+            './data/interim', 'train_processed', fmt), fmt)
+        test_data = load_data(artifact_path(
+            './data/interim', 'test_processed', fmt), fmt)
+
+        X_train, y_train, X_test, y_test, vectorizer = build_features(
+            train_data, test_data, fe_params)
+        save_vectorizer(vectorizer, os.path.join('models', 'vectorizer.pkl'))
+        set_stage_rows(X_train.shape[0] + X_test.shape[0])
+
+        processed_path = os.path.join("./data", "processed")
+        save_features(X_train, y_train,
+                      os.path.join(processed_path, "train_tfidf.npz"),
+                      os.path.join(processed_path, "train_labels.npy"))
+        save_features(X_test, y_test,
+                      os.path.join(processed_path, "test_tfidf.npz"),
+                      os.path.join(processed_path, "test_labels.npy"))
+
+        # Legacy dense export, only written on request
+        if export_dense_csv:
+            save_data(to_dense_frame(X_train, y_train),
+                      os.path.join(processed_path, "train_tfidf.csv"))
+            save_data(to_dense_frame(X_test, y_test),
+                      os.path.join(processed_path, "test_tfidf.csv"))
     except Exception as e:
         logger.error(
             'Failed to complete the feature engineering process: %s', e)
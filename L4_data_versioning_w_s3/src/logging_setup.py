@@ -0,0 +1,248 @@
+"""
+Shared logging configuration of the pipeline modules.
+
+Every module gets its logger from `get_logger(name)`. Records are handed to
+a queue in the calling thread and written by one background listener
+thread, to the console and to logs/<name>.log, so a log call never waits on
+file or terminal I/O.
+
+Settings come from the `logging` section of params.yaml, and the
+environment overrides them:
+    level       MLOPS_LOG_LEVEL   level of every pipeline logger
+    json        MLOPS_LOG_JSON    one JSON object per line instead of text
+    rate_limit                    records per second allowed per message,
+                                  0 for no limit (below WARNING only)
+    rate_burst                    records let through before limiting starts
+"""
+import os
+import copy
+import json
+import time
+import queue
+import atexit
+import logging
+import threading
+import multiprocessing.util
+from logging.handlers import QueueHandler, QueueListener
+import yaml
+
+LOG_DIR = 'logs'
+LEVEL_ENV = 'MLOPS_LOG_LEVEL'
+JSON_ENV = 'MLOPS_LOG_JSON'
+DEFAULTS = {'level': 'INFO', 'json': False, 'rate_limit': 10, 'rate_burst': 50}
+TEXT_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+
+
+class JsonFormatter(logging.Formatter):
+    """Format a record as one JSON object per line."""
+
+    def format(self, record):
+        payload = {
+            'time': self.formatTime(record),
+            'logger': record.name,
+            'level': record.levelname,
+            'message': record.getMessage(),
+        }
+        if getattr(record, 'suppressed', 0):
+            payload['suppressed'] = record.suppressed
+        if record.exc_info and not record.exc_text:
+            record.exc_text = self.formatException(record.exc_info)
+        if record.exc_text:
+            payload['exception'] = record.exc_text
+        return json.dumps(payload)
+
+
+class RateLimitFilter(logging.Filter):
+    """
+    Token bucket per logger and message template, for messages logged once
+    per row or chunk.
+
+    A message may be logged `burst` times in a row, then `rate` times per
+    second. The next record let through carries the number of records
+    dropped in between. WARNING and above are never dropped.
+
+    Args:
+        rate (float): Records per second allowed per message, 0 for no limit.
+        burst (int): Size of the bucket.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        super().__init__()
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def filter(self, record):
+        if self.rate <= 0 or record.levelno >= logging.WARNING:
+            return True
+        key = (record.name, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            tokens, last, suppressed = self._buckets.get(key, (self.burst, now, 0))
+            tokens = min(self.burst, tokens + (now - last) * self.rate)
+            if tokens < 1:
+                self._buckets[key] = (tokens, now, suppressed + 1)
+                return False
+            self._buckets[key] = (tokens - 1, now, 0)
+        if suppressed:
+            record.suppressed = suppressed
+            record.msg = '%s [%d similar messages suppressed]' % (record.msg, suppressed)
+        return True
+
+
+class _FileRouter(logging.Handler):
+    """Write each record to logs/<logger name>.log, opening files on first use."""
+
+    def __init__(self, log_dir: str):
+        super().__init__()
+        self.log_dir = log_dir
+        self._files = {}
+
+    def setFormatter(self, fmt):
+        super().setFormatter(fmt)
+        for handler in self._files.values():
+            handler.setFormatter(fmt)
+
+    def emit(self, record):
+        handler = self._files.get(record.name)
+        if handler is None:
+            os.makedirs(self.log_dir, exist_ok=True)
+            handler = logging.FileHandler(os.path.join(self.log_dir, f'{record.name}.log'))
+            handler.setFormatter(self.formatter)
+            self._files[record.name] = handler
+        handler.handle(record)
+
+    def close(self):
+        for handler in self._files.values():
+            handler.close()
+        self._files.clear()
+        super().close()
+
+
+class _QueueHandler(QueueHandler):
+    """QueueHandler that writes synchronously once the listener has been stopped."""
+
+    def prepare(self, record):
+        # Merge the arguments now, they may change once the call returns
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record):
+        if _listener is None:
+            for handler in _handlers:
+                handler.handle(record)
+        else:
+            self.queue.put_nowait(record)
+
+
+_lock = threading.Lock()
+_config = None
+_loggers = set()
+_handlers = ()
+_listener = None
+_queue_handler = None
+_rate_filter = None
+
+
+def load_settings(params_path: str = 'params.yaml') -> dict:
+    """Logging settings: defaults, then params.yaml, then the environment."""
+    settings = dict(DEFAULTS)
+    if os.path.exists(params_path):
+        with open(params_path, 'r') as file:
+            settings.update((yaml.safe_load(file) or {}).get('logging') or {})
+    if os.environ.get(LEVEL_ENV):
+        settings['level'] = os.environ[LEVEL_ENV]
+    if os.environ.get(JSON_ENV):
+        settings['json'] = os.environ[JSON_ENV].lower() in ('1', 'true', 'yes')
+    settings['level'] = str(settings['level']).upper()
+    return settings
+
+
+def _start_listener() -> None:
+    global _listener
+    _queue_handler.queue = queue.SimpleQueue()
+    _listener = QueueListener(_queue_handler.queue, *_handlers)
+    _listener.start()
+
+
+def stop() -> None:
+    """Write out the queued records and stop the listener; later records are written directly."""
+    global _listener
+    with _lock:
+        listener, _listener = _listener, None
+    if listener is not None:
+        listener.stop()
+    for handler in _handlers:
+        try:
+            handler.flush()
+        except (ValueError, OSError):
+            # At exit the stream may already be closed (e.g. captured by pytest)
+            pass
+
+
+def _after_fork_in_child() -> None:
+    # The listener thread does not survive fork; records queued before it belong to the parent
+    global _listener
+    _listener = None
+    if _queue_handler is not None:
+        _start_listener()
+        # Pool workers leave through os._exit, which skips atexit
+        multiprocessing.util.Finalize(None, stop, exitpriority=0)
+
+
+def configure(params_path: str = 'params.yaml', **overrides) -> dict:
+    """
+    Set up (or change) the logging of every pipeline logger.
+
+    Args:
+        params_path (str): params.yaml to read the `logging` section from.
+        **overrides: Settings taking precedence over params.yaml and the
+            environment (level, json, rate_limit, rate_burst).
+
+    Returns:
+        dict: The settings in effect.
+    """
+    global _config, _handlers, _queue_handler, _rate_filter
+    settings = load_settings(params_path)
+    settings.update(overrides)
+    settings['level'] = str(settings['level']).upper()
+    formatter = JsonFormatter() if settings['json'] else logging.Formatter(TEXT_FORMAT)
+    with _lock:
+        if _queue_handler is None:
+            _handlers = (logging.StreamHandler(), _FileRouter(LOG_DIR))
+            _queue_handler = _QueueHandler(queue.SimpleQueue())
+            _rate_filter = RateLimitFilter(settings['rate_limit'], settings['rate_burst'])
+            _queue_handler.addFilter(_rate_filter)
+            _start_listener()
+            atexit.register(stop)
+            os.register_at_fork(after_in_child=_after_fork_in_child)
+        for handler in _handlers:
+            handler.setFormatter(formatter)
+        _rate_filter.rate = settings['rate_limit']
+        _rate_filter.burst = max(settings['rate_burst'], 1)
+        for name in _loggers:
+            logging.getLogger(name).setLevel(settings['level'])
+        _config = settings
+    return settings
+
+
+def get_logger(name: str) -> logging.Logger:
+    """
+    Logger of a pipeline module, writing to the console and logs/<name>.log
+    through the shared queue.
+    """
+    if _config is None:
+        configure()
+    logger = logging.getLogger(name)
+    with _lock:
+        if name not in _loggers:
+            logger.setLevel(_config['level'])
+            logger.addHandler(_queue_handler)
+            _loggers.add(name)
+    return logger
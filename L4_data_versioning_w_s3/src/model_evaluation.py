@@ -1,38 +1,15 @@
 import os
+from concurrent.futures import ProcessPoolExecutor
 import numpy as np
-import pandas as pd
-import pickle
 import json
-from sklearn.metrics import accuracy_score, precision_score, recall_score, roc_auc_score
-import logging
 import yaml
-from dvclive import Live
+import model_io
+from artifact_io import feature_rows, iter_feature_chunks, load_features
+from eval_metrics import ScoreHistogram, binary_report, thin_curve
+from perf import collect, instrument, set_stage_rows, stage
+from logging_setup import get_logger
 
-
-# Ensure the "logs" directory exists
-log_dir = 'logs'
-os.makedirs(log_dir, exist_ok=True)
-
-# Logging configuration
-logger = logging.getLogger(name='model_evaluation')
-logger.setLevel(logging.DEBUG)
-
-# setting up console handler
-console_handler = logging.StreamHandler()
-console_handler.setLevel(logging.DEBUG)
-
-# setting up file handler
-log_file_path = os.path.join(log_dir, 'model_evaluation.log')
-file_handler = logging.FileHandler(log_file_path)
-file_handler.setLevel(logging.DEBUG)
-
-formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-file_handler.setFormatter(formatter)
-
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+logger = get_logger('model_evaluation')
 
 
 def load_params(params_path: str) -> dict:
@@ -62,11 +39,10 @@ def load_params(params_path: str) -> dict:
 
 
 def load_model(file_path: str):
-    """Load a trained model from a pickle file"""
+    """Load a trained model saved in any of the model_io formats"""
 
     try:
-        with open(file_path, 'rb') as file:
-            model = pickle.load(file)
+        model = model_io.load_model(file_path)
 
         logger.debug('Model loaded from %s', file_path)
         return model
@@ -79,39 +55,89 @@ def load_model(file_path: str):
         raise
 
 
-def load_data(file_path: str) -> pd.DataFrame:
-    """Load data from a CSV file."""
+@instrument(rows=lambda clf, X_test, *args, **kwargs: X_test.shape[0])
+def evaluate_model(clf, X_test: np.ndarray, y_test: np.ndarray) -> tuple:
+    """
+    Evaluate the model with a single predict_proba pass over the test set.
+
+    Returns:
+    tuple: (metrics, curves) - scalar metrics and the ROC/PR curves
+    """
     try:
-        df = pd.read_csv(file_path)
-        logger.debug('Data loaded from %s', file_path)
-        return df
+        proba = model_io.predict_proba(clf, X_test)
+        metrics, curves = binary_report(y_test, proba, clf.classes_)
+        logger.info('Evaluation Metrics Calculated')
+        return metrics, curves
 
-    except pd.errors.ParserError as e:
-        logger.error('Failed to parse the CSV file: %s', e)
-        raise
     except Exception as e:
-        logger.error('Unexpected error occurred while loading the data: %s', e)
+        logger.error(
+            'Unexpected Error occurred while evaluating the model: %s', e)
         raise
 
 
-def evaluate_model(clf, X_test: np.ndarray, y_test: np.ndarray) -> dict:
-    """Evaluate the model and return a evaluation result"""
+_worker_model = None
+
+
+def _init_worker(model_path: str):
+    """Load the model once per pool worker; mapped formats share its pages."""
+    global _worker_model
+    _worker_model = model_io.load_model(model_path)
+
+
+def _score_rows(task: tuple) -> ScoreHistogram:
+    """Score rows [start, stop) chunk by chunk into a histogram of their own."""
+    features_path, labels_path, start, stop, chunk_size, bins = task
+    histogram = ScoreHistogram(_worker_model.classes_, bins)
+    for X, y in iter_feature_chunks(features_path, labels_path, chunk_size, start, stop):
+        histogram.update(y, model_io.predict_proba(_worker_model, X))
+    return histogram
+
+
+@instrument(result_rows=lambda result: sum(result[0][key] for key in ('tp', 'fp', 'tn', 'fn')))
+def evaluate_streaming(model_path: str, features_path: str, labels_path: str,
+                       chunk_size: int, bins: int, n_jobs: int = 1) -> tuple:
+    """
+    Evaluate the model over the test features in chunks with bounded memory.
+
+    Only one chunk per process is held in memory. Confusion counts are
+    exact; ROC-AUC and PR-AUC come from score histograms of `bins` bins
+    and metrics['auc_max_error'] bounds the ROC-AUC error.
+
+    Args:
+    model_path: str: Model saved by model_training
+    features_path: str: Test features saved by save_features
+    labels_path: str: Matching test labels
+    chunk_size: int: Rows scored per predict_proba call
+    bins: int: Score histogram bins
+    n_jobs: int: Worker processes scoring chunks (-1 = all cores)
+
+    Returns:
+    tuple: (metrics, curves) - as returned by evaluate_model
+    """
     try:
-        y_pred = clf.predict(X_test)
-        y_pred_proba = clf.predict_proba(X_test)[:, 1]
-        accuracy = accuracy_score(y_test, y_pred)
-        precision = precision_score(y_test, y_pred)
-        recall = recall_score(y_test, y_pred)
-        auc = roc_auc_score(y_test, y_pred)
-
-        metrics_dict = {
-            'accuracy': accuracy,
-            'precision': precision,
-            'recall': recall,
-            'auc': auc
-        }
-        logger.info('Evaluation Metrics Calculated')
-        return metrics_dict
+        if n_jobs == -1:
+            n_jobs = os.cpu_count() or 1
+        n_rows = feature_rows(features_path)
+        tasks = [(features_path, labels_path, start, min(start + chunk_size, n_rows),
+                  chunk_size, bins) for start in range(0, n_rows, chunk_size)]
+
+        if n_jobs <= 1:
+            # A single task streams every chunk through this process
+            _init_worker(model_path)
+            histogram = _score_rows((features_path, labels_path, 0, n_rows, chunk_size, bins))
+        else:
+            with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                                     initargs=(model_path,)) as executor:
+                histogram = None
+                for partial in executor.map(_score_rows, tasks):
+                    histogram = partial if histogram is None else histogram.merge(partial)
+        if histogram is None:
+            raise ValueError(f'No test rows in {features_path}')
+
+        metrics, curves = histogram.report()
+        logger.info('Evaluation Metrics Calculated over %d rows in %d chunks (AUC error <= %s)',
+                    histogram.n_samples, len(tasks), metrics['auc_max_error'])
+        return metrics, curves
 
     except Exception as e:
         logger.error(
@@ -133,30 +159,61 @@ def save_metrics(metrics: dict, json_file_path: str) -> None:
         logger.error('Failed to save metrics: %s', e)
 
 
-def main():
-    try:
-        clf = load_model('./models/model.pkl')
-        test_data = load_data('./data/processed/test_tfidf.csv')
+def track_experiment(metrics: dict, curves: dict, perf: dict, params: dict) -> None:
+    """Log metrics, curves, stage costs and parameters of the current run with dvclive."""
+    from dvclive import Live
 
-        X_test = test_data.iloc[:, :-1].values
-        y_test = test_data.iloc[:, -1].values
+    # Tracking metrics and parameters with 'dvclive'
+    with Live(save_dvc_exp=True) as live:
+        # Logging the same metrics written to reports/metrics.json
+        for name, value in metrics.items():
+            # Undefined metrics (e.g. ROC-AUC with one class) are not logged
+            if value is not None:
+                live.log_metric(name, value)
 
-        metrics = evaluate_model(clf, X_test, y_test)
-        # Saving metrics of current run(experiment) to a JSON file
-        save_metrics(metrics, json_file_path='reports/metrics.json')
+        # Logging the ROC and PR curves computed during evaluation
+        for kind, x, y in (('roc', 'fpr', 'tpr'), ('pr', 'recall', 'precision')):
+            curve = thin_curve({x: curves[kind][x], y: curves[kind][y]})
+            datapoints = [{x: float(a), y: float(b)} for a, b in zip(curve[x], curve[y])]
+            live.log_plot(kind, datapoints, x=x, y=y, template='linear')
 
-        params = load_params(params_path='params.yaml')
+        # Logging the cost of each stage next to its accuracy
+        for stage_name, report in perf.items():
+            for key in ('wall_s', 'cpu_s', 'peak_rss_mb', 'rows_per_s'):
+                if report['stage'][key] is not None:
+                    live.log_metric(f'perf/{stage_name}/{key}', report['stage'][key])
+
+        # Logging parameters responsible for the current metrics
+        live.log_params(params)
 
-        # Tracking metrics and parameters with 'dvclive'
-        with Live(save_dvc_exp=True) as live:
-            # Logging metrics
-            live.log_metric('accuracy', accuracy_score(y_test, y_test))
-            live.log_metric('precision', precision_score(y_test, y_test))
-            live.log_metric('recall', recall_score(y_test, y_test))
-            live.log_metric('roc_auc', roc_auc_score(y_test, y_test))
 
-            # Logging parameters responsible for the current metrics
-            live.log_params(params)
+def main():
+    try:
+        params = load_params(params_path='params.yaml')
+        eval_params = params['model_evaluation']
+        features_path = './data/processed/test_tfidf.npz'
+        labels_path = './data/processed/test_labels.npy'
+
+        with stage('model_evaluation'):
+            if eval_params['streaming']:
+                metrics, curves = evaluate_streaming(
+                    './models/model.pkl', features_path, labels_path,
+                    chunk_size=eval_params['chunk_size'], bins=eval_params['bins'],
+                    n_jobs=eval_params['n_jobs'])
+                set_stage_rows(metrics['tp'] + metrics['fp'] + metrics['tn'] + metrics['fn'])
+            else:
+                clf = load_model('./models/model.pkl')
+                X_test, y_test = load_features(features_path, labels_path)
+                set_stage_rows(X_test.shape[0])
+                metrics, curves = evaluate_model(clf, X_test, y_test)
+            # Saving metrics of current run(experiment) to a JSON file
+            save_metrics(metrics, json_file_path='reports/metrics.json')
+
+        # Wall/CPU time, peak RSS and throughput of every stage of this run
+        perf = collect()
+        save_metrics(perf, json_file_path='reports/perf.json')
+
+        track_experiment(metrics, curves, perf, params)
 
     except Exception as e:
         logger.error('Failed to complete the model evaluation process: %s', e)
@@ -0,0 +1,347 @@
+import os
+import pickle
+import numpy as np
+from logging_setup import get_logger
+
+logger = get_logger('model_io')
+
+# Supported model artifact formats:
+#   pickle        - plain pickle of the estimator (legacy)
+#   joblib        - joblib pickle of the estimator, optionally compressed
+#   forest_arrays - the forest flattened into a few numpy arrays that are
+#                   memory-mapped read-only on load and shared between processes
+#   forest_compiled - compact float32/int32 arrays walked for all trees at
+#                   once, for low-latency scoring of small batches
+MODEL_FORMATS = ('pickle', 'joblib', 'forest_arrays', 'forest_compiled')
+
+FOREST_ARRAYS_VERSION = 1
+FOREST_COMPILED_VERSION = 1
+
+
+def forest_to_arrays(clf) -> dict:
+    """
+    Flatten a fitted single-output RandomForestClassifier into numpy arrays.
+
+    The nodes of every tree are concatenated; child indices are made global
+    so one set of arrays describes the whole forest. Leaf class
+    probabilities are stored already normalized, as `predict_proba` uses them.
+    """
+    if not hasattr(clf, 'estimators_') or getattr(clf, 'n_outputs_', 1) != 1:
+        raise ValueError('forest_arrays only supports fitted single-output forest classifiers')
+
+    trees = [estimator.tree_ for estimator in clf.estimators_]
+    offsets = np.zeros(len(trees) + 1, dtype=np.int64)
+    offsets[1:] = np.cumsum([tree.node_count for tree in trees])
+
+    children_left, children_right, feature, threshold, proba = [], [], [], [], []
+    for offset, tree in zip(offsets, trees):
+        is_leaf = tree.children_left == -1
+        children_left.append(np.where(is_leaf, -1, tree.children_left + offset))
+        children_right.append(np.where(is_leaf, -1, tree.children_right + offset))
+        feature.append(tree.feature)
+        threshold.append(tree.threshold)
+        value = tree.value[:, 0, :]
+        normalizer = value.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        proba.append(value / normalizer)
+
+    return {
+        'format': 'forest_arrays',
+        'version': FOREST_ARRAYS_VERSION,
+        'params': clf.get_params(),
+        'classes': np.asarray(clf.classes_),
+        'n_features_in': int(clf.n_features_in_),
+        'features_fingerprint': getattr(clf, 'features_fingerprint_', None),
+        'tree_offsets': offsets,
+        'children_left': np.concatenate(children_left).astype(np.int64),
+        'children_right': np.concatenate(children_right).astype(np.int64),
+        'feature': np.concatenate(feature).astype(np.int64),
+        'threshold': np.concatenate(threshold).astype(np.float64),
+        'proba': np.concatenate(proba).astype(np.float64),
+    }
+
+
+class ArrayForest:
+    """
+    Predict with a forest stored by `forest_to_arrays`.
+
+    Gives the same `predict_proba` as the original RandomForestClassifier:
+    samples go left when their float32 feature value is <= the node
+    threshold, and the per-tree leaf probabilities are averaged in tree
+    order. The arrays may be read-only memory maps.
+
+    Args:
+        arrays (dict): Output of `forest_to_arrays`.
+    """
+
+    def __init__(self, arrays: dict):
+        if arrays.get('version') != FOREST_ARRAYS_VERSION:
+            raise ValueError(f"Unsupported forest_arrays version: {arrays.get('version')}")
+        self.arrays = arrays
+        self.classes_ = np.asarray(arrays['classes'])
+        self.n_features_in_ = arrays['n_features_in']
+        self.n_estimators = len(arrays['tree_offsets']) - 1
+        self.features_fingerprint_ = arrays['features_fingerprint']
+        self.params = arrays['params']
+
+    def _feature_lookup(self, X):
+        """Return a function mapping (rows, features) to float32 values of X."""
+        import scipy.sparse
+
+        if scipy.sparse.issparse(X):
+            # Copy so sorting the indices below never touches the caller's matrix
+            X = scipy.sparse.csr_matrix(X, dtype=np.float32, copy=True)
+            X.sum_duplicates()
+            n_features = np.int64(X.shape[1])
+            rows = np.repeat(np.arange(X.shape[0], dtype=np.int64), np.diff(X.indptr))
+            # Row-major keys of the stored entries are sorted, so lookups are binary searches
+            keys = rows * n_features + X.indices
+            data = X.data
+
+            def lookup(sample_rows, features):
+                query = sample_rows * n_features + features
+                if len(keys) == 0:
+                    return np.zeros(len(query), dtype=np.float32)
+                position = np.minimum(np.searchsorted(keys, query), len(keys) - 1)
+                return np.where(keys[position] == query, data[position], np.float32(0))
+            return lookup
+
+        X = np.asarray(X, dtype=np.float32)
+        return lambda sample_rows, features: X[sample_rows, features]
+
+    def predict_proba(self, X) -> np.ndarray:
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f'X has {X.shape[1]} features, but the forest expects {self.n_features_in_}')
+        lookup = self._feature_lookup(X)
+        children_left = self.arrays['children_left']
+        children_right = self.arrays['children_right']
+        feature = self.arrays['feature']
+        threshold = self.arrays['threshold']
+        proba = self.arrays['proba']
+
+        n_samples = X.shape[0]
+        all_rows = np.arange(n_samples, dtype=np.int64)
+        total = np.zeros((n_samples, len(self.classes_)), dtype=np.float64)
+        for root in self.arrays['tree_offsets'][:-1]:
+            nodes = np.full(n_samples, root, dtype=np.int64)
+            rows, active = all_rows, nodes
+            while len(rows):
+                left = children_left[active]
+                internal = left != -1
+                rows, active, left = rows[internal], active[internal], left[internal]
+                go_left = lookup(rows, feature[active]) <= threshold[active]
+                active = np.where(go_left, left, children_right[active])
+                nodes[rows] = active
+            total += proba[nodes]
+        total /= self.n_estimators
+        return total
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def predict_proba(model, X) -> np.ndarray:
+    """
+    Class probabilities of any model saved by `save_model`.
+
+    Linear models without `predict_proba` (hinge-loss SGD) get the logistic
+    of their `decision_function` for the positive class. A score of 0 maps
+    to 0.5/0.5, which argmax resolves to classes_[0] just as `predict` does.
+    """
+    from scipy.special import expit
+
+    if hasattr(model, 'predict_proba'):
+        return model.predict_proba(X)
+    decision = np.asarray(model.decision_function(X), dtype=np.float64)
+    if decision.ndim != 1:
+        raise ValueError('decision_function fallback only supports binary classifiers')
+    positive = expit(decision)
+    return np.column_stack([1.0 - positive, positive])
+
+
+def _round_down_float32(values: np.ndarray) -> np.ndarray:
+    """Largest float32 <= each value, so `x <= t` is unchanged for float32 x."""
+    rounded = values.astype(np.float32)
+    too_high = rounded.astype(np.float64) > values
+    rounded[too_high] = np.nextafter(rounded[too_high], np.float32(-np.inf))
+    return rounded
+
+
+def compile_forest(clf) -> dict:
+    """
+    Compile a fitted single-output RandomForestClassifier into compact arrays.
+
+    Internal nodes of all trees are numbered globally and stored as int32
+    feature indices, float32 thresholds and an interleaved (right, left)
+    int32 children table, in which a child that is a leaf is stored as the
+    bitwise complement (~index) of its row in the float32 leaf probability
+    table. Node features index `used_features`, the input columns some
+    split actually tests.
+    """
+    if not hasattr(clf, 'estimators_') or getattr(clf, 'n_outputs_', 1) != 1:
+        raise ValueError('forest_compiled only supports fitted single-output forest classifiers')
+
+    trees = [estimator.tree_ for estimator in clf.estimators_]
+    if sum(tree.node_count for tree in trees) > np.iinfo(np.int32).max:
+        raise ValueError('Forest has too many nodes for int32 indices')
+
+    used_features = np.unique(np.concatenate(
+        [tree.feature[tree.children_left != -1] for tree in trees]))
+    column = np.zeros(clf.n_features_in_, dtype=np.int64)
+    column[used_features] = np.arange(len(used_features))
+
+    roots, children, feature, threshold, proba = [], [], [], [], []
+    n_internal = n_leaves = 0
+    for tree in trees:
+        is_leaf = tree.children_left == -1
+        # Global id of every node: its internal node number, or ~ its leaf row
+        node_id = np.where(is_leaf, ~(n_leaves + np.cumsum(is_leaf) - 1),
+                           n_internal + np.cumsum(~is_leaf) - 1)
+        internal = ~is_leaf
+        roots.append(node_id[0])
+        children.append(np.column_stack([node_id[tree.children_right[internal]],
+                                         node_id[tree.children_left[internal]]]).ravel())
+        feature.append(column[tree.feature[internal]])
+        threshold.append(_round_down_float32(tree.threshold[internal]))
+        value = tree.value[is_leaf, 0, :]
+        normalizer = value.sum(axis=1, keepdims=True)
+        normalizer[normalizer == 0.0] = 1.0
+        proba.append(value / normalizer)
+        n_internal += int(internal.sum())
+        n_leaves += int(is_leaf.sum())
+
+    return {
+        'format': 'forest_compiled',
+        'version': FOREST_COMPILED_VERSION,
+        'params': clf.get_params(),
+        'classes': np.asarray(clf.classes_),
+        'n_features_in': int(clf.n_features_in_),
+        'features_fingerprint': getattr(clf, 'features_fingerprint_', None),
+        'used_features': used_features.astype(np.int32),
+        'roots': np.array(roots, dtype=np.int32),
+        'children': np.concatenate(children).astype(np.int32),
+        'feature': np.concatenate(feature).astype(np.int32),
+        'threshold': np.concatenate(threshold).astype(np.float32),
+        'proba': np.concatenate(proba).astype(np.float32),
+    }
+
+
+class CompiledForest:
+    """
+    Predict with a forest compiled by `compile_forest`.
+
+    A batch is reduced to the dense float32 columns the forest tests, then
+    all (sample, tree) pairs still on an internal node descend one level per
+    step until every one of them reaches a leaf. Thresholds are rounded
+    down to float32, which keeps every split decision identical to
+    sklearn's; only the float32 leaf probabilities differ, by well under 1e-6.
+
+    Args:
+        arrays (dict): Output of `compile_forest`.
+    """
+
+    def __init__(self, arrays: dict):
+        if arrays.get('version') != FOREST_COMPILED_VERSION:
+            raise ValueError(f"Unsupported forest_compiled version: {arrays.get('version')}")
+        # Plain ndarray views of memory maps index faster and still share the pages
+        self.arrays = {key: np.asarray(value) if isinstance(value, np.ndarray) else value
+                       for key, value in arrays.items()}
+        self.classes_ = np.asarray(arrays['classes'])
+        self.n_features_in_ = arrays['n_features_in']
+        self.n_estimators = len(arrays['roots'])
+        self.features_fingerprint_ = arrays['features_fingerprint']
+        self.params = arrays['params']
+
+    def _used_columns(self, X) -> np.ndarray:
+        """Dense float32 (n_samples, n_used_features) copy of the tested columns."""
+        import scipy.sparse
+
+        used_features = self.arrays['used_features']
+        if scipy.sparse.issparse(X):
+            return scipy.sparse.csr_matrix(X)[:, used_features].toarray().astype(np.float32)
+        return np.asarray(X, dtype=np.float32)[:, used_features]
+
+    def predict_proba(self, X) -> np.ndarray:
+        if X.shape[1] != self.n_features_in_:
+            raise ValueError(
+                f'X has {X.shape[1]} features, but the forest expects {self.n_features_in_}')
+        arrays = self.arrays
+        children, feature, threshold = arrays['children'], arrays['feature'], arrays['threshold']
+
+        values = self._used_columns(X).ravel()
+        n_samples, n_trees = X.shape[0], self.n_estimators
+        # Node of every (sample, tree) pair, sample-major; negative once on a leaf
+        nodes = np.tile(arrays['roots'], n_samples)
+        pairs = np.flatnonzero(nodes >= 0)
+        current = nodes[pairs]
+        row_start = (pairs // n_trees) * len(arrays['used_features'])
+        while len(pairs):
+            go_left = values[row_start + feature[current]] <= threshold[current]
+            current = children[2 * current + go_left]
+            on_leaf = current < 0
+            nodes[pairs[on_leaf]] = current[on_leaf]
+            internal = ~on_leaf
+            pairs, current, row_start = pairs[internal], current[internal], row_start[internal]
+        proba = arrays['proba'][~nodes].reshape(n_samples, n_trees, -1)
+        return proba.sum(axis=1, dtype=np.float64) / n_trees
+
+    def predict(self, X) -> np.ndarray:
+        return self.classes_.take(np.argmax(self.predict_proba(X), axis=1), axis=0)
+
+
+def save_model(model, file_path: str, fmt: str = 'pickle', compress: int = 0) -> None:
+    """
+    Save a trained model in one of `MODEL_FORMATS`.
+
+    Args:
+        model: Trained estimator.
+        file_path (str): Destination file.
+        fmt (str): 'pickle', 'joblib', 'forest_arrays' or 'forest_compiled'.
+        compress (int): joblib compression level 0-9 for the formats other
+            than pickle. Compressed files cannot be memory-mapped,
+            so they are meant for storage on the DVC remote.
+    """
+    if fmt not in MODEL_FORMATS:
+        raise ValueError(f"Unsupported model format '{fmt}', expected one of {MODEL_FORMATS}")
+    if fmt == 'pickle' and compress:
+        raise ValueError("Compression needs the 'joblib' or 'forest_arrays' model format")
+    os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+    if fmt == 'pickle':
+        with open(file_path, 'wb') as file:
+            pickle.dump(model, file)
+    else:
+        import joblib
+
+        converters = {'forest_arrays': forest_to_arrays, 'forest_compiled': compile_forest}
+        obj = converters[fmt](model) if fmt in converters else model
+        joblib.dump(obj, file_path, compress=compress)
+    logger.debug('Model saved to %s as %s (compress=%d)', file_path, fmt, compress)
+
+
+def _is_compressed(file_path: str) -> bool:
+    # Uncompressed pickles (protocol >= 2) start with the PROTO opcode
+    with open(file_path, 'rb') as file:
+        return file.read(1) != b'\x80'
+
+
+def load_model(file_path: str, mmap: bool = True):
+    """
+    Load a model saved by `save_model` in any format.
+
+    Uncompressed joblib, forest_arrays and forest_compiled files have their
+    arrays mapped read-only when `mmap` is set, so processes loading the
+    same file share those pages. forest_arrays files are returned as an
+    `ArrayForest` and forest_compiled files as a `CompiledForest`.
+    """
+    import joblib
+
+    mmap_mode = 'r' if mmap and not _is_compressed(file_path) else None
+    # joblib also reads plain pickles
+    obj = joblib.load(file_path, mmap_mode=mmap_mode)
+    if isinstance(obj, dict) and obj.get('format') == 'forest_arrays':
+        obj = ArrayForest(obj)
+    elif isinstance(obj, dict) and obj.get('format') == 'forest_compiled':
+        obj = CompiledForest(obj)
+    logger.debug('Model loaded from %s (mmap_mode=%s)', file_path, mmap_mode)
+    return obj
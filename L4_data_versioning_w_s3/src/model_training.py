@@ -1,33 +1,18 @@
 import os
+import time
+import hashlib
+from typing import TYPE_CHECKING
 import numpy as np
-import pandas as pd
-import pickle
-import logging
-from sklearn.ensemble import RandomForestClassifier
 import yaml
+import model_io
+from perf import instrument, set_stage_rows, stage
+from artifact_io import feature_rows, iter_feature_chunks, load_features
+from logging_setup import get_logger
 
-# Ensure the "logs" directory exists
-log_dir = 'logs'
-os.makedirs(log_dir, exist_ok=True)
+if TYPE_CHECKING:
+    from sklearn.ensemble import RandomForestClassifier
 
-# logging configuration
-logger = logging.getLogger('model_building')
-logger.setLevel('DEBUG')
-
-console_handler = logging.StreamHandler()
-console_handler.setLevel('DEBUG')
-
-log_file_path = os.path.join(log_dir, 'model_building.log')
-file_handler = logging.FileHandler(log_file_path)
-file_handler.setLevel('DEBUG')
-
-formatter = logging.Formatter(
-    '%(asctime)s - %(name)s - %(levelname)s - %(message)s')
-console_handler.setFormatter(formatter)
-file_handler.setFormatter(formatter)
-
-logger.addHandler(console_handler)
-logger.addHandler(file_handler)
+logger = get_logger('model_building')
 
 
 def load_params(params_path: str) -> dict:
@@ -48,50 +33,118 @@ def load_params(params_path: str) -> dict:
         raise
 
 
-def load_data(file_path: str) -> pd.DataFrame:
+def features_fingerprint(X_train, y_train: np.ndarray) -> str:
+    """Digest of a training set, used to check a model can be grown further on it."""
+    import scipy.sparse
+
+    digest = hashlib.sha256()
+    digest.update(repr(X_train.shape).encode('utf-8'))
+    if scipy.sparse.issparse(X_train):
+        X_train = X_train.tocsr()
+        arrays = (X_train.indptr, X_train.indices, X_train.data)
+    else:
+        arrays = (np.asarray(X_train),)
+    for array in arrays + (np.asarray(y_train),):
+        digest.update(np.ascontiguousarray(array).tobytes())
+    return digest.hexdigest()
+
+
+def load_previous_model(file_path: str, X_train, y_train: np.ndarray, params: dict):
     """
-    Load data from a CSV file.
+    Load the forest of a previous run if it can be grown to `n_estimators`.
+
+    The previous model is only reused when it was trained on exactly the same
+    features and labels with the same seed and has no more trees than
+    requested; otherwise None is returned and training starts from scratch.
 
-    :param file_path: Path to the CSV file
-    :return: Loaded DataFrame
+    :param file_path: Path of the previous model
+    :param X_train: Training features of this run
+    :param y_train: Training labels of this run
+    :param params: Dictionary of hyperparameters
+    :return: The previous RandomForestClassifier or None
     """
+    from sklearn.ensemble import RandomForestClassifier
+
+    if not os.path.exists(file_path):
+        logger.info('No previous model at %s, training from scratch', file_path)
+        return None
     try:
-        df = pd.read_csv(file_path)
-        logger.debug('Data loaded from %s with shape %s', file_path, df.shape)
-        return df
-    except pd.errors.ParserError as e:
-        logger.error('Failed to parse the CSV file: %s', e)
-        raise
-    except FileNotFoundError as e:
-        logger.error('File not found: %s', e)
-        raise
+        # Trees are added to the loaded forest, so it must not be a read-only map
+        clf = model_io.load_model(file_path, mmap=False)
     except Exception as e:
-        logger.error('Unexpected error occurred while loading the data: %s', e)
-        raise
+        logger.warning('Previous model could not be loaded, training from scratch: %s', e)
+        return None
 
+    if not isinstance(clf, RandomForestClassifier):
+        reason = f'it is a {type(clf).__name__}, not a RandomForestClassifier'
+    elif clf.random_state != params['random_state']:
+        reason = f"its random_state is {clf.random_state}, not {params['random_state']}"
+    elif getattr(clf, 'n_features_in_', None) != X_train.shape[1]:
+        reason = f'it expects {getattr(clf, "n_features_in_", None)} features, not {X_train.shape[1]}'
+    elif getattr(clf, 'features_fingerprint_', None) != features_fingerprint(X_train, y_train):
+        reason = 'it was trained on different features or labels'
+    elif len(clf.estimators_) > params['n_estimators']:
+        reason = f'it already has {len(clf.estimators_)} trees'
+    else:
+        logger.info('Warm start from %s with %d trees', file_path, len(clf.estimators_))
+        return clf
+    logger.info('Previous model not reused because %s, training from scratch', reason)
+    return None
 
-def train_model(X_train: np.ndarray, y_train: np.ndarray, params: dict) -> RandomForestClassifier:
+
+@instrument(rows=lambda X_train, *args, **kwargs: X_train.shape[0])
+def train_model(X_train: np.ndarray, y_train: np.ndarray, params: dict,
+                previous=None) -> 'RandomForestClassifier':
     """
     Train the RandomForest model.
 
+    The forest is grown `growth_step` trees at a time, logging its size and,
+    with `oob_score`, the out-of-bag accuracy after each step. Growing in
+    steps yields the same trees as a single fit with the same seed.
+
     :param X_train: Training features
     :param y_train: Training labels
     :param params: Dictionary of hyperparameters
+    :param previous: Compatible forest from `load_previous_model` to add trees to
     :return: Trained RandomForestClassifier
     """
+    from sklearn.ensemble import RandomForestClassifier
+
     try:
         if X_train.shape[0] != y_train.shape[0]:
             raise ValueError(
                 "The number of samples in X_train and y_train must be the same.")
 
-        logger.debug(
-            'Initializing RandomForest model with parameters: %s', params)
-        clf = RandomForestClassifier(
-            n_estimators=params['n_estimators'], random_state=params['random_state'])
+        n_estimators = params['n_estimators']
+        growth_step = params.get('growth_step') or n_estimators
+        oob_score = params.get('oob_score', False)
+        if previous is not None:
+            clf = previous
+            clf.set_params(n_jobs=params.get('n_jobs', 1), oob_score=oob_score)
+        else:
+            logger.debug(
+                'Initializing RandomForest model with parameters: %s', params)
+            clf = RandomForestClassifier(
+                n_estimators=n_estimators, random_state=params['random_state'],
+                n_jobs=params.get('n_jobs', 1), oob_score=oob_score)
+        clf.set_params(warm_start=True)
 
         logger.debug('Model training started with %d samples',
                      X_train.shape[0])
-        clf.fit(X_train, y_train)
+        built = len(getattr(clf, 'estimators_', []))
+        if built == n_estimators:
+            logger.info('Forest already has %d trees, nothing to train', built)
+        while built < n_estimators:
+            built = min(built + growth_step, n_estimators)
+            clf.set_params(n_estimators=built)
+            clf.fit(X_train, y_train)
+            if oob_score:
+                logger.info('Forest grown to %d/%d trees, OOB score %.4f',
+                            built, n_estimators, clf.oob_score_)
+            else:
+                logger.info('Forest grown to %d/%d trees', built, n_estimators)
+        clf.set_params(warm_start=False)
+        clf.features_fingerprint_ = features_fingerprint(X_train, y_train)
         logger.debug('Model training completed')
 
         return clf
@@ -103,19 +156,122 @@ def train_model(X_train: np.ndarray, y_train: np.ndarray, params: dict) -> Rando
         raise
 
 
-def save_model(model, file_path: str) -> None:
+# Learners trained with partial_fit over chunks of the training set
+INCREMENTAL_ALGORITHMS = ('sgd', 'multinomial_nb', 'passive_aggressive')
+
+
+def make_incremental_learner(algorithm: str, params: dict):
+    """
+    Build an untrained incremental learner.
+
+    :param algorithm: One of INCREMENTAL_ALGORITHMS
+    :param params: Dictionary of hyperparameters
+    :return: Estimator supporting partial_fit
+    """
+    from sklearn.linear_model import SGDClassifier
+    from sklearn.naive_bayes import MultinomialNB
+
+    if algorithm == 'sgd':
+        # Logistic loss, so the model has predict_proba
+        return SGDClassifier(loss='log_loss', random_state=params['random_state'])
+    if algorithm == 'multinomial_nb':
+        return MultinomialNB()
+    if algorithm == 'passive_aggressive':
+        # sklearn's replacement for the deprecated PassiveAggressiveClassifier
+        return SGDClassifier(loss='hinge', penalty=None, learning_rate='pa1', eta0=1.0,
+                             random_state=params['random_state'])
+    raise ValueError(f"Unsupported algorithm '{algorithm}', expected 'random_forest' "
+                     f"or one of {INCREMENTAL_ALGORITHMS}")
+
+
+def feature_file_reader(features_path: str, labels_path: str):
+    """
+    Row-range reader over a feature artifact for `train_incremental`.
+
+    :param features_path: CSR matrix saved by save_features
+    :param labels_path: Matching labels array
+    :return: Function (start, stop) -> (X, y) reading only those rows
+    """
+    def read_rows(start: int, stop: int) -> tuple:
+        return next(iter_feature_chunks(features_path, labels_path, stop - start, start, stop))
+    return read_rows
+
+
+def label_classes(labels_path: str, chunk_size: int) -> np.ndarray:
+    """Distinct labels of a labels array, read chunk by chunk."""
+    y = np.load(labels_path, mmap_mode='r')
+    classes = np.array([], dtype=y.dtype)
+    for start in range(0, len(y), chunk_size):
+        classes = np.union1d(classes, y[start:start + chunk_size])
+    return classes
+
+
+@instrument(rows=lambda read_rows, n_rows, classes, params: n_rows * params['epochs'])
+def train_incremental(read_rows, n_rows: int, classes: np.ndarray, params: dict):
+    """
+    Train an incremental learner with partial_fit over chunks of the training set.
+
+    Every epoch visits the chunks in a new random order and shuffles the
+    rows inside each chunk, so only one chunk of `chunk_size` rows is in
+    memory at a time.
+
+    :param read_rows: Function (start, stop) -> (X, y) reading a row range
+    :param n_rows: Number of training rows
+    :param classes: All class labels, required by the first partial_fit call
+    :param params: Dictionary of hyperparameters
+    :return: Trained estimator
+    """
+    try:
+        if n_rows == 0:
+            raise ValueError('The training set is empty')
+        algorithm = params['algorithm']
+        clf = make_incremental_learner(algorithm, params)
+        chunk_size = params['chunk_size']
+        epochs = params['epochs']
+        if algorithm == 'multinomial_nb' and epochs > 1:
+            # Naive Bayes sums counts, so a second pass would count every row twice
+            logger.info('multinomial_nb is trained in a single epoch')
+            epochs = 1
+
+        rng = np.random.default_rng(params['random_state'])
+        starts = np.arange(0, n_rows, chunk_size)
+        logger.debug('Incremental %s training started with %d samples in %d chunks',
+                     algorithm, n_rows, len(starts))
+        for epoch in range(epochs):
+            epoch_start = time.perf_counter()
+            for start in rng.permutation(starts):
+                X, y = read_rows(int(start), int(min(start + chunk_size, n_rows)))
+                order = rng.permutation(len(y))
+                clf.partial_fit(X[order], y[order], classes=classes)
+            elapsed = time.perf_counter() - epoch_start
+            logger.info('Epoch %d/%d done in %.2fs (%.0f rows/s)', epoch + 1, epochs,
+                        elapsed, n_rows / elapsed if elapsed else float('inf'))
+        logger.debug('Model training completed')
+        return clf
+    except ValueError as e:
+        logger.error('ValueError during model training: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Error during model training: %s', e)
+        raise
+
+
+def serving_format(algorithm: str) -> str:
+    """Format of models/model_compiled.joblib, the model scored by src/serve.py."""
+    return 'forest_compiled' if algorithm == 'random_forest' else 'joblib'
+
+
+def save_model(model, file_path: str, fmt: str = 'pickle', compress: int = 0) -> None:
     """
     Save the trained model to a file.
 
     :param model: Trained model object
     :param file_path: Path to save the model file
+    :param fmt: Artifact format, one of model_io.MODEL_FORMATS
+    :param compress: joblib compression level (formats other than pickle)
     """
     try:
-        # Ensure the directory exists
-        os.makedirs(os.path.dirname(file_path), exist_ok=True)
-
-        with open(file_path, 'wb') as file:
-            pickle.dump(model, file)
+        model_io.save_model(model, file_path, fmt, compress)
         logger.debug('Model saved to %s', file_path)
     except FileNotFoundError as e:
         logger.error('File path not found: %s', e)
@@ -125,20 +281,36 @@ def save_model(model, file_path: str) -> None:
         raise
 
 
+@stage('model_training')
 def main():
     try:
         # params = {'n_estimators': 25, 'random_state': 2}
 
         params = load_params('params.yaml')['model_training']
         
-        train_data = load_data('./data/processed/train_tfidf.csv')
-        X_train = train_data.iloc[:, :-1].values
-        y_train = train_data.iloc[:, -1].values
+        features_path = './data/processed/train_tfidf.npz'
+        labels_path = './data/processed/train_labels.npy'
+        model_save_path = 'models/model.pkl'
 
-        clf = train_model(X_train, y_train, params)
+        if params['algorithm'] == 'random_forest':
+            X_train, y_train = load_features(features_path, labels_path)
+            previous = None
+            if params['warm_start']:
+                previous = load_previous_model(model_save_path, X_train, y_train, params)
 
-        model_save_path = 'models/model.pkl'
-        save_model(clf, model_save_path)
+            clf = train_model(X_train, y_train, params, previous)
+            set_stage_rows(X_train.shape[0])
+        else:
+            # Streamed from the feature artifact, never loaded whole
+            n_rows = feature_rows(features_path)
+            clf = train_incremental(feature_file_reader(features_path, labels_path), n_rows,
+                                    label_classes(labels_path, params['chunk_size']), params)
+            set_stage_rows(n_rows)
+
+        save_model(clf, model_save_path, params['model_format'], params['model_compress'])
+        # Copy of the model for low-latency scoring (src/serve.py): the compact
+        # float32/int32 forest, or the linear model itself
+        save_model(clf, 'models/model_compiled.joblib', serving_format(params['algorithm']))
 
     except Exception as e:
         logger.error('Failed to complete the model building process: %s', e)
@@ -0,0 +1,170 @@
+import os
+import sys
+import glob
+import json
+import time
+import resource
+import functools
+from contextlib import contextmanager
+from logging_setup import get_logger
+
+logger = get_logger('perf')
+
+# Directory holding one measurement file per pipeline stage
+PERF_DIR = os.path.join('reports', 'perf')
+
+# Stage currently running in this process and the measurements recorded in it
+_current_stage = None
+_records = []
+# Report of every stage measured in this process, by stage name
+_stage_reports = {}
+
+
+def _cpu_seconds() -> float:
+    """User + system CPU time of this process and its reaped children (pool workers)."""
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
+
+
+def _peak_rss_mb() -> float:
+    """High-water mark of this process's RSS in MiB."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is reported in bytes on macOS and KiB on Linux
+    return peak / 2**20 if sys.platform == 'darwin' else peak / 2**10
+
+
+class Measurement:
+    """
+    Wall time, CPU time, peak RSS and throughput of one measured block.
+
+    `rows` may be set inside the block once the number of processed rows is
+    known. `peak_rss_mb` is the process high-water mark when the block ends.
+    """
+
+    def __init__(self, name: str, rows: int = None):
+        self.name = name
+        self.rows = rows
+        self.wall_s = None
+        self.cpu_s = None
+        self.peak_rss_mb = None
+
+    def as_dict(self) -> dict:
+        rows_per_s = None
+        if self.rows is not None and self.wall_s:
+            rows_per_s = self.rows / self.wall_s
+        return {
+            'name': self.name,
+            'wall_s': self.wall_s,
+            'cpu_s': self.cpu_s,
+            'peak_rss_mb': self.peak_rss_mb,
+            'rows': self.rows,
+            'rows_per_s': rows_per_s,
+        }
+
+
+@contextmanager
+def measure(name: str, rows: int = None):
+    """
+    Measure a block of code and record it under the running stage.
+
+    Usage:
+        with measure('apply_tfidf') as m:
+            ...
+            m.rows = X.shape[0]
+    """
+    measurement = Measurement(name, rows)
+    wall_start, cpu_start = time.perf_counter(), _cpu_seconds()
+    try:
+        yield measurement
+    finally:
+        measurement.wall_s = time.perf_counter() - wall_start
+        measurement.cpu_s = _cpu_seconds() - cpu_start
+        measurement.peak_rss_mb = _peak_rss_mb()
+        if _current_stage is not None:
+            _records.append(measurement.as_dict())
+        logger.debug('%s took %.3fs wall, %.3fs CPU', name, measurement.wall_s, measurement.cpu_s)
+
+
+def instrument(name: str = None, rows=None, result_rows=None):
+    """
+    Decorator measuring every call of a function with `measure`.
+
+    Args:
+        name (str): Record name, defaults to the function name.
+        rows (Callable): Computes the processed row count from the call's
+            arguments.
+        result_rows (Callable): Computes the processed row count from the
+            return value.
+    """
+    def decorator(func):
+        record_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with measure(record_name) as measurement:
+                if rows is not None:
+                    measurement.rows = rows(*args, **kwargs)
+                result = func(*args, **kwargs)
+                if result_rows is not None:
+                    measurement.rows = result_rows(result)
+            return result
+        return wrapper
+    return decorator
+
+
+@contextmanager
+def stage(stage_name: str, perf_dir: str = PERF_DIR):
+    """
+    Measure a whole pipeline stage and write `<perf_dir>/<stage_name>.json`
+    with the stage totals and every measurement recorded inside it.
+
+    Works as a context manager or as a decorator on a stage's `main()`.
+    With `perf_dir=None` the report is only kept in memory (`stage_reports`).
+    """
+    global _current_stage
+    total = Measurement(stage_name)
+    _current_stage = total
+    _records.clear()
+    wall_start, cpu_start = time.perf_counter(), _cpu_seconds()
+    try:
+        yield total
+    finally:
+        total.wall_s = time.perf_counter() - wall_start
+        total.cpu_s = _cpu_seconds() - cpu_start
+        total.peak_rss_mb = _peak_rss_mb()
+        _current_stage = None
+        report = {'stage': total.as_dict(), 'functions': list(_records)}
+        _records.clear()
+        _stage_reports[stage_name] = report
+        if perf_dir is not None:
+            try:
+                os.makedirs(perf_dir, exist_ok=True)
+                with open(os.path.join(perf_dir, f'{stage_name}.json'), 'w') as file:
+                    json.dump(report, file, indent=4)
+                logger.debug('Stage measurements saved for %s', stage_name)
+            except Exception as e:
+                logger.error('Failed to save stage measurements: %s', e)
+
+
+def set_stage_rows(rows: int) -> None:
+    """Record how many rows the running stage processed."""
+    if _current_stage is not None:
+        _current_stage.rows = rows
+
+
+def stage_reports(stage_names: list) -> dict:
+    """{stage: report} of the given stages as last measured in this process."""
+    return {name: _stage_reports[name] for name in stage_names if name in _stage_reports}
+
+
+def collect(perf_dir: str = PERF_DIR) -> dict:
+    """Merge every per-stage measurement file into a single {stage: report} dict."""
+    reports = {}
+    for file_path in sorted(glob.glob(os.path.join(perf_dir, '*.json'))):
+        with open(file_path, 'r') as file:
+            report = json.load(file)
+        reports[report['stage']['name']] = report
+    return reports
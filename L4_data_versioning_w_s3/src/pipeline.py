@@ -0,0 +1,245 @@
+"""
+Run every pipeline stage inside one Python process.
+
+Stages hand DataFrames, feature matrices and the model to each other in
+memory instead of re-reading what the previous stage wrote, and the heavy
+libraries are imported once. Each stage's artifacts are still written to
+the paths declared in dvc.yaml unless --no-artifacts is given, so the
+results can be committed or compared against a staged `dvc repro`.
+
+Run from the project root:
+    python src/pipeline.py
+    python src/pipeline.py --from-raw --no-artifacts --no-live
+"""
+import os
+import argparse
+import numpy as np
+import yaml
+from artifact_io import artifact_path, read_frame, save_features, write_frame
+from dedup_index import DedupIndex
+from download_cache import DownloadCache
+from perf import PERF_DIR, set_stage_rows, stage, stage_reports
+from transform_store import TransformStore
+import data_ingestion
+import data_preprocessing
+import feature_engineering
+import model_training
+import model_evaluation
+from logging_setup import get_logger
+
+logger = get_logger('pipeline')
+
+DATA_URL = 'https://raw.githubusercontent.com/vikashishere/Datasets/main/spam.csv'
+
+
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('Parameters retrieved from %s', params_path)
+        return params
+    except FileNotFoundError:
+        logger.error('File not found: %s', params_path)
+        raise
+    except yaml.YAMLError as e:
+        logger.error('YAML error: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error: %s', e)
+        raise
+
+
+def read_raw(fmt: str) -> tuple:
+    """Read the train/test split written by data_ingestion."""
+    return (read_frame(artifact_path('./data/raw', 'train', fmt), fmt),
+            read_frame(artifact_path('./data/raw', 'test', fmt), fmt))
+
+
+def ingest(params: dict, save_artifacts: bool = True) -> tuple:
+    """Download (or reuse) the dataset and split it into train and test."""
+    ingestion_params = params['data_ingestion']
+    fmt = params['artifacts']['format']
+    cache = DownloadCache(ingestion_params['cache_dir'],
+                          max_bytes=ingestion_params['cache_max_bytes'])
+    data_url = cache.fetch(DATA_URL)
+
+    if ingestion_params['streaming']:
+        index, append = None, False
+        if ingestion_params['dedup']:
+            index, append = data_ingestion.open_dedup_index(ingestion_params, './data', fmt)
+        # The streaming split is out-of-core by design and always goes through disk
+        data_ingestion.stream_split(
+            data_url, data_path='./data', test_size=ingestion_params['test_size'],
+            random_state=ingestion_params['random_state'],
+            chunk_size=ingestion_params['chunk_size'], fmt=fmt, index=index, append=append)
+        if index is not None:
+            data_ingestion.save_dedup_index(index, './data', fmt)
+        train_data, test_data = read_raw(fmt)
+    else:
+        from sklearn.model_selection import train_test_split
+
+        final_df = data_ingestion.preprocess_data(data_ingestion.load_data(data_url))
+        if ingestion_params['dedup']:
+            final_df = final_df[DedupIndex().add_new(final_df)]
+        train_data, test_data = train_test_split(
+            final_df, test_size=ingestion_params['test_size'],
+            random_state=ingestion_params['random_state'])
+        if save_artifacts:
+            data_ingestion.save_data(train_data, test_data, data_path='./data', fmt=fmt)
+    set_stage_rows(len(train_data) + len(test_data))
+    return train_data, test_data
+
+
+def preprocess(train_data, test_data, params: dict, save_artifacts: bool = True) -> tuple:
+    """Normalize the text and encode the target of both splits."""
+    pp_params = params['data_preprocessing']
+    fmt = params['artifacts']['format']
+    set_stage_rows(len(train_data) + len(test_data))
+
+    store = None
+    if pp_params['cache_path']:
+        store = TransformStore(pp_params['cache_path'],
+                               data_preprocessing.get_normalizer(pp_params['tokenizer']).fingerprint())
+    try:
+        train_processed = data_preprocessing.preprocess_df(
+            train_data, n_jobs=pp_params['n_jobs'], chunk_size=pp_params['chunk_size'],
+            store=store, drop_duplicates=not params['data_ingestion']['dedup'],
+            tokenizer=pp_params['tokenizer'])
+        test_processed = data_preprocessing.preprocess_df(
+            test_data, n_jobs=pp_params['n_jobs'], chunk_size=pp_params['chunk_size'],
+            store=store, drop_duplicates=not params['data_ingestion']['dedup'],
+            tokenizer=pp_params['tokenizer'])
+    finally:
+        if store is not None:
+            store.close()
+
+    if save_artifacts:
+        interim_path = os.path.join('./data', 'interim')
+        write_frame(train_processed, artifact_path(interim_path, 'train_processed', fmt), fmt)
+        write_frame(test_processed, artifact_path(interim_path, 'test_processed', fmt), fmt)
+
+    # Same view feature_engineering.load_data builds from the interim artifact
+    return (train_processed[['text', 'target']].fillna(''),
+            test_processed[['text', 'target']].fillna(''))
+
+
+def engineer_features(train_data, test_data, params: dict, save_artifacts: bool = True) -> tuple:
+    """Vectorize both splits with the configured feature backend."""
+    fe_params = params['feature_engineering']
+    X_train, y_train, X_test, y_test, vectorizer = feature_engineering.build_features(
+        train_data, test_data, fe_params)
+    set_stage_rows(X_train.shape[0] + X_test.shape[0])
+
+    if save_artifacts:
+        processed_path = os.path.join('./data', 'processed')
+        feature_engineering.save_vectorizer(vectorizer, os.path.join('models', 'vectorizer.pkl'))
+        save_features(X_train, y_train,
+                      os.path.join(processed_path, 'train_tfidf.npz'),
+                      os.path.join(processed_path, 'train_labels.npy'))
+        save_features(X_test, y_test,
+                      os.path.join(processed_path, 'test_tfidf.npz'),
+                      os.path.join(processed_path, 'test_labels.npy'))
+        if fe_params['export_dense_csv']:
+            feature_engineering.save_data(
+                feature_engineering.to_dense_frame(X_train, y_train),
+                os.path.join(processed_path, 'train_tfidf.csv'))
+            feature_engineering.save_data(
+                feature_engineering.to_dense_frame(X_test, y_test),
+                os.path.join(processed_path, 'test_tfidf.csv'))
+    return X_train, y_train, X_test, y_test
+
+
+def run(params: dict, save_artifacts: bool = True, from_raw: bool = False,
+        track: bool = True) -> dict:
+    """
+    Run data_ingestion through model_evaluation in this process.
+
+    Args:
+        params (dict): Parsed params.yaml.
+        save_artifacts (bool): Write every stage's outputs to the dvc.yaml paths.
+        from_raw (bool): Start from the existing data/raw split instead of
+            downloading and splitting the dataset.
+        track (bool): Log the run with dvclive like the model_evaluation stage.
+
+    Returns:
+        dict: Evaluation metrics.
+    """
+    fmt = params['artifacts']['format']
+    data_preprocessing.download_nltk_resources()
+    # reports/perf/*.json are artifacts too; the run's report only covers its own stages
+    perf_dir = PERF_DIR if save_artifacts else None
+    stage_names = ['data_preprocessing', 'feature_engineering', 'model_training',
+                   'model_evaluation']
+
+    if from_raw:
+        train_data, test_data = read_raw(fmt)
+    else:
+        stage_names.insert(0, 'data_ingestion')
+        with stage('data_ingestion', perf_dir):
+            train_data, test_data = ingest(params, save_artifacts)
+
+    with stage('data_preprocessing', perf_dir):
+        train_data, test_data = preprocess(train_data, test_data, params, save_artifacts)
+
+    with stage('feature_engineering', perf_dir):
+        X_train, y_train, X_test, y_test = engineer_features(
+            train_data, test_data, params, save_artifacts)
+
+    with stage('model_training', perf_dir):
+        mt_params = params['model_training']
+        if mt_params['algorithm'] == 'random_forest':
+            previous = None
+            if mt_params['warm_start']:
+                previous = model_training.load_previous_model(
+                    'models/model.pkl', X_train, y_train, mt_params)
+            clf = model_training.train_model(X_train, y_train, mt_params, previous)
+        else:
+            clf = model_training.train_incremental(
+                lambda start, stop: (X_train[start:stop], y_train[start:stop]),
+                X_train.shape[0], np.unique(y_train), mt_params)
+        set_stage_rows(X_train.shape[0])
+        if save_artifacts:
+            model_training.save_model(clf, 'models/model.pkl', mt_params['model_format'],
+                                      mt_params['model_compress'])
+            model_training.save_model(clf, 'models/model_compiled.joblib',
+                                      model_training.serving_format(mt_params['algorithm']))
+
+    with stage('model_evaluation', perf_dir):
+        metrics, curves = model_evaluation.evaluate_model(clf, X_test, y_test)
+        set_stage_rows(X_test.shape[0])
+        if save_artifacts:
+            model_evaluation.save_metrics(metrics, json_file_path='reports/metrics.json')
+
+    perf = stage_reports(stage_names)
+    if save_artifacts:
+        model_evaluation.save_metrics(perf, json_file_path='reports/perf.json')
+    if track:
+        model_evaluation.track_experiment(metrics, curves, perf, params)
+    return metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--params', default='params.yaml')
+    parser.add_argument('--no-artifacts', action='store_true',
+                        help='keep every intermediate result in memory only')
+    parser.add_argument('--from-raw', action='store_true',
+                        help='start from the existing data/raw split')
+    parser.add_argument('--no-live', action='store_true',
+                        help='do not log the run with dvclive')
+    args = parser.parse_args()
+
+    try:
+        params = load_params(args.params)
+        metrics = run(params, save_artifacts=not args.no_artifacts,
+                      from_raw=args.from_raw, track=not args.no_live)
+        logger.info('Pipeline finished: %s', metrics)
+    except Exception as e:
+        logger.error('Failed to complete the pipeline: %s', e)
+        print(f"Error: {e}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,277 @@
+import json
+import time
+import queue
+import pickle
+import threading
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+import yaml
+import model_io
+from data_preprocessing import download_nltk_resources, get_normalizer
+from logging_setup import get_logger
+
+logger = get_logger('serve')
+
+
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('Parameters retrieved from %s', params_path)
+        return params
+    except FileNotFoundError:
+        logger.error('File not found: %s', params_path)
+        raise
+    except yaml.YAMLError as e:
+        logger.error('YAML error: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error: %s', e)
+        raise
+
+
+def load_pickle(file_path: str):
+    """Load a pickled artifact such as the fitted vectorizer."""
+    try:
+        with open(file_path, 'rb') as file:
+            obj = pickle.load(file)
+        logger.debug('Artifact loaded from %s', file_path)
+        return obj
+    except FileNotFoundError:
+        logger.error('Artifact not found at: %s', file_path)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error while loading %s: %s', file_path, e)
+        raise
+
+
+class Scorer:
+    """
+    Score raw messages with the trained model.
+
+    The model, the fitted vectorizer and the text normalizer are loaded once;
+    `score` applies the same normalization as `transform_text`. Models saved
+    as forest_arrays or forest_compiled are memory-mapped, so server
+    processes on one host share their pages. `tokenizer` is the
+    data_preprocessing tokenizer engine.
+    """
+
+    def __init__(self, model_path: str, vectorizer_path: str, tokenizer: str = 'nltk'):
+        self.model = model_io.load_model(model_path)
+        self.vectorizer = load_pickle(vectorizer_path)
+        self.normalizer = get_normalizer(tokenizer)
+
+    def score(self, texts: list) -> tuple:
+        """Return (spam probabilities, predicted labels) for a batch of raw texts."""
+        X = self.vectorizer.transform(self.normalizer.transform_many(texts))
+        proba = model_io.predict_proba(self.model, X)
+        labels = self.model.classes_[np.argmax(proba, axis=1)]
+        return proba[:, 1], labels
+
+
+class LatencyMetrics:
+    """Rolling window of request latencies, batch sizes and throughput."""
+
+    def __init__(self, window: int = 10000):
+        self.lock = threading.Lock()
+        self.latencies = deque(maxlen=window)
+        self.batch_sizes = deque(maxlen=window)
+        self.started = time.monotonic()
+        self.requests = 0
+        self.messages = 0
+
+    def record_request(self, latency: float, n_messages: int) -> None:
+        with self.lock:
+            self.latencies.append((time.monotonic(), latency))
+            self.requests += 1
+            self.messages += n_messages
+
+    def record_batch(self, size: int) -> None:
+        with self.lock:
+            self.batch_sizes.append(size)
+
+    def snapshot(self) -> dict:
+        with self.lock:
+            latencies = list(self.latencies)
+            batch_sizes = list(self.batch_sizes)
+            requests, messages = self.requests, self.messages
+        uptime = time.monotonic() - self.started
+        snapshot = {
+            'uptime_s': uptime,
+            'requests': requests,
+            'messages': messages,
+            'batches': len(batch_sizes),
+            'mean_batch_size': float(np.mean(batch_sizes)) if batch_sizes else 0.0,
+        }
+        if latencies:
+            stamps, values = np.array(latencies).T
+            span = max(stamps[-1] - stamps[0], 1e-9)
+            snapshot.update({
+                'latency_p50_ms': float(np.percentile(values, 50) * 1000),
+                'latency_p99_ms': float(np.percentile(values, 99) * 1000),
+                # Throughput over the requests still in the window
+                'throughput_rps': (len(values) - 1) / span if len(values) > 1 else 0.0,
+            })
+        return snapshot
+
+
+class MicroBatcher:
+    """
+    Gather concurrent scoring requests into micro-batches.
+
+    A single worker thread waits for the first pending request, then keeps
+    collecting until `max_batch_size` messages are queued or `max_wait_ms`
+    has passed, and scores the whole batch with one call to `score_fn`.
+
+    Args:
+        score_fn (Callable[[list], tuple]): Scores a list of texts, returning
+            per-text result arrays.
+        max_batch_size (int): Maximum number of messages per batch.
+        max_wait_ms (float): Longest time the first request of a batch waits
+            for others to join.
+        metrics (LatencyMetrics): Optional sink for batch sizes.
+    """
+
+    def __init__(self, score_fn, max_batch_size: int = 64, max_wait_ms: float = 5.0,
+                 metrics: LatencyMetrics = None):
+        self.score_fn = score_fn
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.metrics = metrics
+        self.pending = queue.Queue()
+        self.worker = threading.Thread(target=self._run, name='micro-batcher', daemon=True)
+        self.worker.start()
+
+    def submit(self, texts: list) -> Future:
+        """Queue texts for scoring; the future resolves to per-text results."""
+        future = Future()
+        self.pending.put((texts, future))
+        return future
+
+    def _collect(self) -> list:
+        batch = [self.pending.get()]
+        size = len(batch[0][0])
+        deadline = time.monotonic() + self.max_wait
+        while size < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                item = self.pending.get(timeout=remaining)
+            except queue.Empty:
+                break
+            batch.append(item)
+            size += len(item[0])
+        return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._collect()
+            texts = [text for item_texts, _ in batch for text in item_texts]
+            try:
+                results = self.score_fn(texts)
+            except Exception as e:
+                logger.error('Scoring a batch of %d messages failed: %s', len(texts), e)
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            if self.metrics is not None:
+                self.metrics.record_batch(len(texts))
+            start = 0
+            for item_texts, future in batch:
+                end = start + len(item_texts)
+                future.set_result(tuple(result[start:end] for result in results))
+                start = end
+
+
+class ScoringServer(ThreadingHTTPServer):
+    """Threaded HTTP server with a listen backlog sized for concurrent clients."""
+    request_queue_size = 1024
+    daemon_threads = True
+
+
+def make_handler(batcher: MicroBatcher, metrics: LatencyMetrics, timeout: float = 30):
+    """Build the request handler class bound to a batcher and metrics sink."""
+
+    class ScoringHandler(BaseHTTPRequestHandler):
+
+        def _send_json(self, status: int, payload: dict) -> None:
+            body = json.dumps(payload).encode('utf-8')
+            self.send_response(status)
+            self.send_header('Content-Type', 'application/json')
+            self.send_header('Content-Length', str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def do_GET(self):
+            if self.path == '/health':
+                self._send_json(200, {'status': 'ok'})
+            elif self.path == '/metrics':
+                self._send_json(200, metrics.snapshot())
+            else:
+                self._send_json(404, {'error': 'not found'})
+
+        def do_POST(self):
+            if self.path != '/predict':
+                self._send_json(404, {'error': 'not found'})
+                return
+            start = time.monotonic()
+            try:
+                length = int(self.headers.get('Content-Length', 0))
+                payload = json.loads(self.rfile.read(length))
+                texts = payload['texts'] if 'texts' in payload else [payload['text']]
+                if not isinstance(texts, list) or not texts:
+                    raise ValueError('texts must be a non-empty list')
+                if not all(isinstance(text, str) for text in texts):
+                    raise ValueError('texts must be strings')
+            except (ValueError, KeyError, TypeError) as e:
+                self._send_json(400, {'error': f'invalid request: {e}'})
+                return
+            try:
+                probabilities, labels = batcher.submit(texts).result(timeout=timeout)
+            except Exception as e:
+                self._send_json(500, {'error': str(e)})
+                return
+            metrics.record_request(time.monotonic() - start, len(texts))
+            self._send_json(200, {
+                'probabilities': [float(p) for p in probabilities],
+                'labels': [int(label) for label in labels],
+            })
+
+        def log_message(self, format, *args):
+            # Per-request access logs would dominate the hot path
+            pass
+
+    return ScoringHandler
+
+
+def main():
+    try:
+        all_params = load_params('params.yaml')
+        params = all_params['serving']
+        download_nltk_resources()
+
+        scorer = Scorer(params['model_path'], './models/vectorizer.pkl',
+                        all_params['data_preprocessing']['tokenizer'])
+        metrics = LatencyMetrics()
+        batcher = MicroBatcher(scorer.score, max_batch_size=params['max_batch_size'],
+                               max_wait_ms=params['max_wait_ms'], metrics=metrics)
+
+        server = ScoringServer((params['host'], params['port']),
+                               make_handler(batcher, metrics))
+        logger.info('Serving on http://%s:%d (max_batch_size=%d, max_wait_ms=%s)',
+                    params['host'], params['port'], params['max_batch_size'],
+                    params['max_wait_ms'])
+        server.serve_forever()
+    except KeyboardInterrupt:
+        logger.info('Shutting down')
+    except Exception as e:
+        logger.error('Failed to run the scoring service: %s', e)
+        print(f"Error: {e}")
+
+
+if __name__ == '__main__':
+    main()
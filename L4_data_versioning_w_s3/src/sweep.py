@@ -0,0 +1,253 @@
+"""
+Hyperparameter sweep over feature_engineering.max_features x
+model_training.n_estimators that reuses the upstream work.
+
+The raw split is preprocessed once and the term counts of the full
+vocabulary are computed once. Each max_features value then keeps the
+top-k columns by total term frequency, exactly the columns a
+TfidfVectorizer(max_features=k) fit would keep, and only the IDF weights
+are refit. Trials run on a process pool; each one is logged as its own
+dvclive experiment and the best configuration is written as a complete
+params file that `dvc repro` can reproduce.
+
+Run from the project root after data_ingestion:
+    python src/sweep.py
+    python src/sweep.py --max-features 25 50 100 --n-estimators 50 100 --n-jobs 4
+    cp params.best.yaml params.yaml && dvc repro
+"""
+import os
+import re
+import json
+import argparse
+import itertools
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+import yaml
+import data_preprocessing
+import model_evaluation
+import model_training
+import pipeline
+from logging_setup import get_logger
+
+logger = get_logger('sweep')
+
+
+def load_params(params_path: str) -> dict:
+    """Load parameters from a YAML file."""
+    try:
+        with open(params_path, 'r') as file:
+            params = yaml.safe_load(file)
+        logger.debug('Parameters retrieved from %s', params_path)
+        return params
+    except FileNotFoundError:
+        logger.error('File not found: %s', params_path)
+        raise
+    except yaml.YAMLError as e:
+        logger.error('YAML error: %s', e)
+        raise
+    except Exception as e:
+        logger.error('Unexpected error: %s', e)
+        raise
+
+
+class TermCounts:
+    """
+    Term counts of the full training vocabulary, from which the TF-IDF
+    features of any `max_features` are derived without refitting.
+
+    Args:
+        train_texts (np.ndarray): Preprocessed training texts.
+        test_texts (np.ndarray): Preprocessed test texts.
+    """
+
+    def __init__(self, train_texts: np.ndarray, test_texts: np.ndarray):
+        from sklearn.feature_extraction.text import CountVectorizer
+
+        # float64 CSR counts sliced by column exactly as TfidfVectorizer does,
+        # so the features match it bit for bit
+        vectorizer = CountVectorizer(dtype=np.float64)
+        self.train = vectorizer.fit_transform(train_texts)
+        self.test = vectorizer.transform(test_texts)
+        self.n_terms = self.train.shape[1]
+        # Same ranking as CountVectorizer._limit_features: columns are in
+        # vocabulary order and ties are broken by the same argsort
+        term_frequencies = np.asarray(self.train.sum(axis=0)).ravel()
+        self.ranking = (-term_frequencies).argsort()
+
+    def columns(self, max_features: int) -> np.ndarray:
+        """Indices of the `max_features` most frequent terms, in vocabulary order."""
+        if max_features >= self.n_terms:
+            return np.arange(self.n_terms)
+        return np.sort(self.ranking[:max_features])
+
+    def tfidf(self, max_features: int) -> tuple:
+        """(X_train, X_test) equal to those of TfidfVectorizer(max_features=max_features)."""
+        from sklearn.feature_extraction.text import TfidfTransformer
+
+        columns = self.columns(max_features)
+        train_counts = self.train[:, columns]
+        test_counts = self.test[:, columns]
+        idf = TfidfTransformer().fit(train_counts)
+        return idf.transform(train_counts).tocsr(), idf.transform(test_counts).tocsr()
+
+
+_worker_state = None
+
+
+def _init_worker(counts, y_train, y_test, model_params):
+    """Receive the shared counts and labels once per pool worker."""
+    global _worker_state
+    _worker_state = (counts, y_train, y_test, model_params, {})
+
+
+def _run_trial(trial: dict) -> dict:
+    counts, y_train, y_test, model_params, features = _worker_state
+    max_features = trial['max_features']
+    if max_features not in features:
+        # Trials of the same max_features share their features within a worker
+        features.clear()
+        features[max_features] = counts.tfidf(max_features)
+    X_train, X_test = features[max_features]
+
+    params = dict(model_params, n_estimators=trial['n_estimators'], n_jobs=1)
+    clf = model_training.train_model(X_train, y_train, params)
+    metrics, _ = model_evaluation.evaluate_model(clf, X_test, y_test)
+    return dict(trial, metrics=metrics)
+
+
+def run_trials(counts: TermCounts, y_train, y_test, model_params: dict, trials: list,
+               n_jobs: int = 1) -> list:
+    """Train and evaluate every trial, on a process pool when n_jobs > 1."""
+    if n_jobs == -1:
+        n_jobs = os.cpu_count() or 1
+    # Consecutive trials share a max_features, so a worker rarely recomputes features
+    trials = sorted(trials, key=lambda trial: (trial['max_features'], trial['n_estimators']))
+    initargs = (counts, y_train, y_test, model_params)
+    if n_jobs <= 1:
+        _init_worker(*initargs)
+        return [_run_trial(trial) for trial in trials]
+    with ProcessPoolExecutor(max_workers=n_jobs, initializer=_init_worker,
+                             initargs=initargs) as executor:
+        return list(executor.map(_run_trial, trials))
+
+
+def trial_params(params: dict, trial: dict) -> dict:
+    """Full params of a trial: the base params with its overrides applied."""
+    params = json.loads(json.dumps(params))
+    params['feature_engineering']['backend'] = 'tfidf'
+    params['feature_engineering']['max_features'] = trial['max_features']
+    params['model_training']['n_estimators'] = trial['n_estimators']
+    params['model_training']['warm_start'] = False
+    return params
+
+
+def log_trial(trial: dict, params: dict) -> None:
+    """Log one trial as its own dvclive experiment."""
+    from dvclive import Live
+
+    with Live(save_dvc_exp=True) as live:
+        for name, value in trial['metrics'].items():
+            # Undefined metrics (e.g. ROC-AUC with one class) are not logged
+            if value is not None:
+                live.log_metric(name, value)
+        live.log_params(trial_params(params, trial))
+
+
+def update_params_text(text: str, updates: dict) -> str:
+    """
+    Set `(section, key)` values in the text of params.yaml, leaving its
+    comments and layout untouched.
+    """
+    section, found, lines = None, set(), []
+    for line in text.splitlines(keepends=True):
+        if re.match(r'^\w+:\s*$', line):
+            section = line.split(':')[0]
+        else:
+            match = re.match(r'^(\s+)(\w+):', line)
+            if match and (section, match.group(2)) in updates:
+                key = (section, match.group(2))
+                value = yaml.safe_dump(updates[key], default_flow_style=True).strip()
+                value = value[:-len('...')].strip() if value.endswith('...') else value
+                line = f"{match.group(1)}{match.group(2)}: {value}\n"
+                found.add(key)
+        lines.append(line)
+    missing = set(updates) - found
+    if missing:
+        raise KeyError(f'Parameters not found in params file: {sorted(missing)}')
+    return ''.join(lines)
+
+
+def write_best_params(params_path: str, output_path: str, best: dict) -> None:
+    """Write a copy of params.yaml set to the best trial's configuration."""
+    with open(params_path, 'r') as file:
+        text = file.read()
+    text = update_params_text(text, {
+        ('feature_engineering', 'backend'): 'tfidf',
+        ('feature_engineering', 'max_features'): best['max_features'],
+        ('model_training', 'n_estimators'): best['n_estimators'],
+        ('model_training', 'warm_start'): False,
+    })
+    with open(output_path, 'w') as file:
+        file.write(text)
+    logger.info('Best configuration written to %s', output_path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__,
+                                     formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--params', default='params.yaml')
+    parser.add_argument('--max-features', type=int, nargs='+',
+                        help='defaults to sweep.max_features')
+    parser.add_argument('--n-estimators', type=int, nargs='+',
+                        help='defaults to sweep.n_estimators')
+    parser.add_argument('--n-jobs', type=int, help='defaults to sweep.n_jobs')
+    parser.add_argument('--metric', help='metric to maximize, defaults to sweep.metric')
+    parser.add_argument('--output', default='params.best.yaml',
+                        help='params file written with the best configuration')
+    parser.add_argument('--no-live', action='store_true',
+                        help='do not log the trials with dvclive')
+    args = parser.parse_args()
+
+    try:
+        params = load_params(args.params)
+        sweep_params = params['sweep']
+        max_features = args.max_features or sweep_params['max_features']
+        n_estimators = args.n_estimators or sweep_params['n_estimators']
+        n_jobs = args.n_jobs or sweep_params['n_jobs']
+        metric = args.metric or sweep_params['metric']
+
+        data_preprocessing.download_nltk_resources()
+        train_data, test_data = pipeline.read_raw(params['artifacts']['format'])
+        train_data, test_data = pipeline.preprocess(
+            train_data, test_data, params, save_artifacts=False)
+        counts = TermCounts(train_data['text'].values, test_data['text'].values)
+        logger.info('Vocabulary of %d terms counted once for %d trials',
+                    counts.n_terms, len(max_features) * len(n_estimators))
+
+        trials = [{'max_features': k, 'n_estimators': n}
+                  for k, n in itertools.product(max_features, n_estimators)]
+        results = run_trials(counts, train_data['target'].values, test_data['target'].values,
+                             params['model_training'], trials, n_jobs)
+
+        for result in results:
+            logger.info('max_features=%d n_estimators=%d %s=%.4f', result['max_features'],
+                        result['n_estimators'], metric, result['metrics'][metric])
+            if not args.no_live:
+                log_trial(result, params)
+
+        # Ties go to the cheaper configuration
+        best = max(results, key=lambda result: (
+            result['metrics'][metric], -result['max_features'], -result['n_estimators']))
+        logger.info('Best: max_features=%d n_estimators=%d %s=%.4f', best['max_features'],
+                    best['n_estimators'], metric, best['metrics'][metric])
+
+        model_evaluation.save_metrics({'metric': metric, 'best': best, 'trials': results},
+                                      json_file_path='reports/sweep.json')
+        write_best_params(args.params, args.output, best)
+    except Exception as e:
+        logger.error('Failed to complete the sweep: %s', e)
+        print(f"Error: {e}")
+
+
+if __name__ == '__main__':
+    main()
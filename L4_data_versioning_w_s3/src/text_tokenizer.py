@@ -0,0 +1,104 @@
+import re
+from functools import lru_cache, partial
+from logging_setup import get_logger
+
+logger = get_logger('text_tokenizer')
+
+TOKENIZERS = ('nltk', 'fast')
+
+# Punkt only breaks sentences after one of these
+_SENTENCE_END = re.compile(r'[.?!]')
+# The alphanumeric words the Treebank contraction rules split in two
+_CONTRACTION = re.compile(r'(?i)(?:can(?=not$)|gim(?=me$)|gon(?=na$)|got(?=ta$)|lem(?=me$)|wan(?=na$))')
+# Closing brackets and quotes the Treebank final-period rule looks past
+_CLOSING = '])}>"\'»”’'
+
+
+class FastTokenizer:
+    """
+    Alphanumeric tokens of `nltk.word_tokenize`, without running the Treebank
+    regexes over every message.
+
+    Sentences are still split with Punkt, but only for texts containing a
+    '.', '?' or '!'. Within a sentence, whitespace-separated chunks that
+    are entirely alphanumeric are tokens as they are, apart from the few
+    contractions Treebank splits (cannot, gonna, ...). The remaining chunks
+    are tokenized by Treebank on their own and the results memoized; the
+    Treebank rules only look across whitespace at the end of a sentence,
+    which is why the last chunk is tokenized separately from the others.
+    Non-alphanumeric tokens are dropped.
+
+    Args:
+        language (str): Punkt model used to split sentences.
+        cache_size (int): Maximum number of memoized chunks.
+    """
+
+    def __init__(self, language='english', cache_size=100_000):
+        from nltk.tokenize import sent_tokenize
+        from nltk.tokenize.destructive import NLTKWordTokenizer
+
+        self.language = language
+        self._sent_tokenize = sent_tokenize
+        self._treebank = NLTKWordTokenizer()
+        self._chunk_tokens = lru_cache(maxsize=cache_size)(self._tokenize_chunk)
+
+    def _tokenize_chunk(self, chunk, last):
+        # A trailing alphanumeric chunk keeps the end-of-sentence rules off this one
+        tokens = self._treebank.tokenize(chunk if last else chunk + ' a')
+        if not last:
+            tokens.pop()
+        return tuple(token for token in tokens if token.isalnum())
+
+    def _tokenize_sentence(self, sentence):
+        chunks = sentence.split()
+        if not chunks:
+            return []
+        if not chunks[-1].strip(_CLOSING):
+            # The final-period rule can reach back past closing quotes to earlier chunks
+            return [token for token in self._treebank.tokenize(sentence) if token.isalnum()]
+
+        tokens = []
+        last = len(chunks) - 1
+        for position, chunk in enumerate(chunks):
+            if chunk.isalnum():
+                match = _CONTRACTION.match(chunk) if len(chunk) in (5, 6) else None
+                if match is None:
+                    tokens.append(chunk)
+                else:
+                    tokens += (chunk[:match.end()], chunk[match.end():])
+            else:
+                tokens += self._chunk_tokens(chunk, position == last)
+        return tokens
+
+    def __call__(self, text):
+        """
+        Tokenize a text.
+
+        Args:
+            text (str): The input text.
+        Returns:
+            list[str]: The alphanumeric tokens `word_tokenize` returns for it, in order.
+        """
+        if _SENTENCE_END.search(text) is None:
+            return self._tokenize_sentence(text)
+        return [token for sentence in self._sent_tokenize(text, self.language)
+                for token in self._tokenize_sentence(sentence)]
+
+
+def make_tokenizer(name='nltk', language='english'):
+    """
+    Build a word tokenizer by engine name.
+
+    Args:
+        name (str): 'nltk' for `nltk.word_tokenize` or 'fast' for `FastTokenizer`.
+        language (str): Punkt model used to split sentences.
+    Returns:
+        Callable[[str], list[str]]: The tokenizer.
+    """
+    if name == 'nltk':
+        from nltk import word_tokenize
+        return partial(word_tokenize, language=language)
+    if name == 'fast':
+        return FastTokenizer(language)
+    logger.error('Unknown tokenizer %r, expected one of %s', name, TOKENIZERS)
+    raise ValueError(f"Unknown tokenizer '{name}', expected one of {TOKENIZERS}")
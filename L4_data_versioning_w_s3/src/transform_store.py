@@ -0,0 +1,77 @@
+import os
+import hashlib
+import sqlite3
+from logging_setup import get_logger
+
+logger = get_logger('transform_store')
+
+# SQLite limits the number of bound parameters per statement
+_BATCH_SIZE = 500
+
+
+def text_key(text: str) -> bytes:
+    """Fixed-width digest of a raw text, used as the store key."""
+    return hashlib.blake2b(text.encode('utf-8'), digest_size=16).digest()
+
+
+class TransformStore:
+    """
+    On-disk map from raw text to its transformed text, backed by SQLite.
+
+    The store records the fingerprint of the normalizer that produced its
+    entries. Opening it with a different fingerprint (new normalizer code,
+    stopword list or stemmer settings) drops every cached result.
+
+    Args:
+        db_path (str): Path to the SQLite database file.
+        fingerprint (str): Identifier of the normalizer configuration.
+    """
+
+    def __init__(self, db_path: str, fingerprint: str):
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.db_path = db_path
+        self.fingerprint = fingerprint
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)')
+        self.conn.execute(
+            'CREATE TABLE IF NOT EXISTS results (key BLOB PRIMARY KEY, value TEXT NOT NULL)')
+        row = self.conn.execute(
+            "SELECT value FROM meta WHERE key = 'fingerprint'").fetchone()
+        if row is None or row[0] != fingerprint:
+            if row is not None:
+                logger.info('Normalizer changed, invalidating transform store %s', db_path)
+            self.conn.execute('DELETE FROM results')
+            self.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('fingerprint', ?)",
+                (fingerprint,))
+        self.conn.commit()
+
+    def get_many(self, keys: list) -> dict:
+        """Return {key: transformed text} for the keys present in the store."""
+        found = {}
+        for i in range(0, len(keys), _BATCH_SIZE):
+            batch = keys[i:i + _BATCH_SIZE]
+            placeholders = ','.join('?' * len(batch))
+            found.update(self.conn.execute(
+                f'SELECT key, value FROM results WHERE key IN ({placeholders})', batch))
+        return found
+
+    def put_many(self, items) -> None:
+        """Insert (key, transformed text) pairs."""
+        self.conn.executemany(
+            'INSERT OR REPLACE INTO results (key, value) VALUES (?, ?)', items)
+        self.conn.commit()
+
+    def __len__(self):
+        return self.conn.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+        return False
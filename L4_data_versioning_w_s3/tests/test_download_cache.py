@@ -0,0 +1,165 @@
+"""
+DownloadCache against a local http.server stand-in for the dataset host.
+
+Run from the project root:
+    python -m pytest tests
+"""
+import os
+import sys
+import threading
+import urllib.error
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..', 'src'))
+
+from download_cache import DownloadCache, sha256_file  # noqa: E402
+
+LAST_MODIFIED = 'Sun, 18 Oct 2026 12:00:00 GMT'
+
+
+class Handler(BaseHTTPRequestHandler):
+    """Serves `server.files` with an ETag per payload and answers revalidations with 304."""
+
+    def do_GET(self):
+        self.server.requests.append((self.path, dict(self.headers)))
+        payload = self.server.files.get(self.path)
+        if payload is None:
+            self.send_error(404)
+            return
+        etag = f'"{len(payload)}-{hash(payload) & 0xffffffff:x}"'
+        validators = self.server.validators
+        # If-None-Match takes precedence over If-Modified-Since (RFC 9110)
+        if self.headers.get('If-None-Match') is not None:
+            not_modified = 'etag' in validators and self.headers['If-None-Match'] == etag
+        else:
+            not_modified = ('last_modified' in validators and
+                            self.headers.get('If-Modified-Since') == LAST_MODIFIED)
+        if not_modified:
+            self.send_response(304)
+            self.end_headers()
+            return
+        self.send_response(200)
+        if 'etag' in validators:
+            self.send_header('ETag', etag)
+        if 'last_modified' in validators:
+            self.send_header('Last-Modified', LAST_MODIFIED)
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    httpd = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    httpd.files = {'/spam.csv': b'label,text\nham,hello\n'}
+    httpd.requests = []
+    httpd.validators = {'etag', 'last_modified'}
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    httpd.url = lambda path: f'http://127.0.0.1:{httpd.server_address[1]}{path}'
+    yield httpd
+    httpd.shutdown()
+    httpd.server_close()
+
+
+@pytest.fixture
+def cache(tmp_path):
+    return DownloadCache(str(tmp_path / 'downloads'), timeout=5)
+
+
+def read(path: str) -> bytes:
+    with open(path, 'rb') as file:
+        return file.read()
+
+
+def test_first_download_is_stored_by_checksum(server, cache):
+    path = cache.fetch(server.url('/spam.csv'))
+
+    assert read(path) == server.files['/spam.csv']
+    assert os.path.basename(path) == sha256_file(path)
+    entry = cache.index[server.url('/spam.csv')]
+    assert entry['etag'] and entry['last_modified'] == LAST_MODIFIED
+    # The index survives a new cache instance
+    assert DownloadCache(cache.cache_dir).index == cache.index
+
+
+@pytest.mark.parametrize('validators, header', [
+    ({'etag'}, 'If-None-Match'),
+    ({'last_modified'}, 'If-Modified-Since'),
+])
+def test_not_modified_is_served_from_cache(server, cache, validators, header):
+    server.validators = validators
+    first = cache.fetch(server.url('/spam.csv'))
+    second = cache.fetch(server.url('/spam.csv'))
+
+    assert second == first
+    assert header in server.requests[-1][1]
+    assert len(os.listdir(cache.blob_dir)) == 1
+
+
+def test_changed_payload_replaces_the_blob(server, cache):
+    old = cache.fetch(server.url('/spam.csv'))
+    server.files['/spam.csv'] = b'label,text\nspam,win a prize\n'
+    new = cache.fetch(server.url('/spam.csv'))
+
+    assert read(new) == server.files['/spam.csv']
+    assert not os.path.exists(old)
+
+
+def test_offline_fallback(server, cache):
+    url = server.url('/spam.csv')
+    path = cache.fetch(url)
+    server.shutdown()
+    server.server_close()
+
+    assert cache.fetch(url) == path
+    with pytest.raises(urllib.error.URLError):
+        cache.fetch(server.url('/other.csv'))
+
+
+def test_corrupt_blob_is_discarded_and_refetched(server, cache):
+    url = server.url('/spam.csv')
+    path = cache.fetch(url)
+    with open(path, 'wb') as file:
+        file.write(b'corrupted')
+
+    refetched = cache.fetch(url)
+
+    assert read(refetched) == server.files['/spam.csv']
+    # A full download, not a revalidation of the corrupt copy
+    assert 'If-None-Match' not in server.requests[-1][1]
+    assert os.listdir(cache.blob_dir) == [os.path.basename(refetched)]
+
+
+def test_corrupt_blob_is_removed_when_offline(server, cache):
+    url = server.url('/spam.csv')
+    path = cache.fetch(url)
+    with open(path, 'wb') as file:
+        file.write(b'corrupted')
+    server.shutdown()
+    server.server_close()
+
+    with pytest.raises(urllib.error.URLError):
+        cache.fetch(url)
+    assert url not in cache.index
+    assert not os.path.exists(path)
+
+
+def test_least_recently_used_entries_are_evicted(server, tmp_path):
+    for name in ('a', 'b', 'c'):
+        server.files[f'/{name}.csv'] = name.encode() * 100
+    cache = DownloadCache(str(tmp_path / 'downloads'), max_bytes=250, timeout=5)
+
+    cache.fetch(server.url('/a.csv'))
+    cache.fetch(server.url('/b.csv'))
+    cache.fetch(server.url('/a.csv'))  # b is now the least recently used
+    cache.fetch(server.url('/c.csv'))
+
+    assert set(cache.index) == {server.url('/a.csv'), server.url('/c.csv')}
+    assert len(os.listdir(cache.blob_dir)) == 2
+    assert sum(entry['size'] for entry in cache.index.values()) <= 250